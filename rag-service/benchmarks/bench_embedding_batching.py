@@ -0,0 +1,75 @@
+"""VectorStoreService 임베딩 처리량 벤치마크 (문서별 encode 루프 vs 길이순 배치 encode)
+
+사용법 (rag-service 디렉터리에서):
+    python -m benchmarks.bench_embedding_batching --docs 200 --batch-size 64
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from services.vector_store import encode_length_sorted
+
+WORDS = "검색 결과 문서 벡터 임베딩 모델 질문 답변 대화 기억 search result vector embedding model query answer".split()
+
+
+def make_documents(count: int, seed: int = 42):
+    """청크 분할 결과와 비슷한 길이 분포(50~1000자)의 문서 생성"""
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        length = rng.randint(50, 1000)
+        text = ""
+        while len(text) < length:
+            text += rng.choice(WORDS) + " "
+        documents.append(text[:length])
+    return documents
+
+
+def bench_per_document(model, documents):
+    """기존 방식: 문서마다 encode 호출 후 tolist()"""
+    start = time.perf_counter()
+    vectors = [model.encode(text).tolist() for text in documents]
+    return time.perf_counter() - start, np.asarray(vectors, dtype=np.float32)
+
+
+def bench_batched(model, documents, batch_size):
+    """개선 방식: 길이순 정렬 배치 encode, 정규화된 float32 배열"""
+    start = time.perf_counter()
+    vectors = encode_length_sorted(model, documents, batch_size)
+    return time.perf_counter() - start, vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model)
+    documents = make_documents(args.docs)
+
+    # 워밍업
+    model.encode(documents[:8])
+
+    before = min(bench_per_document(model, documents)[0] for _ in range(args.repeat))
+    after = min(bench_batched(model, documents, args.batch_size)[0] for _ in range(args.repeat))
+
+    # 결과 동일성 확인 (정규화 후 코사인 유사도)
+    _, reference = bench_per_document(model, documents)
+    _, batched = bench_batched(model, documents, args.batch_size)
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    min_cosine = float(np.min(np.sum(reference * batched, axis=1)))
+
+    print(f"문서 수: {args.docs}, 배치 크기: {args.batch_size}, 모델: {args.model}")
+    print(f"문서별 encode: {args.docs / before:8.1f} docs/sec ({before:.2f}s)")
+    print(f"배치 encode:   {args.docs / after:8.1f} docs/sec ({after:.2f}s)")
+    print(f"속도 향상: {before / after:.1f}x, 최소 코사인 유사도: {min_cosine:.6f}")
+
+
+if __name__ == "__main__":
+    main()
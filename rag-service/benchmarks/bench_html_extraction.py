@@ -0,0 +1,149 @@
+"""HTML 본문 추출 벤치마크 (기존 BeautifulSoup 전체 파싱 vs 추출기 백엔드/모드별 처리량과 결과 비교)
+
+저장된 HTML 파일(기본: benchmarks/fixtures/html)을 백엔드(bs4/lxml/selectolax, 설치된 것만)와
+모드(main/boilerplate)별로 추출해 초당 페이지 수, MB/s, 추출 글자 수, 기존 방식 대비 단어 일치율을 출력합니다.
+--scale로 본문을 반복해 큰 페이지(글자 수 예산 조기 종료 효과)를 흉내낼 수 있고,
+--workers를 주면 프로세스 풀로 동시에 추출했을 때의 처리량도 측정합니다.
+
+사용법 (rag-service 디렉터리에서):
+    python -m benchmarks.bench_html_extraction --repeat 50
+    python -m benchmarks.bench_html_extraction --scale 40 --max-chars 10000 --workers 4
+    python -m benchmarks.bench_html_extraction --fixtures /path/to/saved/pages --show 300
+"""
+import argparse
+import asyncio
+import glob
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from services.html_extractor import BACKENDS, HtmlExtractor, extract_html, get_backend
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def extract_baseline(html: str, max_chars: int) -> dict:
+    """기존 방식: html.parser 전체 파싱 → decompose → get_text → 전체 re.sub → 자르기"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
+        tag.decompose()
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else ''
+    main_content = soup.find('main') or soup.find('article') or soup.find('body')
+    text = (main_content or soup).get_text(separator=' ', strip=True)
+    text = re.sub(r'\s+', ' ', text).strip()
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return {'title': title_text, 'content': text}
+
+
+def load_fixtures(directory: str, scale: int) -> dict:
+    """HTML 파일 읽기 (scale > 1이면 body 안쪽을 반복해 큰 페이지로 만듦)"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        if scale > 1:
+            match = re.search(r'(<body[^>]*>)(.*)(</body>)', html, re.S | re.I)
+            if match:
+                html = html[:match.start(2)] + match.group(2) * scale + html[match.end(2):]
+        pages[os.path.basename(path)] = html
+    return pages
+
+
+def words(text: str) -> set:
+    return set(text.split())
+
+
+def bench(extract, pages: dict, repeat: int):
+    """모든 페이지를 repeat번 추출 - (초당 페이지, MB/s, 페이지별 결과)"""
+    results = {name: extract(html) for name, html in pages.items()}
+    total_bytes = sum(len(html.encode('utf-8')) for html in pages.values())
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages.values():
+            extract(html)
+    elapsed = time.perf_counter() - start_time
+    return len(pages) * repeat / elapsed, total_bytes * repeat / elapsed / 1e6, results
+
+
+async def bench_pool(backend: str, mode: str, max_chars: int, workers: int, pages: dict, repeat: int) -> float:
+    """HtmlExtractor로 모든 페이지를 동시에 추출했을 때의 초당 페이지 수 (workers=0이면 스레드)"""
+    extractor = HtmlExtractor(backend=backend, mode=mode, max_chars=max_chars, workers=workers)
+    extractor.pool_min_bytes = 0
+    try:
+        # 워커 프로세스 기동 시간은 제외
+        await asyncio.gather(*[extractor.extract(html) for html in pages.values()])
+        start_time = time.perf_counter()
+        await asyncio.gather(*[extractor.extract(html) for _ in range(repeat) for html in pages.values()])
+        return len(pages) * repeat / (time.perf_counter() - start_time)
+    finally:
+        extractor.close()
+
+
+def available_backends() -> list:
+    backends = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+            backends.append(name)
+        except ImportError:
+            print(f"{name}: 설치되지 않아 건너뜀")
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="저장된 HTML 파일 디렉터리")
+    parser.add_argument("--scale", type=int, default=1, help="body 내용을 반복할 횟수 (큰 페이지 흉내)")
+    parser.add_argument("--max-chars", type=int, default=10000, help="본문 글자 수 상한 (0이면 제한 없음)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 풀 처리량도 측정할 워커 수")
+    parser.add_argument("--show", type=int, default=0, help="페이지별 추출 결과를 앞에서부터 N자 출력")
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures, args.scale)
+    if not pages:
+        parser.error(f"HTML 파일이 없습니다: {args.fixtures}")
+    total_kb = sum(len(html.encode('utf-8')) for html in pages.values()) / 1024
+    print(f"페이지: {len(pages)}개 ({total_kb:.0f}KB), 반복: {args.repeat}, 최대 글자 수: {args.max_chars}\n")
+
+    variants = [("baseline", lambda html: extract_baseline(html, args.max_chars))]
+    for backend in available_backends():
+        for mode in ("main", "boilerplate"):
+            variants.append((
+                f"{backend}/{mode}",
+                lambda html, backend=backend, mode=mode: extract_html(html, backend, mode, args.max_chars)
+            ))
+
+    print(f"{'variant':<24}{'pages/s':>10}{'MB/s':>9}{'avg chars':>11}{'word match':>12}")
+    baseline_results = None
+    for name, extract in variants:
+        pages_per_second, mb_per_second, results = bench(extract, pages, args.repeat)
+        if baseline_results is None:
+            baseline_results = results
+        # 기존 방식 결과 단어 중 새 결과에도 있는 비율 (페이지 평균)
+        match = sum(
+            len(words(results[page]['content']) & words(baseline_results[page]['content'])) / max(1, len(words(baseline_results[page]['content'])))
+            for page in pages
+        ) / len(pages)
+        average_chars = sum(len(result['content']) for result in results.values()) / len(results)
+        print(f"{name:<24}{pages_per_second:>10.1f}{mb_per_second:>9.2f}{average_chars:>11.0f}{match:>11.0%}")
+
+        if args.show:
+            for page, result in results.items():
+                print(f"  [{page}] {result['title']!r}: {result['content'][:args.show]}")
+
+    if args.workers:
+        backend = available_backends()[0]
+        print(f"\n동시 추출 ({backend}/main, 페이지 {len(pages) * args.repeat}개)")
+        for workers in (0, args.workers):
+            pages_per_second = asyncio.run(bench_pool(backend, "main", args.max_chars, workers, pages, args.repeat))
+            label = "thread" if workers == 0 else f"process x{workers}"
+            print(f"{label:<24}{pages_per_second:>10.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
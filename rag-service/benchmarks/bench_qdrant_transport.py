@@ -0,0 +1,120 @@
+"""Qdrant REST vs gRPC 처리량 벤치마크 (업서트 / 단건 검색 / 배치 검색)
+
+로컬 Qdrant 컨테이너가 필요합니다 (REST 6333, gRPC 6334 포트):
+    docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+
+임시 콜렉션을 만들어 같은 무작위 벡터로 두 전송 방식을 번갈아 측정하고 종료 시 삭제합니다.
+
+사용법 (rag-service 디렉터리에서):
+    python -m benchmarks.bench_qdrant_transport --dim 384 --points 5000 --queries 500
+    python -m benchmarks.bench_qdrant_transport --dim 1536 --concurrency 16 --batch 2
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, QueryRequest, VectorParams
+
+
+def make_client(prefer_grpc: bool) -> AsyncQdrantClient:
+    return AsyncQdrantClient(
+        host=os.getenv("QDRANT_HOST", "localhost"),
+        port=int(os.getenv("QDRANT_PORT", "6333")),
+        grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+        prefer_grpc=prefer_grpc
+    )
+
+
+async def run_concurrently(jobs, concurrency: int) -> float:
+    """작업들을 최대 concurrency개씩 동시에 실행하고 걸린 시간(초) 반환"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        async with semaphore:
+            await job()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*[run(job) for job in jobs])
+    return time.perf_counter() - start_time
+
+
+async def bench_transport(name: str, prefer_grpc: bool, vectors: np.ndarray, queries: np.ndarray, args) -> dict:
+    client = make_client(prefer_grpc)
+    collection_name = f"bench_transport_{name}_{uuid.uuid4().hex[:8]}"
+    await client.create_collection(collection_name, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+
+    try:
+        # 업서트: upsert_batch개씩 나눠 동시에 전송
+        upsert_jobs = []
+        for start in range(0, len(vectors), args.upsert_batch):
+            points = [
+                PointStruct(id=start + i, vector=vector.tolist(), payload={'page_content': f"doc {start + i}"})
+                for i, vector in enumerate(vectors[start:start + args.upsert_batch])
+            ]
+            upsert_jobs.append(lambda points=points: client.upsert(collection_name, points=points, wait=True))
+        upsert_seconds = await run_concurrently(upsert_jobs, args.concurrency)
+
+        # 단건 검색: 쿼리마다 query_points 한 번
+        search_jobs = [
+            lambda query=query: client.query_points(collection_name, query=query.tolist(), limit=args.k, with_payload=True)
+            for query in queries
+        ]
+        search_seconds = await run_concurrently(search_jobs, args.concurrency)
+
+        # 배치 검색: batch개 쿼리를 query_batch_points 한 번으로 (단기기억 + 장기기억 검색과 같은 형태)
+        batch_jobs = []
+        for start in range(0, len(queries), args.batch):
+            requests = [QueryRequest(query=query.tolist(), limit=args.k, with_payload=True) for query in queries[start:start + args.batch]]
+            batch_jobs.append(lambda requests=requests: client.query_batch_points(collection_name, requests=requests))
+        batch_seconds = await run_concurrently(batch_jobs, args.concurrency)
+    finally:
+        await client.delete_collection(collection_name)
+        await client.close()
+
+    return {
+        'upsert': len(vectors) / upsert_seconds,
+        'search': len(queries) / search_seconds,
+        'batch': len(queries) / batch_seconds
+    }
+
+
+async def run(args):
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((args.points, args.dim), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    samples = {'rest': [], 'grpc': []}
+    for i in range(args.repeat):
+        for name, prefer_grpc in (("rest", False), ("grpc", True)):
+            result = await bench_transport(name, prefer_grpc, vectors, queries, args)
+            samples[name].append(result)
+            print(f"[{i + 1}/{args.repeat}] {name}: " + ", ".join(f"{key} {value:.0f}/s" for key, value in result.items()))
+
+    print(f"\n차원: {args.dim}, 포인트: {args.points}, 쿼리: {args.queries}, 동시성: {args.concurrency}, 배치: {args.batch}")
+    print(f"{'transport':<12}{'upsert pts/s':>16}{'search q/s':>16}{'batch q/s':>16}")
+    for name, results in samples.items():
+        best = {key: max(result[key] for result in results) for key in results[0]}
+        print(f"{name:<12}{best['upsert']:>16.0f}{best['search']:>16.0f}{best['batch']:>16.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dim", type=int, default=384, help="벡터 차원 (로컬 모델 384, OpenAI 1536)")
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=2, help="배치 검색 한 번에 묶을 쿼리 수")
+    parser.add_argument("--upsert-batch", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
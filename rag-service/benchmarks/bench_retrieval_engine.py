@@ -0,0 +1,59 @@
+"""RetrievalEngine 단계별 지연 시간 벤치마크 (search / ingest / retrieve / assemble)
+
+Qdrant와 검색 API 설정(.env)이 필요합니다. 같은 쿼리를 반복 실행하므로 두 번째 실행부터는
+검색 결과 캐시, 페이지 저장소, 임베딩 캐시가 적용된 지연 시간을 보여줍니다.
+
+사용법 (rag-service 디렉터리에서):
+    python -m benchmarks.bench_retrieval_engine --mode chat --query "인공지능 최신 동향" --repeat 5
+    python -m benchmarks.bench_retrieval_engine --mode structured --no-web-search
+"""
+import argparse
+import asyncio
+import statistics
+import uuid
+
+from services.rag_service import RAGService
+from services.retrieval_engine import RETRIEVAL_MODES
+from services.vector_store import VectorStoreService
+from services.web_search import WebSearchService
+
+
+async def run(mode: str, query: str, repeat: int, use_web_search: bool):
+    web_search = WebSearchService()
+    vector_store = VectorStoreService()
+    await vector_store.initialize()
+    rag_service = RAGService(vector_store, web_search)
+    conversation_id = f"bench-{uuid.uuid4()}"
+
+    samples = {}
+    try:
+        for i in range(repeat):
+            result = await rag_service.retrieval_engine.run(mode, query, conversation_id, use_web_search=use_web_search)
+            for stage, duration_ms in result['timings'].items():
+                samples.setdefault(stage, []).append(duration_ms)
+            print(f"[{i + 1}/{repeat}] {result['timings']} (소스 {len(result['sources'])}개, 문서 {len(result['documents'])}개)")
+    finally:
+        await rag_service.delete_conversation_collection(conversation_id)
+        await web_search.close()
+        rag_service.close()
+        await vector_store.close()
+
+    print(f"\n모드: {mode}, 반복: {repeat}, 웹 검색: {use_web_search}")
+    print(f"{'stage':<16}{'first':>10}{'p50':>10}{'max':>10}")
+    for stage, values in samples.items():
+        print(f"{stage:<16}{values[0]:>8}ms{statistics.median(values):>8.0f}ms{max(values):>8}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=sorted(RETRIEVAL_MODES), default="chat")
+    parser.add_argument("--query", default="인공지능 최신 동향")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-web-search", action="store_true", help="웹 검색/저장 없이 메모리 검색만 측정")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.mode, args.query, args.repeat, not args.no_web_search))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
+import asyncio
 import time
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import os
@@ -11,6 +13,7 @@ from services.rag_service import RAGService
 from services.web_search import WebSearchService
 from services.vector_store import VectorStoreService
 from services.logging_service import logging_service, REQUEST_COUNT, REQUEST_DURATION
+from services.chat_stream import ChatStream, format_ndjson, format_sse
 
 # 환경 변수 로드
 load_dotenv()
@@ -34,6 +37,23 @@ rag_service = RAGService(vector_store, web_search)
 # 로깅 서비스 초기화
 logging_service.log_application_event("startup", "RAG Service started")
 
+@app.on_event("startup")
+async def startup():
+    """Qdrant 콜렉션 레지스트리 적재, 기본 콜렉션 초기화, 중단된 인덱싱 작업 재개"""
+    await vector_store.initialize()
+    await rag_service.ingestion_jobs.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """공유 HTTP 커넥션 풀, LLM 실행 풀, Qdrant 연결 정리"""
+    await rag_service.ingestion_jobs.close()
+    await web_search.close()
+    rag_service.close()
+    await vector_store.close()
+    logging_service.log_application_event("shutdown", "RAG Service stopped")
+    # 남은 로그 전송 (Kafka 프로듀서 flush/close는 블로킹이므로 스레드에서 실행)
+    await asyncio.to_thread(logging_service.close)
+
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[str] = None
@@ -282,6 +302,65 @@ async def chat_conversational(request: ConversationalChatRequest):
         })
         raise HTTPException(status_code=500, detail=str(e))
 
+def create_streaming_response(http_request: Request, stream: ChatStream) -> StreamingResponse:
+    """Accept 헤더가 text/event-stream이면 SSE, 그 외에는 NDJSON으로 스트리밍 (저장은 스트림 종료 후)"""
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        media_format, media_type = "sse", "text/event-stream"
+    else:
+        media_format, media_type = "ndjson", "application/x-ndjson"
+    
+    return StreamingResponse(
+        stream.encoded(media_format),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(stream.finalize)
+    )
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    logging_service.log_application_event(
+        "chat_stream_request", 
+        "Streaming chat request received", 
+        message_length=len(request.message),
+        use_web_search=request.use_web_search
+    )
+    stream = rag_service.stream_response("chat", request.message, request.conversation_id, request.use_web_search)
+    return create_streaming_response(http_request, stream)
+
+@app.post("/chat/structured/stream")
+async def chat_structured_stream(request: StructuredChatRequest, http_request: Request):
+    logging_service.log_application_event(
+        "structured_chat_stream_request", 
+        "Streaming structured chat request received", 
+        message_length=len(request.message),
+        use_web_search=request.use_web_search
+    )
+    # /chat/structured와 같이 주제 기반 답변 사용
+    stream = rag_service.stream_response("topic_based", request.message, request.conversation_id, request.use_web_search)
+    return create_streaming_response(http_request, stream)
+
+@app.post("/chat/topic-based/stream")
+async def chat_topic_based_stream(request: TopicBasedChatRequest, http_request: Request):
+    logging_service.log_application_event(
+        "topic_based_chat_stream_request", 
+        "Streaming topic-based chat request received", 
+        message_length=len(request.message),
+        use_web_search=request.use_web_search
+    )
+    stream = rag_service.stream_response("topic_based", request.message, request.conversation_id, request.use_web_search)
+    return create_streaming_response(http_request, stream)
+
+@app.post("/chat/conversational/stream")
+async def chat_conversational_stream(request: ConversationalChatRequest, http_request: Request):
+    logging_service.log_application_event(
+        "conversational_chat_stream_request", 
+        "Streaming conversational chat request received", 
+        message_length=len(request.message),
+        use_web_search=request.use_web_search
+    )
+    stream = rag_service.stream_response("conversational", request.message, request.conversation_id, request.use_web_search)
+    return create_streaming_response(http_request, stream)
+
 @app.post("/search", response_model=SearchResponse)
 async def search(request: SearchRequest):
     start_time = time.time()
@@ -335,7 +414,7 @@ async def index_urls(urls: List[str]):
             indexed_count=indexed_count
         )
         
-        return {"message": f"Indexed {indexed_count} URLs successfully"}
+        return {"message": f"Indexed {indexed_count} URLs successfully", "indexed_count": indexed_count}
     except Exception as e:
         duration = time.time() - start_time
         logging_service.log_error(e, {
@@ -345,13 +424,85 @@ async def index_urls(urls: List[str]):
         })
         raise HTTPException(status_code=500, detail=str(e))
 
+class IndexJobRequest(BaseModel):
+    urls: List[str]
+    conversation_id: Optional[str] = None
+
+@app.post("/index/jobs", status_code=202)
+async def submit_index_job(request: IndexJobRequest):
+    try:
+        job = await rag_service.ingestion_jobs.submit(request.urls, request.conversation_id)
+        
+        logging_service.log_application_event(
+            "index_job_submitted", 
+            "URL indexing job submitted", 
+            job_id=job['job_id'],
+            urls_count=job['total']
+        )
+        
+        return job
+    except Exception as e:
+        logging_service.log_error(e, {
+            "endpoint": "/index/jobs",
+            "urls_count": len(request.urls)
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/index/jobs/{job_id}")
+async def get_index_job(job_id: str):
+    job = await rag_service.ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/index/jobs/{job_id}/stream")
+async def stream_index_job(job_id: str, http_request: Request):
+    """작업 진행 상황을 progress 이벤트로 스트리밍하고 작업이 끝나면 done 이벤트로 종료"""
+    if await rag_service.ingestion_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        formatter, media_type = format_sse, "text/event-stream"
+    else:
+        formatter, media_type = format_ndjson, "application/x-ndjson"
+    
+    async def events():
+        async for job in rag_service.ingestion_jobs.watch(job_id):
+            event_type = "done" if job['status'] in ("completed", "failed") else "progress"
+            yield formatter({'type': event_type, **job})
+    
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/cache/responses")
+async def invalidate_response_cache(conversation_id: Optional[str] = None, mode: Optional[str] = None, source: Optional[str] = None):
+    try:
+        removed = rag_service.invalidate_response_cache(conversation_id, mode, source)
+        
+        logging_service.log_application_event(
+            "response_cache_invalidated",
+            "Response cache invalidation requested",
+            conversation_id=conversation_id,
+            mode=mode,
+            source=source,
+            removed=removed
+        )
+        
+        return {"message": f"Removed {removed} cached responses", "removed": removed}
+    except Exception as e:
+        logging_service.log_error(e, {"endpoint": "/cache/responses"})
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     try:
         health_status = {
-            "vector_store": vector_store.is_healthy(),
+            "vector_store": await vector_store.is_healthy(),
             "web_search": web_search.is_healthy(),
-            "rag_service": rag_service.is_healthy()
+            "rag_service": await rag_service.is_healthy()
         }
         
         logging_service.log_application_event(
@@ -0,0 +1,108 @@
+"""대화별 Qdrant 콜렉션을 멀티테넌트 공유 콜렉션으로 옮기는 마이그레이션 도구
+
+conversation_<id> → 공유 단기기억 콜렉션, long_term_memory_<id> → 공유 장기기억 콜렉션으로
+벡터를 다시 임베딩하지 않고 그대로 복사하며, 각 포인트의 metadata.conversation_id를 채웁니다.
+
+사용법 (rag-service 디렉터리에서):
+    python -m scripts.migrate_to_multi_tenant --dry-run
+    python -m scripts.migrate_to_multi_tenant --delete-source
+"""
+import argparse
+import asyncio
+import os
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct
+
+from services.conversation_store import METADATA_KEY, create_collection
+
+SOURCE_PREFIXES = {
+    "conversation_": os.getenv("QDRANT_SHARED_CONVERSATION_COLLECTION", "conversations"),
+    "long_term_memory_": os.getenv("QDRANT_SHARED_LONG_TERM_COLLECTION", "long_term_memory"),
+}
+
+
+def conversation_id_from_name(collection_name: str, prefix: str) -> str:
+    """콜렉션 이름에서 대화 ID 복원 (페이로드에 ID가 없는 경우에만 사용)"""
+    return collection_name[len(prefix):].replace('_', '-')
+
+
+async def ensure_target(client: AsyncQdrantClient, collection_name: str, vector_size: int, dry_run: bool):
+    """공유 콜렉션이 없으면 테넌트 인덱스와 함께 생성"""
+    if await client.collection_exists(collection_name):
+        return
+    print(f"공유 콜렉션 생성: {collection_name} (차원 {vector_size})")
+    if not dry_run:
+        await create_collection(client, collection_name, vector_size, multi_tenant=True)
+
+
+async def migrate_collection(client: AsyncQdrantClient, source: str, target: str, prefix: str, batch_size: int, dry_run: bool) -> int:
+    """콜렉션 하나의 포인트를 공유 콜렉션으로 복사"""
+    vector_size = (await client.get_collection(source)).config.params.vectors.size
+    await ensure_target(client, target, vector_size, dry_run)
+
+    fallback_id = conversation_id_from_name(source, prefix)
+    migrated = 0
+    offset = None
+    while True:
+        records, offset = await client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        points = []
+        for record in records:
+            payload = dict(record.payload or {})
+            metadata = dict(payload.get(METADATA_KEY) or {})
+            metadata.setdefault('conversation_id', fallback_id)
+            payload[METADATA_KEY] = metadata
+            # 같은 포인트 ID를 유지해 재실행해도 중복되지 않도록 함
+            points.append(PointStruct(id=record.id, vector=record.vector, payload=payload))
+
+        if points and not dry_run:
+            await client.upsert(collection_name=target, points=points)
+        migrated += len(points)
+
+        if offset is None:
+            break
+    return migrated
+
+
+async def run(args):
+    client = AsyncQdrantClient(host=args.host, port=args.port)
+    try:
+        collection_names = [col.name for col in (await client.get_collections()).collections]
+
+        total = 0
+        for name in sorted(collection_names):
+            for prefix, target in SOURCE_PREFIXES.items():
+                if not name.startswith(prefix) or name == target:
+                    continue
+                count = await migrate_collection(client, name, target, prefix, args.batch_size, args.dry_run)
+                total += count
+                print(f"{'[dry-run] ' if args.dry_run else ''}{name} -> {target}: {count}개 포인트")
+                if args.delete_source and not args.dry_run:
+                    await client.delete_collection(name)
+                    print(f"원본 콜렉션 삭제: {name}")
+
+        print(f"마이그레이션 완료: 총 {total}개 포인트")
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dry-run", action="store_true", help="복사하지 않고 대상만 출력")
+    parser.add_argument("--delete-source", action="store_true", help="복사 완료 후 원본 콜렉션 삭제")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from services.logging_service import CHAT_TIME_TO_FIRST_TOKEN
+
+
+def format_ndjson(event: Dict[str, Any]) -> str:
+    """이벤트를 NDJSON 한 줄로 직렬화"""
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """이벤트를 Server-Sent Events 형식으로 직렬화"""
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+class ChatStream:
+    """스트리밍 응답 한 건
+
+    - metadata 이벤트(sources, context_info)를 검색이 끝나는 즉시 전송한 뒤 LLM 토큰을 token 이벤트로 전달
+    - 대화 메모리/장기기억 저장은 스트림이 닫힌 뒤 finalize()에서 수행 (응답 지연에 포함되지 않음)
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        message: str,
+        prepare: Callable[[], Awaitable[Dict[str, Any]]],
+        llm_gateway,
+        complete: Callable[[str, Dict[str, Any], str], Awaitable[None]]
+    ):
+        self.mode = mode
+        self.message = message
+        self.prepare = prepare
+        self.llm_gateway = llm_gateway
+        self.complete = complete
+
+        self.turn: Optional[Dict[str, Any]] = None
+        self.response: Optional[str] = None
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """metadata → token... → done 순서의 이벤트 생성 (실패 시 error 이벤트로 종료)"""
+        start_time = time.time()
+        try:
+            self.turn = await self.prepare()
+        except Exception as e:
+            print(f"스트리밍 컨텍스트 수집 오류 ({self.mode}): {e}")
+            yield {'type': 'error', 'message': f"죄송합니다. 처리 중 오류가 발생했습니다: {str(e)}"}
+            return
+
+        yield {
+            'type': 'metadata',
+            'conversation_id': self.turn['conversation_id'],
+            'sources': self.turn['sources'],
+            'context_info': self.turn['context_info']
+        }
+
+        # LLM 호출이 필요 없는 턴 (빈 메시지, 캐시된 답변 등)
+        if self.turn['prompt'] is None:
+            if self.turn.get('cached'):
+                # 캐시된 답변도 대화 메모리에는 기록
+                self.response = self.turn['response']
+            yield {'type': 'token', 'content': self.turn['response']}
+            yield {'type': 'done', 'conversation_id': self.turn['conversation_id']}
+            return
+
+        chunks = []
+        try:
+            async for token in self.llm_gateway.astream(self.turn['prompt'], operation=self.turn['operation']):
+                if not chunks:
+                    CHAT_TIME_TO_FIRST_TOKEN.labels(mode=self.mode).observe(time.time() - start_time)
+                chunks.append(token)
+                yield {'type': 'token', 'content': token}
+        except Exception as e:
+            print(f"스트리밍 응답 생성 오류 ({self.mode}): {e}")
+            yield {'type': 'error', 'message': f"죄송합니다. 응답 생성 중 오류가 발생했습니다: {str(e)}"}
+            return
+
+        self.response = "".join(chunks)
+        yield {'type': 'done', 'conversation_id': self.turn['conversation_id']}
+
+    async def encoded(self, media_format: str = "ndjson") -> AsyncIterator[str]:
+        """HTTP 응답 본문용으로 직렬화된 이벤트"""
+        formatter = format_sse if media_format == "sse" else format_ndjson
+        async for event in self.events():
+            yield formatter(event)
+
+    async def finalize(self):
+        """스트림 종료 후 대화 메모리/장기기억 저장 (응답이 끝까지 생성된 경우에만)"""
+        if self.turn is None or self.response is None:
+            return
+        try:
+            await self.complete(self.message, self.turn, self.response)
+        except Exception as e:
+            print(f"스트리밍 응답 저장 실패 ({self.mode}): {e}")
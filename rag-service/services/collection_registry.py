@@ -0,0 +1,66 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Set
+
+from qdrant_client import AsyncQdrantClient
+
+
+class CollectionRegistry:
+    """Qdrant 콜렉션 존재 여부 레지스트리
+
+    - 시작 시 get_collections를 한 번만 호출해 적재하고 이후에는 생성/삭제 시 증분 갱신
+    - 없는 콜렉션은 collection_exists 확인 후 생성 (create-if-absent)
+    - 같은 콜렉션에 대한 동시 생성 요청은 하나로 합쳐서 처리
+    """
+
+    def __init__(self, client: AsyncQdrantClient):
+        self.client = client
+        self._known: Set[str] = set()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def load(self):
+        """전체 콜렉션 목록 적재 (시작 시 1회)"""
+        collections = await self.client.get_collections()
+        self._known = {col.name for col in collections.collections}
+        print(f"콜렉션 레지스트리 적재: {len(self._known)}개 콜렉션")
+
+    def __contains__(self, collection_name: str) -> bool:
+        return collection_name in self._known
+
+    def add(self, collection_name: str):
+        """생성된 콜렉션 등록"""
+        self._known.add(collection_name)
+
+    def discard(self, collection_name: str):
+        """삭제된 콜렉션 등록 해제"""
+        self._known.discard(collection_name)
+
+    async def ensure(self, collection_name: str, create: Callable[[], Awaitable[None]]) -> bool:
+        """콜렉션이 없으면 생성 - 이번 호출에서 새로 생성했으면 True"""
+        if collection_name in self._known:
+            return False
+
+        lock = self._locks.setdefault(collection_name, asyncio.Lock())
+        try:
+            async with lock:
+                # 먼저 잠금을 잡은 요청이 이미 생성했으면 바로 반환
+                if collection_name in self._known:
+                    return False
+                created = await self._create_if_absent(collection_name, create)
+                self._known.add(collection_name)
+                return created
+        finally:
+            if not lock.locked():
+                self._locks.pop(collection_name, None)
+
+    async def _create_if_absent(self, collection_name: str, create: Callable[[], Awaitable[None]]) -> bool:
+        """서버에 콜렉션이 없을 때만 생성 (다른 프로세스와의 경합 허용)"""
+        if await self.client.collection_exists(collection_name):
+            return False
+        try:
+            await create()
+            return True
+        except Exception:
+            # 다른 인스턴스가 먼저 생성한 경우
+            if await self.client.collection_exists(collection_name):
+                return False
+            raise
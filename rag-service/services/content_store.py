@@ -0,0 +1,105 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+class ContentStore:
+    """URL별로 추출된 페이지(제목/본문)와 ETag/Last-Modified를 보관하는 디스크 기반 저장소
+
+    - 신선도 기간(freshness) 안의 항목은 네트워크 요청 없이 재사용
+    - 기간이 지난 항목은 조건부 GET으로 재검증 (304 응답 시 재사용)
+    - 전체 크기가 상한을 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None, freshness: float = None):
+        self.path = path or os.getenv("CONTENT_STORE_PATH", "data/content_store.sqlite3")
+        self.max_bytes = max_bytes or int(os.getenv("CONTENT_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+        self.freshness = freshness or float(os.getenv("CONTENT_STORE_FRESHNESS_SECONDS", "3600"))
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                page TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed_at ON pages (accessed_at)")
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """저장된 항목 조회 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+        return {
+            'page': json.loads(row[0]),
+            'etag': row[1],
+            'last_modified': row[2],
+            'fetched_at': row[3]
+        }
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """신선도 기간 안의 항목인지 확인"""
+        return time.time() - entry['fetched_at'] < self.freshness
+
+    def put(self, url: str, page: Dict[str, Any], etag: str = None, last_modified: str = None):
+        """추출된 페이지 저장 후 크기 상한 적용"""
+        data = json.dumps(page, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, page, etag, last_modified, fetched_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, data, etag, last_modified, now, now, len(data.encode('utf-8')))
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str):
+        """304 재검증 성공 시 신선도 기간 갱신"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def _evict(self):
+        """전체 크기가 상한을 넘으면 오래된 항목부터 제거 (잠금 보유 상태에서 호출)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT url, size FROM pages ORDER BY accessed_at ASC").fetchall()
+        evicted = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", evicted)
+        print(f"콘텐츠 저장소 용량 초과로 {len(evicted)}개 항목 제거")
+
+    def close(self):
+        """DB 연결 정리"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,197 @@
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+from services.logging_service import CONTEXT_CHUNKS, PROMPT_TOKENS
+
+# 모델별 컨텍스트 윈도우 (토큰)
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    'gpt-4o-mini': 128000,
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+class TokenCounter:
+    """모델 토크나이저 기반 토큰 계산기 (텍스트 해시 기준 LRU 캐시)
+
+    tiktoken 인코딩을 불러올 수 없는 환경(오프라인 등)에서는 UTF-8 바이트 수 / 3으로 근사
+    (한글은 글자당 1토큰, 영문은 실제보다 약간 크게 계산되어 예산을 넘지 않는 쪽으로 동작)
+    """
+
+    def __init__(self, model_name: str, cache_size: int = None):
+        self.model_name = model_name
+        self.cache_size = cache_size or int(os.getenv("CONTEXT_TOKEN_CACHE_SIZE", "10000"))
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self.encoding = self._load_encoding(model_name)
+
+    @staticmethod
+    def _load_encoding(model_name: str):
+        try:
+            import tiktoken
+        except ImportError:
+            print("tiktoken이 설치되지 않아 토큰 수를 근사값으로 계산합니다.")
+            return None
+
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except Exception:
+            pass
+        try:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"토크나이저 로드 실패 ({model_name}), 토큰 수를 근사값으로 계산합니다: {e}")
+            return None
+
+    def count(self, text: str) -> int:
+        """텍스트의 토큰 수 (캐시 적용)"""
+        if not text:
+            return 0
+        key = hashlib.sha1(text.encode('utf-8')).digest()
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            return tokens
+
+        tokens = len(self.encoding.encode(text)) if self.encoding else self._approximate(text)
+        self._cache[key] = tokens
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """앞에서부터 max_tokens 토큰까지만 남김"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding:
+            tokens = self.encoding.encode(text)
+            if len(tokens) <= max_tokens:
+                return text
+            return self.encoding.decode(tokens[:max_tokens])
+        encoded = text.encode('utf-8')
+        if len(encoded) <= max_tokens * 3:
+            return text
+        return encoded[:max_tokens * 3].decode('utf-8', errors='ignore')
+
+    @staticmethod
+    def _approximate(text: str) -> int:
+        return max(1, len(text.encode('utf-8')) // 3)
+
+
+class ContextAssembler:
+    """검색 청크, 대화 히스토리, 지시문을 모델별 토큰 예산에 맞춰 프롬프트로 조립
+
+    - 지시문/질문(템플릿 고정 부분)은 항상 포함하고, 남은 예산을 히스토리와 청크가 나눠 사용
+    - 히스토리는 최신 메시지부터, 청크는 우선순위(낮을수록 먼저) → 점수(높을수록 먼저) 순으로 채움
+    - 예산에 걸친 청크는 잘라서 넣고, 선택된 청크는 원래 순서를 유지
+    - 포맷팅 오버헤드로 여러 번 줄여도 예산을 넘으면 청크, 히스토리 순으로 제외
+    - 최종 프롬프트 토큰 수를 operation별 히스토그램에 기록
+    """
+
+    def __init__(self, model_name: str, max_prompt_tokens: int = None, response_reserve_tokens: int = None, history_ratio: float = None):
+        self.model_name = model_name
+        self.counter = TokenCounter(model_name)
+
+        context_window = MODEL_CONTEXT_WINDOWS.get(model_name, DEFAULT_CONTEXT_WINDOW)
+        reserve = response_reserve_tokens or int(os.getenv("CONTEXT_RESPONSE_RESERVE_TOKENS", "2000"))
+        max_tokens = max_prompt_tokens or int(os.getenv("CONTEXT_MAX_PROMPT_TOKENS", "8000"))
+        self.budget = min(max_tokens, context_window - reserve)
+        self.history_ratio = history_ratio if history_ratio is not None else float(os.getenv("CONTEXT_HISTORY_RATIO", "0.3"))
+        self.min_chunk_tokens = int(os.getenv("CONTEXT_MIN_CHUNK_TOKENS", "64"))
+
+    def count(self, text: str) -> int:
+        return self.counter.count(text)
+
+    def assemble(
+        self,
+        render: Callable[[List[str], List[Dict[str, Any]]], str],
+        chunks: List[Dict[str, Any]],
+        history: List[str] = None,
+        operation: str = "default"
+    ) -> Dict[str, Any]:
+        """render(히스토리 줄 목록, 선택된 청크 목록)로 예산 안의 프롬프트 생성
+
+        chunks: {'text', 'priority', 'score', ...} 목록 (추가 키는 render에 그대로 전달)
+        history: 오래된 순서의 메시지 줄 목록
+        """
+        history = history or []
+        fixed_tokens = self.count(render([], []))
+        available = max(0, self.budget - fixed_tokens)
+
+        history_lines = self._pack_history(history, int(available * self.history_ratio))
+        history_tokens = sum(self.count(line) for line in history_lines)
+        chunk_budget = available - history_tokens
+
+        # 줄바꿈/번호 등 포맷팅 오버헤드로 예산을 넘으면 청크 예산을 줄여 다시 조립
+        for _ in range(3):
+            packed, stats = self._pack_chunks(chunks, chunk_budget)
+            prompt = render(history_lines, packed)
+            prompt_tokens = self.count(prompt)
+            overflow = prompt_tokens - self.budget
+            if overflow <= 0 or chunk_budget <= 0:
+                break
+            chunk_budget -= overflow
+
+        # 그래도 예산을 넘으면 청크를, 그다음 히스토리를 제외 (지시문/질문만은 항상 포함)
+        if prompt_tokens > self.budget and packed:
+            packed = []
+            stats = {'used': 0, 'truncated': 0, 'dropped': len(chunks)}
+            prompt = render(history_lines, packed)
+            prompt_tokens = self.count(prompt)
+        if prompt_tokens > self.budget and history_lines:
+            history_lines = []
+            prompt = render(history_lines, packed)
+            prompt_tokens = self.count(prompt)
+
+        PROMPT_TOKENS.labels(operation=operation).observe(prompt_tokens)
+        for result, value in stats.items():
+            if value:
+                CONTEXT_CHUNKS.labels(operation=operation, result=result).inc(value)
+
+        return {
+            'prompt': prompt,
+            'prompt_tokens': prompt_tokens,
+            'history_messages': len(history_lines),
+            **stats
+        }
+
+    def _pack_history(self, history: List[str], budget: int) -> List[str]:
+        """최신 메시지부터 예산 안에 들어가는 만큼 선택 (가장 최근 메시지는 잘라서라도 포함)"""
+        selected = []
+        remaining = budget
+        for line in reversed(history):
+            tokens = self.count(line)
+            if tokens > remaining:
+                if not selected and remaining > 0:
+                    selected.append(self.counter.truncate(line, remaining))
+                break
+            selected.append(line)
+            remaining -= tokens
+        return list(reversed(selected))
+
+    def _pack_chunks(self, chunks: List[Dict[str, Any]], budget: int) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """우선순위/점수 순으로 예산을 채우고 선택된 청크를 원래 순서로 반환"""
+        order = sorted(range(len(chunks)), key=lambda i: (chunks[i].get('priority', 0), -(chunks[i].get('score') or 0)))
+        selected: Dict[int, Dict[str, Any]] = {}
+        stats = {'used': 0, 'truncated': 0, 'dropped': 0}
+        remaining = budget
+
+        for index in order:
+            text = chunks[index]['text']
+            tokens = self.count(text)
+            if tokens <= remaining:
+                selected[index] = chunks[index]
+                remaining -= tokens
+                stats['used'] += 1
+            elif remaining >= self.min_chunk_tokens:
+                selected[index] = {**chunks[index], 'text': self.counter.truncate(text, remaining) + "..."}
+                remaining = 0
+                stats['truncated'] += 1
+            else:
+                stats['dropped'] += 1
+
+        return [selected[index] for index in sorted(selected)], stats
@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain.memory import ConversationBufferMemory
+
+from services.logging_service import CONVERSATION_STATE_RESIDENT, CONVERSATION_STATE_BYTES, CONVERSATION_STATE_EVICTIONS
+
+
+class ConversationHistoryBackend:
+    """퇴출된 대화 히스토리를 보관하는 SQLite 저장소"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("CONVERSATION_STATE_PATH", "data/conversation_state.sqlite3")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS histories (
+                conversation_id TEXT PRIMARY KEY,
+                messages TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, conversation_id: str) -> Optional[List[Dict[str, str]]]:
+        """저장된 메시지 목록 조회 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages FROM histories WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, conversation_id: str, messages: List[Dict[str, str]]):
+        """메시지 목록 저장"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO histories (conversation_id, messages, updated_at) VALUES (?, ?, ?)",
+                (conversation_id, json.dumps(messages, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, conversation_id: str):
+        """저장된 히스토리 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM histories WHERE conversation_id = ?", (conversation_id,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ConversationStateManager:
+    """대화 메모리와 대화별 벡터 스토어를 LRU/TTL로 제한하는 상태 관리자
+
+    - 최대 개수를 넘거나 유휴 시간이 지나면 오래된 항목부터 메모리에서 제거
+    - 제거된 대화 히스토리는 백엔드에 저장했다가 다음 접근 시 다시 불러옴
+    """
+
+    def __init__(self, max_entries: int = None, idle_timeout: float = None, backend: ConversationHistoryBackend = None):
+        self.max_entries = max_entries or int(os.getenv("CONVERSATION_STATE_MAX_ENTRIES", "1000"))
+        self.idle_timeout = idle_timeout or float(os.getenv("CONVERSATION_STATE_IDLE_SECONDS", "1800"))
+        self.backend = backend or ConversationHistoryBackend()
+
+        self._memories: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stores: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        CONVERSATION_STATE_RESIDENT.labels(kind='memories').set_function(lambda: len(self._memories))
+        CONVERSATION_STATE_RESIDENT.labels(kind='vector_stores').set_function(lambda: len(self._stores))
+        CONVERSATION_STATE_BYTES.set_function(self.resident_bytes)
+
+    def get_memory(self, conversation_id: str) -> ConversationBufferMemory:
+        """대화 메모리 반환 (없으면 백엔드에서 복원하거나 새로 생성)"""
+        memory = self.peek_memory(conversation_id)
+        if memory is None:
+            memory = self._new_memory()
+            self._put(self._memories, conversation_id, memory, self._evict_memory)
+        return memory
+
+    def peek_memory(self, conversation_id: str) -> Optional[ConversationBufferMemory]:
+        """상주 중이거나 저장된 대화 메모리만 반환 (새로 만들지 않음)"""
+        entry = self._touch(self._memories, conversation_id)
+        if entry is not None:
+            return entry['value']
+
+        messages = self.backend.load(conversation_id)
+        if messages is None:
+            return None
+
+        # 퇴출되었던 대화 복원
+        memory = self._new_memory()
+        for message in messages:
+            if message.get('type') == 'human':
+                memory.chat_memory.add_user_message(message.get('content', ''))
+            else:
+                memory.chat_memory.add_ai_message(message.get('content', ''))
+        print(f"대화 메모리 복원: {conversation_id} ({len(messages)}개 메시지)")
+        self._put(self._memories, conversation_id, memory, self._evict_memory)
+        return memory
+
+    def drop_memory(self, conversation_id: str):
+        """대화 메모리 삭제 (저장된 히스토리 포함)"""
+        self._memories.pop(conversation_id, None)
+        self.backend.delete(conversation_id)
+
+    def get_store(self, key: str):
+        """캐시된 대화별 벡터 스토어 반환 (없으면 None)"""
+        entry = self._touch(self._stores, key)
+        return entry['value'] if entry is not None else None
+
+    def set_store(self, key: str, store):
+        """대화별 벡터 스토어 캐시"""
+        self._put(self._stores, key, store, None)
+
+    def drop_store(self, key: str):
+        """캐시된 벡터 스토어 제거"""
+        self._stores.pop(key, None)
+
+    def flush(self):
+        """상주 중인 모든 대화 히스토리를 백엔드에 저장 (종료 시)"""
+        for conversation_id, entry in self._memories.items():
+            self.backend.save(conversation_id, self._serialize(entry['value']))
+
+    def close(self):
+        self.flush()
+        self.backend.close()
+
+    def resident_bytes(self) -> int:
+        """상주 중인 대화 히스토리의 대략적인 크기 (메시지 본문 UTF-8 바이트)"""
+        total = 0
+        for entry in list(self._memories.values()):
+            for message in entry['value'].chat_memory.messages:
+                total += len(str(message.content).encode('utf-8'))
+        return total
+
+    def _touch(self, entries: "OrderedDict[str, Dict[str, Any]]", key: str) -> Optional[Dict[str, Any]]:
+        """항목 조회 후 최근 사용으로 갱신 (유휴 시간이 지난 항목은 먼저 정리)"""
+        self._expire_idle()
+        entry = entries.get(key)
+        if entry is not None:
+            entry['last_access'] = time.time()
+            entries.move_to_end(key)
+        return entry
+
+    def _put(self, entries: "OrderedDict[str, Dict[str, Any]]", key: str, value, on_evict):
+        """항목 저장 후 최대 개수 초과분 퇴출"""
+        entries[key] = {'value': value, 'last_access': time.time()}
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            evicted_key, evicted = entries.popitem(last=False)
+            self._on_evicted(evicted_key, evicted, on_evict, reason='capacity')
+
+    def _expire_idle(self):
+        """유휴 시간이 지난 항목 퇴출 (LRU 순서이므로 앞에서부터 확인)"""
+        deadline = time.time() - self.idle_timeout
+        for entries, on_evict in ((self._memories, self._evict_memory), (self._stores, None)):
+            while entries:
+                key, entry = next(iter(entries.items()))
+                if entry['last_access'] >= deadline:
+                    break
+                entries.popitem(last=False)
+                self._on_evicted(key, entry, on_evict, reason='idle')
+
+    def _on_evicted(self, key: str, entry: Dict[str, Any], on_evict, reason: str):
+        CONVERSATION_STATE_EVICTIONS.labels(reason=reason).inc()
+        if on_evict is not None:
+            on_evict(key, entry['value'])
+
+    def _evict_memory(self, conversation_id: str, memory: ConversationBufferMemory):
+        """퇴출되는 대화 히스토리를 백엔드에 저장"""
+        try:
+            self.backend.save(conversation_id, self._serialize(memory))
+        except Exception as e:
+            print(f"대화 히스토리 저장 실패 {conversation_id}: {e}")
+
+    @staticmethod
+    def _serialize(memory: ConversationBufferMemory) -> List[Dict[str, str]]:
+        return [
+            {'type': getattr(message, 'type', 'ai'), 'content': message.content}
+            for message in memory.chat_memory.messages
+        ]
+
+    @staticmethod
+    def _new_memory() -> ConversationBufferMemory:
+        return ConversationBufferMemory(
+            memory_key="chat_history",
+            return_messages=True
+        )
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import uuid
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from langchain.schema import Document
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    Batch,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HnswConfigDiff,
+    KeywordIndexParams,
+    MatchValue,
+    PointStruct,
+    QueryRequest,
+    VectorParams,
+)
+
+# LangChain Qdrant와 같은 페이로드 형식 (기존 콜렉션과 호환)
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+TENANT_FIELD = f"{METADATA_KEY}.conversation_id"
+
+
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+UPSERT_PARALLELISM = int(os.getenv("QDRANT_UPSERT_PARALLELISM", "4"))
+
+
+async def create_collection(client: AsyncQdrantClient, collection_name: str, vector_size: int, multi_tenant: bool = False):
+    """대화 콜렉션 생성 - 멀티테넌트 콜렉션은 conversation_id 테넌트 인덱스와 테넌트별 HNSW 그래프 사용"""
+    await client.create_collection(
+        collection_name,
+        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+        # 항상 conversation_id로 필터링하므로 전역 그래프 대신 테넌트별 그래프만 구축
+        hnsw_config=HnswConfigDiff(payload_m=16, m=0) if multi_tenant else None
+    )
+
+    if multi_tenant:
+        try:
+            await client.create_payload_index(
+                collection_name,
+                field_name=TENANT_FIELD,
+                field_schema=KeywordIndexParams(type="keyword", is_tenant=True)
+            )
+        except Exception as e:
+            # is_tenant를 지원하지 않는 Qdrant 버전이면 일반 keyword 인덱스 사용
+            print(f"테넌트 인덱스 생성 실패, 일반 인덱스 사용: {e}")
+            await client.create_payload_index(collection_name, field_name=TENANT_FIELD, field_schema="keyword")
+
+
+async def upsert_in_batches(client: AsyncQdrantClient, collection_name: str, points: List[PointStruct], wait: bool = True):
+    """포인트를 배치로 나눠 업서트 (배치는 UPSERT_PARALLELISM개씩 동시에 전송)
+
+    wait=False이면 서버가 요청을 받는 즉시 반환하고 인덱싱은 비동기로 진행 (직후 검색에는 안 보일 수 있음)
+    """
+    batches = [points[start:start + UPSERT_BATCH_SIZE] for start in range(0, len(points), UPSERT_BATCH_SIZE)]
+    for start in range(0, len(batches), UPSERT_PARALLELISM):
+        await asyncio.gather(*[
+            client.upsert(collection_name=collection_name, points=batch, wait=wait)
+            for batch in batches[start:start + UPSERT_PARALLELISM]
+        ])
+
+
+async def upsert_vectors_in_batches(
+    client: AsyncQdrantClient,
+    collection_name: str,
+    ids: List[str],
+    vectors: np.ndarray,
+    payloads: List[Dict[str, Any]],
+    wait: bool = True
+):
+    """임베딩 배열을 Batch 단위로 나눠 업서트 (포인트마다 PointStruct를 만들지 않음)
+
+    ndarray를 Batch에 그대로 넘기면 원소 단위로 검증되어 훨씬 느리므로 배치마다 tolist()로 한 번에 변환
+    """
+    batches = [
+        Batch(
+            ids=ids[start:start + UPSERT_BATCH_SIZE],
+            vectors=vectors[start:start + UPSERT_BATCH_SIZE].tolist(),
+            payloads=payloads[start:start + UPSERT_BATCH_SIZE]
+        )
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE)
+    ]
+    for start in range(0, len(batches), UPSERT_PARALLELISM):
+        await asyncio.gather(*[
+            client.upsert(collection_name=collection_name, points=batch, wait=wait)
+            for batch in batches[start:start + UPSERT_PARALLELISM]
+        ])
+
+
+def conversation_filter(conversation_id: str) -> Filter:
+    """conversation_id 페이로드 필터"""
+    return Filter(must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=conversation_id))])
+
+
+class ConversationVectorStore:
+    """대화별 벡터 스토어
+
+    - 대화별 콜렉션 모드: conversation_id 없이 콜렉션 전체를 사용
+    - 멀티테넌트 모드: 공유 콜렉션에서 conversation_id 페이로드로 저장/검색 범위를 제한
+    - Qdrant 호출은 비동기 클라이언트로, 임베딩 계산은 스레드에서 실행 (이벤트 루프 블로킹 없음)
+    """
+
+    def __init__(self, client: AsyncQdrantClient, collection_name: str, embeddings, conversation_id: Optional[str] = None):
+        self.client = client
+        self.collection_name = collection_name
+        self.embeddings = embeddings
+        self.conversation_id = conversation_id
+
+    @property
+    def query_filter(self) -> Optional[Filter]:
+        """검색 시 적용할 테넌트 필터 (대화별 콜렉션 모드에서는 None)"""
+        if self.conversation_id is None:
+            return None
+        return conversation_filter(self.conversation_id)
+
+    async def add_documents(self, documents: List[Document], wait: bool = True, ids: List[str] = None) -> List[str]:
+        """문서 임베딩 후 저장 (wait=False이면 인덱싱 완료를 기다리지 않음, ids를 주면 같은 ID의 포인트를 덮어씀)"""
+        if not documents:
+            return []
+
+        vectors = await asyncio.to_thread(self.embeddings.embed_documents, [doc.page_content for doc in documents])
+        ids = ids or [uuid.uuid4().hex for _ in documents]
+        points = []
+        for point_id, doc, vector in zip(ids, documents, vectors):
+            metadata = dict(doc.metadata)
+            if self.conversation_id is not None:
+                metadata['conversation_id'] = self.conversation_id
+            points.append(PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={CONTENT_KEY: doc.page_content, METADATA_KEY: metadata}
+            ))
+
+        await upsert_in_batches(self.client, self.collection_name, points, wait=wait)
+        return ids
+
+    async def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """쿼리와 유사한 문서 검색"""
+        vector = await asyncio.to_thread(self.embeddings.embed_query, query)
+        return await self.similarity_search_by_vector(vector, k=k)
+
+    async def similarity_search_by_vector(self, vector: List[float], k: int = 4) -> List[Document]:
+        """임베딩 벡터와 유사한 문서 검색"""
+        response = await self.client.query_points(
+            collection_name=self.collection_name,
+            query=vector,
+            query_filter=self.query_filter,
+            limit=k,
+            with_payload=True
+        )
+        return self.to_documents(response.points)
+
+    def search_request(self, vector: List[float], k: int = 4) -> QueryRequest:
+        """이 대화 범위의 검색 요청 (여러 콜렉션 배치 검색용)"""
+        return QueryRequest(query=list(vector), filter=self.query_filter, limit=k, with_payload=True)
+
+    def to_documents(self, points) -> List[Document]:
+        """검색 결과 포인트를 Document 목록으로 변환"""
+        return [self._to_document(point.payload, point.score) for point in points]
+
+    async def similarity_search_batch(self, queries: List[str], k: int = 4) -> List[List[Document]]:
+        """여러 쿼리를 한 번에 임베딩하고 Qdrant 배치 검색으로 조회 (쿼리 순서대로 결과 반환)"""
+        if not queries:
+            return []
+
+        vectors = await asyncio.to_thread(self.embeddings.embed_documents, queries)
+        responses = await self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=[self.search_request(vector, k) for vector in vectors]
+        )
+        return [self.to_documents(response.points) for response in responses]
+
+    async def delete_all(self):
+        """이 대화 범위의 문서 전체 삭제 (멀티테넌트 모드 전용)"""
+        if self.conversation_id is None:
+            raise ValueError("대화별 콜렉션 모드에서는 콜렉션을 삭제하세요")
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=self.query_filter)
+        )
+
+    @staticmethod
+    def _to_document(payload: Dict[str, Any], score: float = None) -> Document:
+        """Qdrant 페이로드를 Document로 변환"""
+        payload = payload or {}
+        metadata = dict(payload.get(METADATA_KEY) or {})
+        if score is not None:
+            metadata['_score'] = score
+        return Document(page_content=payload.get(CONTENT_KEY, ''), metadata=metadata)
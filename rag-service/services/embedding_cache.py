@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, List, Dict, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.logging_service import EMBEDDING_CACHE_REQUESTS
+from services.single_flight import KeyedInFlight
+
+
+class EmbeddingCache:
+    """텍스트 해시 → 벡터 캐시 (메모리 매핑 파일 기반)
+
+    - 벡터는 (capacity, dim) 크기의 float32 memmap 파일에 저장되어 재시작 후에도 유지
+    - 해시 → 행 번호 인덱스는 추가 전용 로그 파일로 보관하고 시작 시 다시 읽음
+    - 용량이 차면 가장 오래 전에 기록된 행부터 덮어씀 (링 버퍼)
+    """
+
+    def __init__(self, namespace: str, directory: str = None, capacity: int = None):
+        self.namespace = namespace
+        self.directory = directory or os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+        self.capacity = capacity or int(os.getenv("EMBEDDING_CACHE_CAPACITY", "50000"))
+
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in namespace)
+        base = os.path.join(self.directory, safe_name)
+        self._vectors_path = f"{base}.f32"
+        self._index_path = f"{base}.idx"
+        self._meta_path = f"{base}.json"
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._index: Dict[str, int] = {}
+        self._rows: List[Optional[str]] = [None] * self.capacity
+        self._next_row = 0
+        self.dim: Optional[int] = None
+        # 여러 스레드가 같은 텍스트를 동시에 임베딩하지 않도록 진행 중인 텍스트 추적
+        self.in_flight = KeyedInFlight(f"embedding:{namespace}")
+        self.wait_timeout = float(os.getenv("EMBEDDING_SINGLE_FLIGHT_WAIT_SECONDS", "30"))
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """캐시 키로 사용할 콘텐츠 해시"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """텍스트별 캐시된 벡터 조회 (없으면 None)"""
+        results = []
+        with self._lock:
+            for text in texts:
+                row = self._index.get(self.hash_text(text))
+                results.append(np.array(self._vectors[row]) if row is not None else None)
+
+        hits = sum(1 for vector in results if vector is not None)
+        EMBEDDING_CACHE_REQUESTS.labels(model=self.namespace, result='hit').inc(hits)
+        EMBEDDING_CACHE_REQUESTS.labels(model=self.namespace, result='miss').inc(len(texts) - hits)
+        return results
+
+    def get_or_embed(self, texts: List[str], embed: Callable[[List[str]], list]) -> List[np.ndarray]:
+        """캐시에 없는 텍스트만 임베딩해 채운 벡터 목록 반환
+
+        - 같은 호출 안의 중복 텍스트는 한 번만 임베딩
+        - 다른 스레드가 임베딩 중인 텍스트는 다시 계산하지 않고 그 결과가 캐시에 들어오기를 기다림
+        """
+        vectors = self.get_many(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if not missing:
+            return vectors
+
+        owned, waiting = self.in_flight.claim(missing)
+        computed: Dict[str, np.ndarray] = {}
+        try:
+            if owned:
+                computed.update(zip(owned, self._embed_and_put(owned, embed)))
+        finally:
+            self.in_flight.release(owned)
+
+        if waiting:
+            for event in waiting.values():
+                event.wait(self.wait_timeout)
+            waited = list(waiting)
+            with self._lock:
+                rows = [self._index.get(self.hash_text(text)) for text in waited]
+                found = {text: np.array(self._vectors[row]) for text, row in zip(waited, rows) if row is not None}
+            computed.update(found)
+
+            # 먼저 처리하던 스레드가 실패했거나 그 사이 퇴출된 텍스트는 직접 임베딩
+            retry = [text for text in waited if text not in found]
+            if retry:
+                computed.update(zip(retry, self._embed_and_put(retry, embed)))
+
+        return [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+    def _embed_and_put(self, texts: List[str], embed: Callable[[List[str]], list]) -> List[np.ndarray]:
+        new_vectors = np.asarray(embed(texts), dtype=np.float32)
+        self.put_many(texts, new_vectors)
+        return list(new_vectors)
+
+    def put_many(self, texts: List[str], vectors) -> None:
+        """텍스트별 벡터 저장"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(texts) == 0:
+            return
+
+        with self._lock:
+            if self._vectors is None:
+                self._open(vectors.shape[1])
+            if vectors.shape[1] != self.dim:
+                print(f"임베딩 캐시 차원 불일치 ({self.namespace}): {vectors.shape[1]} != {self.dim}")
+                return
+
+            log_lines = []
+            for text, vector in zip(texts, vectors):
+                key = self.hash_text(text)
+                row = self._index.get(key)
+                if row is None:
+                    row = self._next_row
+                    self._next_row = (self._next_row + 1) % self.capacity
+                    evicted = self._rows[row]
+                    if evicted is not None:
+                        self._index.pop(evicted, None)
+                    self._rows[row] = key
+                    self._index[key] = row
+                    log_lines.append(f"{key} {row}\n")
+                self._vectors[row] = vector
+
+            self._vectors.flush()
+            with open(self._index_path, 'a', encoding='utf-8') as f:
+                f.writelines(log_lines)
+
+    def _load(self):
+        """메타데이터와 인덱스 로그를 읽어 캐시 복원"""
+        if not os.path.exists(self._meta_path):
+            return
+        try:
+            with open(self._meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('capacity') != self.capacity:
+                print(f"임베딩 캐시 용량 변경으로 초기화: {self.namespace}")
+                self._reset()
+                return
+
+            self._open(meta['dim'])
+            entries = []
+            if os.path.exists(self._index_path):
+                with open(self._index_path, encoding='utf-8') as f:
+                    entries = [line.split() for line in f if line.strip()]
+
+            for position, (key, row) in enumerate(entries):
+                row = int(row)
+                previous = self._rows[row]
+                if previous is not None:
+                    self._index.pop(previous, None)
+                self._rows[row] = key
+                self._index[key] = row
+                if position == len(entries) - 1:
+                    self._next_row = (row + 1) % self.capacity
+
+            # 덮어쓰기가 누적된 인덱스 로그 압축
+            if len(entries) > 2 * len(self._index):
+                self._compact()
+            print(f"임베딩 캐시 로드: {self.namespace} ({len(self._index)}개 벡터)")
+        except Exception as e:
+            print(f"임베딩 캐시 로드 실패, 초기화합니다 ({self.namespace}): {e}")
+            self._reset()
+
+    def _open(self, dim: int):
+        """memmap 파일 열기 (없으면 생성)"""
+        self.dim = dim
+        mode = 'r+' if os.path.exists(self._vectors_path) else 'w+'
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        with open(self._meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'dim': dim, 'capacity': self.capacity}, f)
+
+    def _compact(self):
+        """현재 인덱스만 남도록 로그 파일 재작성 (기록 순서 유지)"""
+        ordered = sorted(self._index.items(), key=lambda item: (item[1] - self._next_row) % self.capacity)
+        with open(self._index_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{key} {row}\n" for key, row in ordered)
+
+    def _reset(self):
+        """캐시 파일 삭제 후 빈 상태로 시작"""
+        for path in (self._vectors_path, self._index_path, self._meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._vectors = None
+        self._index = {}
+        self._rows = [None] * self.capacity
+        self._next_row = 0
+        self.dim = None
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(namespace: str) -> EmbeddingCache:
+    """모델별 임베딩 캐시 싱글턴 반환 (같은 파일을 여러 인스턴스가 열지 않도록)"""
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = EmbeddingCache(namespace)
+        return _caches[namespace]
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """SentenceTransformer 모델을 LangChain Embeddings 인터페이스로 감싼 어댑터"""
+
+    def __init__(self, model, model_name: str):
+        self.model = model
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(text).tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """모든 임베딩 호출 앞에 콘텐츠 해시 캐시를 두는 LangChain Embeddings 래퍼"""
+
+    def __init__(self, embeddings: Embeddings, model_name: str):
+        self.embeddings = embeddings
+        self.cache = get_embedding_cache(model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.cache.get_or_embed(texts, self.embeddings.embed_documents)
+        return [vector.tolist() for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get_or_embed([text], lambda missing: [self.embeddings.embed_query(missing[0])])[0]
+        return vector.tolist()
@@ -0,0 +1,117 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain.schema import Document
+
+
+class FetchIndexPipeline:
+    """검색 결과 URL을 병렬로 가져와 도착하는 순서대로 분할/임베딩/저장하는 파이프라인 단계
+
+    - 전체 동시 요청 수는 파이프라인에서, 호스트별 동시 요청 수는 WebSearchService에서 제한
+    - 전체 마감 시간(deadline)이 지나면 아직 응답하지 않은 느린 호스트는 버림
+    """
+
+    def __init__(self, web_search, text_splitter, max_concurrency: int = None, deadline: float = None):
+        self.web_search = web_search
+        self.text_splitter = text_splitter
+        self.max_concurrency = max_concurrency or int(os.getenv("FETCH_MAX_CONCURRENCY", "8"))
+        self.deadline = deadline or float(os.getenv("FETCH_TOTAL_DEADLINE_SECONDS", "15"))
+
+    async def run(
+        self,
+        search_results: List[Dict[str, Any]],
+        vector_store,
+        metadata: Optional[Dict[str, Any]] = None,
+        label: str = "웹 검색",
+        on_indexed: Optional[Callable[[str], None]] = None
+    ) -> List[str]:
+        """검색 결과를 가져와 벡터 스토어에 저장하고, 저장에 성공한 URL 목록을 검색 결과 순서대로 반환
+
+        on_indexed: 페이지 하나의 저장이 끝날 때마다 URL과 함께 호출 (전체 완료 전에 진행 상황이 필요한 경우)
+        """
+        urls = []
+        for result in search_results:
+            url = result.get('url')
+            if url and url not in urls:
+                urls.append(url)
+        if not urls:
+            return []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.web_search.fetch_url_content(url)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        fetch_tasks = {asyncio.create_task(fetch(url)): url for url in urls}
+        index_tasks = {}
+        pending = set(fetch_tasks)
+
+        try:
+            # 페이지가 도착하는 대로 바로 분할/임베딩 단계로 넘김
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = fetch_tasks[task]
+                    try:
+                        content = task.result()
+                    except Exception as e:
+                        print(f"{label} URL 가져오기 실패 {url}: {e}")
+                        continue
+                    if content.get('content'):
+                        index_task = asyncio.create_task(self._index(url, content, vector_store, metadata or {}))
+                        if on_indexed:
+                            index_task.add_done_callback(
+                                lambda task, url=url: on_indexed(url) if not task.cancelled() and task.exception() is None else None
+                            )
+                        index_tasks[url] = index_task
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if pending:
+            dropped = [fetch_tasks[task] for task in pending]
+            print(f"{label} 마감 시간({self.deadline}s) 초과로 {len(dropped)}개 URL 제외: {dropped}")
+
+        # 저장 작업 완료 대기 후 원래 순서대로 소스 정리
+        sources = []
+        for url in urls:
+            task = index_tasks.get(url)
+            if task is None:
+                continue
+            try:
+                await task
+                sources.append(url)
+                print(f"{label} URL 인덱싱 완료: {url}")
+            except Exception as e:
+                print(f"{label} URL 인덱싱 실패 {url}: {e}")
+
+        return sources
+
+    async def _index(self, url: str, content: Dict[str, Any], vector_store, metadata: Dict[str, Any]):
+        """페이지 하나를 분할하여 벡터 스토어에 저장"""
+        documents = self.text_splitter.split_text(content['content'])
+
+        doc_objects = []
+        for i, doc_text in enumerate(documents):
+            doc_objects.append(Document(
+                page_content=doc_text,
+                metadata={
+                    'url': url,
+                    'title': content.get('title', ''),
+                    'chunk_index': i,
+                    'total_chunks': len(documents),
+                    'source_url': url,
+                    **metadata,
+                    'timestamp': asyncio.get_running_loop().time()
+                }
+            ))
+
+        # 임베딩은 스레드에서, 업서트는 비동기 클라이언트로 실행 (직후 검색하므로 인덱싱 완료까지 대기)
+        await vector_store.add_documents(doc_objects)
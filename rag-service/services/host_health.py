@@ -0,0 +1,182 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from services.logging_service import HOST_BREAKER_STATE, HOST_BREAKER_TRANSITIONS, HOST_FETCH_LATENCY
+
+# 서킷 브레이커 상태 (게이지 값)
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class HostUnavailable(Exception):
+    """서킷이 열려 있거나 요청 한도 대기가 너무 길어 요청을 보내지 않은 경우"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class HostHealth:
+    """호스트 하나의 요청 한도(토큰 버킷), 서킷 브레이커, 지연 시간 기반 타임아웃"""
+
+    def __init__(self, host: str, registry: "HostHealthRegistry"):
+        self.host = host
+        self.registry = registry
+
+        # 토큰 버킷
+        self.tokens = float(registry.burst)
+        self.refilled_at = time.monotonic()
+        self._bucket_lock = asyncio.Lock()
+
+        # 서킷 브레이커
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at: Optional[float] = None
+
+        # 최근 성공한 요청의 응답 헤더까지 걸린 시간
+        self.latencies: Deque[float] = deque(maxlen=registry.latency_window)
+        HOST_BREAKER_STATE.labels(host=host).set(STATE_VALUES[CLOSED])
+
+    async def acquire(self):
+        """토큰 하나를 예약하고 차례가 올 때까지 대기 (대기 시간이 최대 대기 시간을 넘으면 HostUnavailable)
+
+        토큰이 부족하면 잔량을 음수로 만들어 앞선 대기 요청 뒤에 예약하고, 대기는 잠금을 놓은 뒤에 함
+        """
+        async with self._bucket_lock:
+            now = time.monotonic()
+            self.tokens = min(self.registry.burst, self.tokens + (now - self.refilled_at) * self.registry.rate)
+            self.refilled_at = now
+            wait = max(0.0, (1 - self.tokens) / self.registry.rate)
+            if wait > self.registry.max_wait:
+                raise HostUnavailable('rate_limited', f"Rate limit wait too long for {self.host}: {wait:.1f}s")
+            self.tokens -= 1
+
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # 취소된 요청의 예약 반환
+                self.tokens += 1
+                raise
+
+    def allow_request(self) -> bool:
+        """서킷 상태에 따라 요청 허용 여부 결정 (열린 뒤 일정 시간이 지나면 시험 요청 하나만 허용)"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.registry.open_seconds:
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            # 시험 요청이 진행 중이면 대기 (결과 없이 끝난 시험 요청은 타임아웃이 지나면 다시 시도)
+            if self.probe_started_at is not None and now - self.probe_started_at < self.registry.max_timeout:
+                return False
+            self.probe_started_at = now
+        return True
+
+    def record_success(self, latency: float):
+        self.latencies.append(latency)
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+        self._observe_latency()
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.registry.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._transition(OPEN)
+
+    def record_response(self, latency: float, status_code: int):
+        """5xx/429는 호스트 장애로, 나머지 응답은 정상으로 기록"""
+        if status_code >= 500 or status_code == 429:
+            self.record_failure()
+        else:
+            self.record_success(latency)
+
+    def timeout(self) -> httpx.Timeout:
+        """최근 지연 시간 p95 × 배수를 [최소, 최대] 범위로 제한한 타임아웃 (표본이 적으면 최대값)
+
+        커넥션 풀 대기 시간은 호스트와 무관하므로 기본값 유지
+        """
+        seconds = self.registry.max_timeout
+        if len(self.latencies) >= self.registry.min_samples:
+            seconds = min(self.registry.max_timeout, max(self.registry.min_timeout, self.percentile(0.95) * self.registry.timeout_multiplier))
+        return httpx.Timeout(seconds, pool=self.registry.max_timeout)
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _observe_latency(self):
+        HOST_FETCH_LATENCY.labels(host=self.host, stat='p50').set(self.percentile(0.5))
+        HOST_FETCH_LATENCY.labels(host=self.host, stat='p95').set(self.percentile(0.95))
+        HOST_FETCH_LATENCY.labels(host=self.host, stat='timeout').set(self.timeout().read)
+
+    def _transition(self, state: str):
+        print(f"호스트 서킷 상태 변경 {self.host}: {self.state} → {state}")
+        self.state = state
+        self.probe_started_at = None
+        HOST_BREAKER_STATE.labels(host=self.host).set(STATE_VALUES[state])
+        HOST_BREAKER_TRANSITIONS.labels(state=state).inc()
+
+    def remove_metrics(self):
+        HOST_BREAKER_STATE.remove(self.host)
+        for stat in ('p50', 'p95', 'timeout'):
+            try:
+                HOST_FETCH_LATENCY.remove(self.host, stat)
+            except KeyError:
+                pass
+
+
+class HostHealthRegistry:
+    """외부 페이지 요청의 호스트별 상태 저장소
+
+    - 토큰 버킷으로 호스트별 초당 요청 수 제한
+    - 연속 실패(연결 오류, 타임아웃, 5xx, 429)가 임계값을 넘으면 서킷을 열어 일정 시간 요청하지 않음
+    - 최근 응답 지연 시간의 p95로 호스트별 타임아웃을 조정해 느린 호스트가 전체 타임아웃을 다 쓰지 않게 함
+    - 추적하는 호스트 수가 상한을 넘으면 가장 오래 사용되지 않은 호스트부터 제거 (메트릭 라벨도 함께 제거)
+    """
+
+    def __init__(self):
+        self.rate = float(os.getenv("FETCH_HOST_RATE_PER_SECOND", "5"))
+        self.burst = float(os.getenv("FETCH_HOST_BURST", "10"))
+        self.max_wait = float(os.getenv("FETCH_HOST_MAX_WAIT_SECONDS", "10"))
+        self.failure_threshold = int(os.getenv("FETCH_BREAKER_FAILURES", "5"))
+        self.open_seconds = float(os.getenv("FETCH_BREAKER_OPEN_SECONDS", "60"))
+        self.latency_window = int(os.getenv("FETCH_LATENCY_WINDOW", "50"))
+        self.min_samples = int(os.getenv("FETCH_TIMEOUT_MIN_SAMPLES", "5"))
+        self.timeout_multiplier = float(os.getenv("FETCH_TIMEOUT_MULTIPLIER", "3"))
+        self.min_timeout = float(os.getenv("FETCH_MIN_TIMEOUT_SECONDS", "2"))
+        self.max_timeout = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+        self.max_hosts = int(os.getenv("FETCH_HOST_REGISTRY_SIZE", "1000"))
+        self._hosts: "OrderedDict[str, HostHealth]" = OrderedDict()
+
+    def get(self, url: str) -> HostHealth:
+        host = urlparse(url).netloc.lower()
+        health = self._hosts.get(host)
+        if health is None:
+            health = HostHealth(host, self)
+            self._hosts[host] = health
+            while len(self._hosts) > self.max_hosts:
+                _, evicted = self._hosts.popitem(last=False)
+                evicted.remove_metrics()
+        else:
+            self._hosts.move_to_end(host)
+        return health
+
+    def is_open(self, url: str) -> bool:
+        """서킷이 열려 있어 지금 요청하지 않을 호스트인지 (상태는 바꾸지 않음)"""
+        health = self._hosts.get(urlparse(url).netloc.lower())
+        return health is not None and health.state == OPEN and time.monotonic() - health.opened_at < self.open_seconds
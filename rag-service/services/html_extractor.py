@@ -0,0 +1,343 @@
+import asyncio
+import importlib.util
+import io
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from bs4 import BeautifulSoup
+
+# 이 모듈은 프로세스 풀 워커에서도 import되므로 서비스 모듈(로깅/Kafka 등)에 의존하지 않음
+
+# 본문 추출 전에 제거하는 태그
+REMOVED_TAGS = ['script', 'style', 'noscript', 'template', 'nav', 'footer', 'header', 'aside']
+
+# 본문 영역 후보 (우선순위 순)
+MAIN_CONTENT_TAGS = ['main', 'article', 'body']
+
+# 보일러플레이트 제거 모드에서 점수를 매기는 문단 태그
+PARAGRAPH_TAGS = ['p', 'pre', 'td']
+
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|page|post|story|text|본문', re.I)
+NEGATIVE_HINTS = re.compile(r'ad-|ads|banner|comment|footer|menu|meta|nav|popup|promo|related|share|sidebar|social|sponsor|widget', re.I)
+MIN_PARAGRAPH_CHARS = 25
+
+
+class Bs4Backend:
+    """BeautifulSoup (html.parser) - 추가 의존성 없는 기본 백엔드"""
+
+    name = "bs4"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser')
+
+    def remove(self, root, tags: List[str]):
+        for tag in root(tags):
+            tag.decompose()
+
+    def title(self, root) -> str:
+        title = root.find('title')
+        return title.get_text().strip() if title else ''
+
+    def find(self, root, tag: str):
+        return root.find(tag)
+
+    def find_all(self, node, tags: List[str]) -> Iterable:
+        return node.find_all(tags)
+
+    def parent(self, node):
+        return node.parent
+
+    def key(self, node) -> int:
+        return id(node)
+
+    def hints(self, node) -> str:
+        return f"{' '.join(node.get('class') or [])} {node.get('id') or ''}"
+
+    def text(self, node) -> str:
+        return node.get_text(separator=' ', strip=True)
+
+    def iter_text(self, node) -> Iterator[str]:
+        return node.stripped_strings
+
+
+class LxmlBackend:
+    """lxml.html (libxml2) 백엔드"""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+        self._html = lxml.html
+        self._etree = etree
+        self._parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True, remove_pis=True)
+
+    def parse(self, html: str):
+        return self._html.document_fromstring(html.encode('utf-8'), parser=self._parser)
+
+    def remove(self, root, tags: List[str]):
+        self._etree.strip_elements(root, *tags, with_tail=False)
+
+    def title(self, root) -> str:
+        return (root.findtext('.//title') or '').strip()
+
+    def find(self, root, tag: str):
+        return root if root.tag == tag else root.find(f'.//{tag}')
+
+    def find_all(self, node, tags: List[str]) -> Iterable:
+        return node.iter(*tags)
+
+    def parent(self, node):
+        return node.getparent()
+
+    def key(self, node) -> int:
+        return id(node)
+
+    def hints(self, node) -> str:
+        return f"{node.get('class') or ''} {node.get('id') or ''}"
+
+    def text(self, node) -> str:
+        return ' '.join(node.text_content().split())
+
+    def iter_text(self, node) -> Iterator[str]:
+        return node.itertext()
+
+
+class SelectolaxBackend:
+    """selectolax (lexbor/modest C 파서) 백엔드"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as parser
+        except ImportError:
+            from selectolax.parser import HTMLParser as parser
+        self._parser = parser
+
+    def parse(self, html: str):
+        return self._parser(html)
+
+    def remove(self, root, tags: List[str]):
+        root.strip_tags(tags)
+
+    def title(self, root) -> str:
+        title = root.css_first('title')
+        return title.text(strip=True) if title else ''
+
+    def find(self, root, tag: str):
+        return root.css_first(tag)
+
+    def find_all(self, node, tags: List[str]) -> Iterable:
+        return node.css(', '.join(tags))
+
+    def parent(self, node):
+        return node.parent
+
+    def key(self, node) -> int:
+        return node.mem_id
+
+    def hints(self, node) -> str:
+        attributes = node.attributes
+        return f"{attributes.get('class') or ''} {attributes.get('id') or ''}"
+
+    def text(self, node) -> str:
+        return node.text(separator=' ', strip=True)
+
+    def iter_text(self, node) -> Iterator[str]:
+        for child in node.traverse(include_text=True):
+            if child.tag == '-text':
+                yield child.text(deep=False)
+
+
+BACKENDS = {
+    'selectolax': SelectolaxBackend,
+    'lxml': LxmlBackend,
+    'bs4': Bs4Backend
+}
+_backend_instances: Dict[str, Any] = {}
+
+
+def resolve_backend(name: str = "auto") -> str:
+    """사용할 백엔드 이름 결정 (auto는 설치된 가장 빠른 파서, 설치되지 않은 백엔드는 bs4로 대체)"""
+    candidates = list(BACKENDS) if name == "auto" else [name, 'bs4']
+    for candidate in candidates:
+        try:
+            get_backend(candidate)
+            return candidate
+        except (ImportError, KeyError):
+            continue
+    return 'bs4'
+
+
+def get_backend(name: str):
+    backend = _backend_instances.get(name)
+    if backend is None:
+        backend = BACKENDS[name]()
+        _backend_instances[name] = backend
+    return backend
+
+
+def collect_text(strings: Iterable[str], max_chars: int) -> str:
+    """텍스트 조각의 공백을 정리해 이어 붙이고, 글자 수 예산을 넘으면 나머지 조각은 읽지 않음"""
+    parts = []
+    length = 0
+    for string in strings:
+        string = ' '.join(string.split())
+        if not string:
+            continue
+        length += len(string) + (1 if parts else 0)
+        parts.append(string)
+        if max_chars and length > max_chars:
+            break
+
+    text = ' '.join(parts)
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars] + "..."
+    return text
+
+
+def _main_content(backend, root):
+    """main > article > body 순서로 본문 영역 선택"""
+    for tag in MAIN_CONTENT_TAGS:
+        node = backend.find(root, tag)
+        if node is not None:
+            return node
+    return root
+
+
+def _boilerplate_content(backend, root):
+    """문단 점수(길이, 쉼표 수, 링크 비율)를 부모/조부모 블록에 누적해 가장 점수가 높은 블록 선택"""
+    candidates: Dict[int, Any] = {}
+    scores: Dict[int, float] = {}
+
+    for paragraph in backend.find_all(root, PARAGRAPH_TAGS):
+        text = backend.text(paragraph)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        link_chars = sum(len(backend.text(link)) for link in backend.find_all(paragraph, ['a']))
+        link_density = min(1.0, link_chars / len(text))
+        score = (1 + text.count(',') + min(len(text) // 100, 3)) * (1 - link_density)
+
+        parent = backend.parent(paragraph)
+        for node, weight in ((parent, 1.0), (backend.parent(parent) if parent is not None else None, 0.5)):
+            if node is None:
+                continue
+            key = backend.key(node)
+            if key not in candidates:
+                candidates[key] = node
+                hints = backend.hints(node)
+                scores[key] = (25 if POSITIVE_HINTS.search(hints) else 0) - (25 if NEGATIVE_HINTS.search(hints) else 0)
+            scores[key] += score * weight
+
+    if not scores:
+        return _main_content(backend, root)
+    best = max(scores, key=scores.get)
+    if scores[best] <= 0:
+        return _main_content(backend, root)
+    return candidates[best]
+
+
+def extract_html(html: str, backend_name: str = "bs4", mode: str = "main", max_chars: int = 10000) -> Dict[str, str]:
+    """HTML에서 제목과 본문 텍스트 추출 (프로세스 풀에서 실행할 수 있도록 모듈 수준 함수)
+
+    mode: main(main/article/body 영역) | boilerplate(문단 점수 기반 본문 블록)
+    max_chars: 본문 글자 수 상한 (0이면 제한 없음) - 상한에 도달하면 텍스트 수집을 중단
+    """
+    backend = get_backend(backend_name)
+    root = backend.parse(html)
+    backend.remove(root, REMOVED_TAGS)
+    title = backend.title(root)
+
+    node = _boilerplate_content(backend, root) if mode == "boilerplate" else _main_content(backend, root)
+    return {
+        'title': title,
+        'content': collect_text(backend.iter_text(node), max_chars)
+    }
+
+
+def extract_plain_text(text: str, max_chars: int = 10000) -> Dict[str, str]:
+    """text/plain 문서 추출 (첫 줄을 제목으로 사용)"""
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), '')
+    return {
+        'title': first_line[:200],
+        'content': collect_text(text.splitlines(), max_chars)
+    }
+
+
+def extract_pdf(data: bytes, max_chars: int = 10000) -> Dict[str, str]:
+    """PDF 문서 추출 (페이지 순서대로 읽고 글자 수 상한에 도달하면 나머지 페이지는 읽지 않음)"""
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    title = ''
+    if reader.metadata and reader.metadata.title:
+        title = str(reader.metadata.title).strip()
+
+    def page_texts() -> Iterator[str]:
+        for page in reader.pages:
+            yield page.extract_text() or ''
+
+    return {
+        'title': title,
+        'content': collect_text(page_texts(), max_chars)
+    }
+
+
+class HtmlExtractor:
+    """설정된 백엔드/모드로 HTML 본문을 추출하고, 큰 문서는 프로세스 풀에서 파싱해 이벤트 루프를 막지 않음
+
+    text/plain과 PDF 문서도 같은 글자 수 상한으로 추출 (PDF는 pypdf가 설치된 경우에만)
+    """
+
+    def __init__(self, backend: str = None, mode: str = None, max_chars: int = None, workers: int = None):
+        self.backend = resolve_backend(backend or os.getenv("HTML_EXTRACTOR", "auto"))
+        self.mode = mode or os.getenv("HTML_EXTRACT_MODE", "main")  # main | boilerplate
+        self.max_chars = max_chars if max_chars is not None else int(os.getenv("HTML_EXTRACT_MAX_CHARS", "10000"))
+        self.workers = workers if workers is not None else int(os.getenv("HTML_EXTRACT_WORKERS", "2"))
+        # 이보다 작은 문서는 프로세스 간 전송 비용이 파싱보다 커서 스레드에서 처리
+        self.pool_min_bytes = int(os.getenv("HTML_EXTRACT_POOL_MIN_BYTES", "100000"))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.pdf_available = importlib.util.find_spec("pypdf") is not None
+        print(f"HTML 추출기: {self.backend} ({self.mode}, 최대 {self.max_chars}자, 프로세스 {self.workers}개)")
+
+    async def extract(self, html: str) -> Dict[str, str]:
+        """제목/본문 추출"""
+        return await self._run(len(html), extract_html, html, self.backend, self.mode, self.max_chars)
+
+    async def extract_text(self, text: str) -> Dict[str, str]:
+        """text/plain 문서 추출"""
+        return await asyncio.to_thread(extract_plain_text, text, self.max_chars)
+
+    async def extract_pdf(self, data: bytes) -> Dict[str, str]:
+        """PDF 문서 추출"""
+        if not self.pdf_available:
+            raise RuntimeError("PDF extraction requires pypdf")
+        return await self._run(len(data), extract_pdf, data, self.max_chars)
+
+    async def _run(self, size: int, func, *args) -> Dict[str, str]:
+        """큰 문서는 프로세스 풀, 작은 문서는 스레드에서 실행"""
+        if self.workers > 0 and size >= self.pool_min_bytes:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._get_pool(), func, *args)
+            except BrokenProcessPool:
+                # 워커가 비정상 종료되면 풀을 다시 만들고 이번 문서는 스레드에서 처리
+                print("HTML 추출 프로세스 풀 재생성")
+                self.close()
+        return await asyncio.to_thread(func, *args)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # 스레드가 많은 서버 프로세스를 fork하지 않도록 spawn으로 워커 생성
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,391 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from services.logging_service import INGESTION_ACTIVE_JOBS, INGESTION_JOBS, INGESTION_QUEUE_DEPTH, INGESTION_URLS
+
+# 작업 상태
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+TERMINAL_STATES = {JOB_COMPLETED, JOB_FAILED}
+
+# URL 상태 (pending 외에는 체크포인트로 저장되어 재개 시 다시 처리하지 않음)
+URL_PENDING = "pending"
+URL_DONE = "done"
+URL_EMPTY = "empty"
+URL_FAILED = "failed"
+
+
+class IngestionJobStore:
+    """인덱싱 작업과 URL별 진행 상태(체크포인트)를 보관하는 SQLite 저장소"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("INGESTION_JOB_STORE_PATH", "data/ingestion_jobs.sqlite3")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                conversation_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_urls (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                chunks INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                PRIMARY KEY (job_id, position)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def create(self, job_id: str, conversation_id: str, urls: List[str]):
+        """작업과 URL 목록 저장"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, conversation_id, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, conversation_id, JOB_QUEUED, now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO job_urls (job_id, position, url, status) VALUES (?, ?, ?, ?)",
+                [(job_id, position, url, URL_PENDING) for position, url in enumerate(urls)]
+            )
+            self._conn.commit()
+
+    def set_status(self, job_id: str, status: str, error: str = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def checkpoint(self, job_id: str, results: List[Tuple[str, str, int, int, Optional[str]]]):
+        """URL 처리 결과 (url, 상태, 시도 횟수, 청크 수, 오류) 저장"""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE job_urls SET status = ?, attempts = ?, chunks = ?, error = ? WHERE job_id = ? AND url = ?",
+                [(status, attempts, chunks, error, job_id, url) for url, status, attempts, chunks, error in results]
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 진행 상황 조회 (없으면 None)"""
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT conversation_id, status, error, created_at, updated_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_urls WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+            chunks = self._conn.execute(
+                "SELECT COALESCE(SUM(chunks), 0) FROM job_urls WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            failed = self._conn.execute(
+                "SELECT url, error FROM job_urls WHERE job_id = ? AND status = ? ORDER BY position", (job_id, URL_FAILED)
+            ).fetchall()
+
+        conversation_id, status, error, created_at, updated_at = job
+        return {
+            'job_id': job_id,
+            'conversation_id': conversation_id,
+            'status': status,
+            'error': error,
+            'total': sum(counts.values()),
+            'pending': counts.get(URL_PENDING, 0),
+            'indexed': counts.get(URL_DONE, 0),
+            'empty': counts.get(URL_EMPTY, 0),
+            'failed': counts.get(URL_FAILED, 0),
+            'chunks': chunks,
+            'failed_urls': [{'url': url, 'error': url_error} for url, url_error in failed],
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+
+    def pending_urls(self, job_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM job_urls WHERE job_id = ? AND status = ? ORDER BY position", (job_id, URL_PENDING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def unfinished_jobs(self) -> List[str]:
+        """재시작 시 이어서 처리할 작업 (대기/실행 중이던 작업)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IngestionJobManager:
+    """대량 URL 인덱싱 작업 관리자
+
+    - 제출된 작업은 큐에 넣고 제한된 수의 워커가 처리 (HTTP 요청은 작업 ID만 받고 바로 반환)
+    - 작업 안에서는 URL을 동시에 가져오고, 분할된 청크를 모아 배치 임베딩/벌크 업서트
+    - 실패한 URL은 지수 백오프로 재시도하고, URL별 결과를 체크포인트로 저장해 재시작 시 남은 URL부터 재개
+    - 청크 ID는 (대화, URL, 청크 번호)로 결정되므로 재개 중 다시 저장해도 중복되지 않음
+    """
+
+    def __init__(
+        self,
+        web_search,
+        text_splitter,
+        get_store: Callable[[str], Awaitable[Any]],
+        on_indexed: Callable[[str], None] = None,
+        store: IngestionJobStore = None
+    ):
+        self.web_search = web_search
+        self.text_splitter = text_splitter
+        self.get_store = get_store
+        self.on_indexed = on_indexed
+        self.store = store or IngestionJobStore()
+
+        self.workers = int(os.getenv("INGESTION_WORKERS", "2"))
+        self.fetch_concurrency = int(os.getenv("INGESTION_FETCH_CONCURRENCY", "8"))
+        self.embed_batch_size = int(os.getenv("INGESTION_EMBED_BATCH_SIZE", "256"))
+        self.max_attempts = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+        self.retry_backoff = float(os.getenv("INGESTION_RETRY_BACKOFF_SECONDS", "1.0"))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._listeners: Dict[str, List[asyncio.Queue]] = {}
+
+    async def start(self):
+        """워커 시작 및 중단된 작업 재개 (여러 번 호출해도 한 번만 시작)"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+        unfinished = await asyncio.to_thread(self.store.unfinished_jobs)
+        for job_id in unfinished:
+            self._enqueue(job_id)
+        if unfinished:
+            print(f"중단된 인덱싱 작업 {len(unfinished)}개 재개")
+
+    async def submit(self, urls: List[str], conversation_id: str = None) -> Dict[str, Any]:
+        """인덱싱 작업 제출 - 작업 상태 반환"""
+        await self.start()
+        job_id = uuid.uuid4().hex
+        conversation_id = conversation_id or str(uuid.uuid4())
+        urls = list(dict.fromkeys(url for url in urls if url))
+
+        await asyncio.to_thread(self.store.create, job_id, conversation_id, urls)
+        INGESTION_JOBS.labels(status=JOB_QUEUED).inc()
+        self._enqueue(job_id)
+        print(f"인덱싱 작업 제출: {job_id} ({len(urls)}개 URL)")
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 진행 상황 조회"""
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """진행 상황이 바뀔 때마다 상태를 반환하고, 작업이 끝나면 종료"""
+        listener: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, []).append(listener)
+        try:
+            job = await self.get(job_id)
+            while job is not None:
+                yield job
+                if job['status'] in TERMINAL_STATES:
+                    return
+                job = await listener.get()
+        finally:
+            self._listeners[job_id].remove(listener)
+            if not self._listeners[job_id]:
+                del self._listeners[job_id]
+
+    async def wait(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업이 끝날 때까지 기다린 뒤 최종 상태 반환"""
+        job = None
+        async for job in self.watch(job_id):
+            pass
+        return job
+
+    def _enqueue(self, job_id: str):
+        self._queue.put_nowait(job_id)
+        INGESTION_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self._queue.get()
+            INGESTION_QUEUE_DEPTH.set(self._queue.qsize())
+            INGESTION_ACTIVE_JOBS.inc()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"인덱싱 작업 실패 {job_id}: {e}")
+                await asyncio.to_thread(self.store.set_status, job_id, JOB_FAILED, str(e))
+                INGESTION_JOBS.labels(status=JOB_FAILED).inc()
+                await self._publish(job_id)
+            finally:
+                INGESTION_ACTIVE_JOBS.dec()
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        """남은 URL을 동시에 가져와 청크를 모아 배치로 저장"""
+        job = await self.get(job_id)
+        urls = await asyncio.to_thread(self.store.pending_urls, job_id)
+        await asyncio.to_thread(self.store.set_status, job_id, JOB_RUNNING)
+        await self._publish(job_id)
+
+        conversation_id = job['conversation_id']
+        vector_store = await self.get_store(conversation_id)
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        async def fetch(url: str) -> Tuple[str, Dict[str, Any], int]:
+            async with semaphore:
+                return await self._fetch_with_retry(url)
+
+        buffer: List[Tuple[str, int, List[Document]]] = []
+        indexed = 0
+        fetch_tasks = [asyncio.create_task(fetch(url)) for url in urls]
+        try:
+            # 페이지가 도착하는 대로 분할해 모으고, 청크가 배치 크기만큼 쌓이면 저장
+            for next_result in asyncio.as_completed(fetch_tasks):
+                url, content, attempts = await next_result
+                if content.get('content'):
+                    documents = await asyncio.to_thread(self._split, url, content, conversation_id)
+                    buffer.append((url, attempts, documents))
+                    if sum(len(documents) for _, _, documents in buffer) >= self.embed_batch_size:
+                        indexed += await self._flush(job_id, vector_store, buffer)
+                        buffer = []
+                else:
+                    error = (content.get('metadata') or {}).get('error')
+                    status = URL_FAILED if error else URL_EMPTY
+                    INGESTION_URLS.labels(result=status).inc()
+                    await asyncio.to_thread(self.store.checkpoint, job_id, [(url, status, attempts, 0, error)])
+                    await self._publish(job_id)
+            
+            if buffer:
+                indexed += await self._flush(job_id, vector_store, buffer)
+        finally:
+            for task in fetch_tasks:
+                task.cancel()
+
+        await asyncio.to_thread(self.store.set_status, job_id, JOB_COMPLETED)
+        INGESTION_JOBS.labels(status=JOB_COMPLETED).inc()
+        if indexed and self.on_indexed:
+            self.on_indexed(conversation_id)
+        await self._publish(job_id)
+        print(f"인덱싱 작업 완료: {job_id} ({indexed}/{len(urls)}개 URL 인덱싱)")
+
+    async def _fetch_with_retry(self, url: str) -> Tuple[str, Dict[str, Any], int]:
+        """URL 가져오기 (일시적 오류는 지수 백오프 + 지터로 재시도) - (url, 콘텐츠, 시도 횟수) 반환"""
+        content: Dict[str, Any] = {}
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                content = await self.web_search.fetch_url_content(url)
+            except Exception as e:
+                content = {'url': url, 'content': '', 'metadata': {'error': str(e)}}
+
+            metadata = content.get('metadata') or {}
+            error = metadata.get('error')
+            if content.get('content') or not error or not self._is_retryable(metadata) or attempt == self.max_attempts:
+                return url, content, attempt
+
+            delay = self.retry_backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            print(f"URL 가져오기 재시도 ({attempt}/{self.max_attempts}, {delay:.1f}s 후): {url} - {error}")
+            await asyncio.sleep(delay)
+        return url, content, self.max_attempts
+
+    @staticmethod
+    def _is_retryable(metadata: Dict[str, Any]) -> bool:
+        """가져오기 결과의 retryable 플래그/HTTP 상태로 재시도 여부 결정 (4xx 응답은 408/429만 재시도, 연결 오류 등은 재시도)"""
+        if 'retryable' in metadata:
+            return metadata['retryable']
+        status_code = metadata.get('status_code')
+        if status_code is not None:
+            return status_code >= 500 or status_code in (408, 429)
+        return True
+
+    def _split(self, url: str, content: Dict[str, Any], conversation_id: str) -> List[Document]:
+        """페이지를 청크 Document 목록으로 분할"""
+        chunks = self.text_splitter.split_text(content['content'])
+        return [
+            Document(
+                page_content=chunk,
+                metadata={
+                    'url': url,
+                    'title': content.get('title', ''),
+                    'chunk_index': i,
+                    'total_chunks': len(chunks),
+                    'source_url': url,
+                    'conversation_id': conversation_id,
+                    'timestamp': time.time()
+                }
+            )
+            for i, chunk in enumerate(chunks)
+        ]
+
+    async def _flush(self, job_id: str, vector_store, buffer: List[Tuple[str, int, List[Document]]]) -> int:
+        """모아 둔 청크를 한 번에 임베딩/업서트하고 URL 결과를 체크포인트로 저장 - 인덱싱된 URL 수 반환"""
+        documents = [document for _, _, url_documents in buffer for document in url_documents]
+        ids = [
+            uuid.uuid5(uuid.NAMESPACE_URL, f"{document.metadata['conversation_id']}:{document.metadata['url']}:{document.metadata['chunk_index']}").hex
+            for document in documents
+        ]
+        try:
+            await vector_store.add_documents(documents, ids=ids)
+            results = [(url, URL_DONE, attempts, len(url_documents), None) for url, attempts, url_documents in buffer]
+        except Exception as e:
+            print(f"청크 저장 실패 ({len(buffer)}개 URL): {e}")
+            results = [(url, URL_FAILED, attempts, 0, f"store: {e}") for url, attempts, _ in buffer]
+
+        for _, status, _, _, _ in results:
+            INGESTION_URLS.labels(result=status).inc()
+        await asyncio.to_thread(self.store.checkpoint, job_id, results)
+        await self._publish(job_id)
+        return sum(1 for _, status, _, _, _ in results if status == URL_DONE)
+
+    async def _publish(self, job_id: str):
+        """진행 상황을 구독 중인 스트림에 전달"""
+        listeners = self._listeners.get(job_id)
+        if not listeners:
+            return
+        job = await self.get(job_id)
+        for listener in listeners:
+            listener.put_nowait(job)
+
+    async def close(self):
+        """워커 중지 (진행 중이던 작업은 체크포인트부터 다음 시작 시 재개)"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+        self.store.close()
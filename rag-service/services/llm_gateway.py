@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator
+
+from services.logging_service import LLM_CALL_DURATION, LLM_CALLS_IN_FLIGHT, LLM_CALL_ERRORS, LLM_TIME_TO_FIRST_TOKEN
+
+
+class LLMGateway:
+    """RAGService의 모든 LLM 호출이 거쳐가는 비동기 게이트웨이
+
+    - 네이티브 비동기 호출(ainvoke)을 우선 사용하고, 동기 전용 LLM은 제한된 스레드 풀에서 실행
+    - 호출별 타임아웃과 동시 실행 개수 제한으로 이벤트 루프와 다른 요청을 보호
+    """
+
+    def __init__(self, llm, max_concurrency: int = None, timeout: float = None, executor_workers: int = None):
+        self.llm = llm
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+        workers = executor_workers or int(os.getenv("LLM_EXECUTOR_WORKERS", str(self.max_concurrency)))
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-gateway")
+
+    async def ainvoke(self, prompt: str, operation: str = "default", timeout: float = None) -> str:
+        """프롬프트를 실행하고 응답 텍스트를 반환 (타임아웃 초과 시 asyncio.TimeoutError)"""
+        async with self._semaphore:
+            LLM_CALLS_IN_FLIGHT.inc()
+            start_time = time.time()
+            try:
+                response = await asyncio.wait_for(self._call(prompt), timeout=timeout or self.timeout)
+                return self._to_text(response)
+            except Exception as e:
+                LLM_CALL_ERRORS.labels(operation=operation, error_type=type(e).__name__).inc()
+                raise
+            finally:
+                LLM_CALLS_IN_FLIGHT.dec()
+                LLM_CALL_DURATION.labels(operation=operation).observe(time.time() - start_time)
+
+    async def astream(self, prompt: str, operation: str = "default", timeout: float = None) -> AsyncIterator[str]:
+        """프롬프트를 실행하고 응답 토큰을 생성되는 대로 반환 (전체 타임아웃 초과 시 asyncio.TimeoutError)"""
+        async with self._semaphore:
+            LLM_CALLS_IN_FLIGHT.inc()
+            start_time = time.time()
+            first_token = True
+            try:
+                async for chunk in self._stream(prompt, timeout or self.timeout):
+                    text = self._to_text(chunk)
+                    if not text:
+                        continue
+                    if first_token:
+                        LLM_TIME_TO_FIRST_TOKEN.labels(operation=operation).observe(time.time() - start_time)
+                        first_token = False
+                    yield text
+            except Exception as e:
+                LLM_CALL_ERRORS.labels(operation=operation, error_type=type(e).__name__).inc()
+                raise
+            finally:
+                LLM_CALLS_IN_FLIGHT.dec()
+                LLM_CALL_DURATION.labels(operation=operation).observe(time.time() - start_time)
+
+    async def _stream(self, prompt: str, timeout: float) -> AsyncIterator[Any]:
+        """네이티브 스트리밍(astream) 우선, 지원하지 않는 LLM은 전체 응답을 한 번에 반환"""
+        if not hasattr(self.llm, 'astream'):
+            yield await asyncio.wait_for(self._call(prompt), timeout=timeout)
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        iterator = self.llm.astream(prompt).__aiter__()
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    yield await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    return
+        finally:
+            if hasattr(iterator, 'aclose'):
+                await iterator.aclose()
+
+    async def _call(self, prompt: str) -> Any:
+        """LLM 종류에 따라 비동기 또는 스레드 풀 실행 선택"""
+        if hasattr(self.llm, 'ainvoke'):
+            # 최신 LangChain API (네이티브 비동기)
+            return await self.llm.ainvoke(prompt)
+
+        loop = asyncio.get_running_loop()
+        if hasattr(self.llm, 'invoke'):
+            return await loop.run_in_executor(self._executor, self.llm.invoke, prompt)
+        # 구버전 호환성
+        return await loop.run_in_executor(self._executor, self.llm, prompt)
+
+    @staticmethod
+    def _to_text(response: Any) -> str:
+        """LLM 응답 객체를 문자열로 변환"""
+        if hasattr(response, 'content'):
+            return response.content
+        return response if isinstance(response, str) else str(response)
+
+    def close(self):
+        """스레드 풀 정리"""
+        self._executor.shutdown(wait=False)
@@ -1,6 +1,9 @@
 import json
 import logging
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 
@@ -13,10 +16,48 @@ from fastapi.responses import Response
 
 # Prometheus 메트릭 정의
 REQUEST_COUNT = Counter('rag_requests_total', 'Total number of RAG requests', ['endpoint', 'status'])
+SEARCH_CACHE_REQUESTS = Counter('search_cache_requests_total', 'Web search cache lookups', ['tier', 'result'])
+SEARCH_CACHE_HIT_RATIO = Gauge('search_cache_hit_ratio', 'Web search cache hit ratio (fresh and stale hits)')
+RESPONSE_CACHE_REQUESTS = Counter('response_cache_requests_total', 'Semantic answer cache lookups', ['mode', 'scope', 'result'])
+RESPONSE_CACHE_HIT_RATIO = Gauge('response_cache_hit_ratio', 'Semantic answer cache hit ratio')
+RESPONSE_CACHE_ENTRIES = Gauge('response_cache_entries', 'Answers held in the semantic answer cache')
+RESPONSE_CACHE_EVICTIONS = Counter('response_cache_evictions_total', 'Semantic answer cache entries removed', ['reason'])
 REQUEST_DURATION = Histogram('rag_request_duration_seconds', 'RAG request duration in seconds', ['endpoint'])
 VECTOR_SEARCH_DURATION = Histogram('vector_search_duration_seconds', 'Vector search duration in seconds')
 DOCUMENT_PROCESSING_DURATION = Histogram('document_processing_duration_seconds', 'Document processing duration in seconds')
+RETRIEVAL_STAGE_DURATION = Histogram('retrieval_stage_duration_seconds', 'Retrieval engine stage duration in seconds', ['mode', 'stage'])
+PROMPT_TOKENS = Histogram('rag_prompt_tokens', 'Prompt size in tokens after context assembly', ['operation'], buckets=(250, 500, 1000, 2000, 4000, 6000, 8000, 12000, 16000, 32000, 64000, 128000))
+CONTEXT_CHUNKS = Counter('rag_context_chunks_total', 'Retrieved chunks packed into prompts (used, truncated or dropped by the token budget)', ['operation', 'result'])
 ACTIVE_CONNECTIONS = Gauge('rag_active_connections', 'Number of active connections')
+LLM_CALL_DURATION = Histogram('llm_call_duration_seconds', 'LLM call duration in seconds', ['operation'])
+LLM_CALLS_IN_FLIGHT = Gauge('llm_calls_in_flight', 'Number of LLM calls currently running')
+LLM_CALL_ERRORS = Counter('llm_call_errors_total', 'Total number of failed or timed out LLM calls', ['operation', 'error_type'])
+LLM_TIME_TO_FIRST_TOKEN = Histogram('llm_time_to_first_token_seconds', 'Time from LLM stream start to first token', ['operation'])
+CHAT_TIME_TO_FIRST_TOKEN = Histogram('chat_time_to_first_token_seconds', 'Time from streaming chat request to first answer token', ['mode'])
+HTTP_POOL_CONNECTIONS = Gauge('http_pool_connections', 'Outbound HTTP pool connections by state', ['state'])
+HTTP_POOL_WAITING_REQUESTS = Gauge('http_pool_waiting_requests', 'Outbound HTTP requests waiting for a pooled connection')
+EMBEDDING_CACHE_REQUESTS = Counter('embedding_cache_requests_total', 'Embedding cache lookups per text', ['model', 'result'])
+SINGLE_FLIGHT_REQUESTS = Counter('single_flight_requests_total', 'Calls that ran the work (leader) or joined an identical in-flight call (coalesced)', ['layer', 'result'])
+CONVERSATION_STATE_RESIDENT = Gauge('conversation_state_resident', 'Conversation state entries resident in memory', ['kind'])
+CONVERSATION_STATE_BYTES = Gauge('conversation_state_resident_bytes', 'Approximate size of resident conversation histories in bytes')
+CONVERSATION_STATE_EVICTIONS = Counter('conversation_state_evictions_total', 'Conversation state entries evicted from memory', ['reason'])
+LOG_QUEUE_DEPTH = Gauge('log_queue_depth', 'Log records waiting to be shipped to Kafka')
+LOG_RECORDS_DROPPED = Counter('log_records_dropped_total', 'Log records dropped before reaching Kafka', ['reason'])
+LOG_RECORDS_SENT = Counter('log_records_sent_total', 'Log records handed to the Kafka producer', ['topic'])
+LOG_FLUSH_DURATION = Histogram('log_flush_duration_seconds', 'Kafka producer flush latency per shipped batch')
+INGESTION_JOBS = Counter('ingestion_jobs_total', 'URL ingestion jobs by state transition', ['status'])
+INGESTION_URLS = Counter('ingestion_urls_total', 'URLs processed by ingestion jobs', ['result'])
+INGESTION_QUEUE_DEPTH = Gauge('ingestion_queue_depth', 'Ingestion jobs waiting for a worker')
+INGESTION_ACTIVE_JOBS = Gauge('ingestion_active_jobs', 'Ingestion jobs currently running')
+HTML_EXTRACT_DURATION = Histogram('html_extract_duration_seconds', 'HTML title/body extraction duration per page', ['backend', 'mode'])
+FETCH_BYTE_BUCKETS = (1024, 8192, 32768, 131072, 524288, 1048576, 2097152, 4194304, 10485760)
+FETCH_DOWNLOADED_BYTES = Histogram('fetch_downloaded_bytes', 'Response body bytes downloaded per fetched page', ['content_kind'], buckets=FETCH_BYTE_BUCKETS)
+FETCH_USED_BYTES = Histogram('fetch_used_bytes', 'Extracted text bytes kept per fetched page', ['content_kind'], buckets=FETCH_BYTE_BUCKETS)
+FETCH_ABORTED = Counter('fetch_aborted_total', 'Page downloads aborted before extraction', ['reason'])
+HOST_BREAKER_STATE = Gauge('fetch_host_breaker_state', 'Per-host circuit breaker state (0 closed, 1 half-open, 2 open)', ['host'])
+HOST_BREAKER_TRANSITIONS = Counter('fetch_host_breaker_transitions_total', 'Circuit breaker state transitions across hosts', ['state'])
+HOST_FETCH_LATENCY = Gauge('fetch_host_latency_seconds', 'Recent per-host time to response headers (p50, p95) and the adaptive timeout', ['host', 'stat'])
+FETCH_SKIPPED = Counter('fetch_skipped_total', 'Page fetches skipped by the host health registry', ['reason'])
 
 class LoggingService:
     def __init__(self):
@@ -24,6 +65,17 @@ class LoggingService:
         self.elasticsearch_client = None
         self.struct_logger = None
         
+        # Kafka 전송 큐 설정 (요청 경로에서는 큐에 넣기만 하고 전송은 백그라운드 스레드가 담당)
+        self.queue_max_size = int(os.getenv('LOG_QUEUE_MAX_SIZE', '10000'))
+        self.overflow_policy = os.getenv('LOG_QUEUE_OVERFLOW_POLICY', 'drop')  # drop | block
+        self.block_timeout = float(os.getenv('LOG_QUEUE_BLOCK_TIMEOUT_SECONDS', '0.1'))
+        self.sender_batch_size = int(os.getenv('LOG_SENDER_BATCH_SIZE', '500'))
+        self.sender_interval = float(os.getenv('LOG_SENDER_INTERVAL_SECONDS', '1.0'))
+        self.log_queue = queue.Queue(maxsize=self.queue_max_size)
+        self._sender_thread = None
+        self._stopping = threading.Event()
+        LOG_QUEUE_DEPTH.set_function(self.log_queue.qsize)
+        
         self._setup_logging()
         self._setup_kafka()
         self._setup_elasticsearch()
@@ -54,12 +106,19 @@ class LoggingService:
         """Kafka 프로듀서 설정"""
         try:
             kafka_brokers = os.getenv('KAFKA_BROKERS', 'kafka:29092')
+            compression_type = os.getenv('KAFKA_COMPRESSION_TYPE', 'gzip')
             self.kafka_producer = KafkaProducer(
                 bootstrap_servers=kafka_brokers.split(','),
                 value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-                key_serializer=lambda k: k.encode('utf-8') if k else None
+                key_serializer=lambda k: k.encode('utf-8') if k else None,
+                linger_ms=int(os.getenv('KAFKA_LINGER_MS', '50')),
+                batch_size=int(os.getenv('KAFKA_BATCH_SIZE_BYTES', '65536')),
+                compression_type=None if compression_type == 'none' else compression_type,
+                max_block_ms=int(os.getenv('KAFKA_MAX_BLOCK_MS', '5000'))
             )
-            self.struct_logger.info("Kafka producer initialized", brokers=kafka_brokers)
+            self._sender_thread = threading.Thread(target=self._sender_loop, name="kafka-log-sender", daemon=True)
+            self._sender_thread.start()
+            self.struct_logger.info("Kafka producer initialized", brokers=kafka_brokers, compression=compression_type)
         except Exception as e:
             self.struct_logger.error("Failed to initialize Kafka producer", error=str(e))
     
@@ -132,13 +191,78 @@ class LoggingService:
         self.struct_logger.info("HTTP request", **log_data)
     
     def _send_to_kafka(self, topic: str, data: Dict[str, Any]):
-        """Kafka로 로그 전송"""
-        if self.kafka_producer:
+        """Kafka 전송 큐에 로그 추가 (전송은 백그라운드 스레드에서 수행)"""
+        if not self.kafka_producer or self._stopping.is_set():
+            return
+        
+        try:
+            if self.overflow_policy == 'block':
+                self.log_queue.put((topic, data), timeout=self.block_timeout)
+            else:
+                self.log_queue.put_nowait((topic, data))
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason='queue_full').inc()
+    
+    def _sender_loop(self):
+        """큐에 쌓인 로그를 배치로 Kafka에 전송"""
+        while True:
+            try:
+                batch = [self.log_queue.get(timeout=self.sender_interval)]
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            
+            # 대기 중인 레코드를 배치 크기만큼 모아서 한 번에 flush
+            while len(batch) < self.sender_batch_size:
+                try:
+                    batch.append(self.log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            self._ship_batch([record for record in batch if record is not None])
+            if None in batch:
+                return
+    
+    def _ship_batch(self, batch):
+        """배치 전송 후 flush (배치당 한 번의 브로커 왕복)"""
+        if not batch:
+            return
+        
+        for topic, data in batch:
             try:
                 self.kafka_producer.send(topic, value=data)
-                self.kafka_producer.flush()
+                LOG_RECORDS_SENT.labels(topic=topic).inc()
             except Exception as e:
+                LOG_RECORDS_DROPPED.labels(reason='send_error').inc()
                 self.struct_logger.error("Failed to send log to Kafka", error=str(e), topic=topic)
+        
+        start_time = time.perf_counter()
+        try:
+            self.kafka_producer.flush()
+        except Exception as e:
+            self.struct_logger.error("Failed to flush Kafka producer", error=str(e), batch_size=len(batch))
+        finally:
+            LOG_FLUSH_DURATION.observe(time.perf_counter() - start_time)
+    
+    def close(self, timeout: float = 5.0):
+        """남은 로그를 전송하고 Kafka 프로듀서 종료"""
+        if self._sender_thread is None:
+            return
+        
+        self._stopping.set()
+        try:
+            # 종료 신호 - 앞에 쌓인 레코드를 모두 보낸 뒤 스레드가 끝남
+            self.log_queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._sender_thread.join(timeout)
+        self._sender_thread = None
+        
+        try:
+            self.kafka_producer.close(timeout=timeout)
+        except Exception as e:
+            self.struct_logger.error("Failed to close Kafka producer", error=str(e))
     
     def get_metrics(self) -> str:
         """Prometheus 메트릭 반환"""
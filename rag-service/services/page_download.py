@@ -0,0 +1,116 @@
+import codecs
+import re
+from typing import Optional, Tuple
+
+import httpx
+
+# Content-Type별 추출 경로 (목록에 없는 타입은 본문을 받지 않고 중단)
+HTML_TYPES = {'text/html', 'application/xhtml+xml'}
+TEXT_TYPES = {'text/plain', 'text/markdown', 'text/x-markdown'}
+PDF_TYPES = {'application/pdf', 'application/x-pdf'}
+
+# 문서 앞부분에서 인코딩 선언을 찾을 범위 (HTML 표준의 prescan 범위)
+CHARSET_SNIFF_BYTES = 1024
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.I)
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+]
+
+
+class DownloadAborted(Exception):
+    """지원하지 않는 타입이거나 크기 상한을 넘어 다운로드를 중단한 경우 (재시도해도 결과가 같음)"""
+
+    def __init__(self, reason: str, message: str, downloaded: int = 0):
+        super().__init__(message)
+        self.reason = reason
+        self.downloaded = downloaded
+
+
+def content_kind(content_type: str) -> Optional[str]:
+    """Content-Type 헤더로 추출 경로 결정 - html | text | pdf | None(지원하지 않음)
+
+    헤더가 없으면 HTML로 간주
+    """
+    media_type = content_type.split(';')[0].strip().lower()
+    if not media_type or media_type in HTML_TYPES:
+        return 'html'
+    if media_type in TEXT_TYPES:
+        return 'text'
+    if media_type in PDF_TYPES:
+        return 'pdf'
+    return None
+
+
+def detect_charset(head: bytes, header_charset: Optional[str]) -> str:
+    """문서 앞부분으로 인코딩 결정 (BOM > Content-Type charset > meta 선언 > utf-8)"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    for candidate in (header_charset, _meta_charset(head)):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+    return 'utf-8'
+
+
+def _meta_charset(head: bytes) -> Optional[str]:
+    match = META_CHARSET.search(head[:CHARSET_SNIFF_BYTES])
+    return match.group(1).decode('ascii', errors='ignore') if match else None
+
+
+async def read_text(response: httpx.Response, max_bytes: int) -> Tuple[str, str, int, bool]:
+    """응답 본문을 스트리밍으로 읽으며 점진적으로 디코딩 - (텍스트, 인코딩, 받은 바이트, 잘림 여부)
+
+    인코딩은 앞부분(CHARSET_SNIFF_BYTES)이 모이면 한 번 결정하고, max_bytes를 넘으면 그 앞까지만 사용
+    """
+    head = b''
+    decoder = None
+    encoding = 'utf-8'
+    parts = []
+    downloaded = 0
+    truncated = False
+
+    async for chunk in response.aiter_bytes():
+        if downloaded + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - downloaded]
+            truncated = True
+        downloaded += len(chunk)
+
+        if decoder is None:
+            head += chunk
+            if len(head) < CHARSET_SNIFF_BYTES and not truncated:
+                continue
+            encoding = detect_charset(head, response.charset_encoding)
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            chunk, head = head, b''
+        parts.append(decoder.decode(chunk))
+
+        if truncated:
+            break
+
+    if decoder is None:
+        encoding = detect_charset(head, response.charset_encoding)
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        parts.append(decoder.decode(head))
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts), encoding, downloaded, truncated
+
+
+async def read_bytes(response: httpx.Response, max_bytes: int) -> Tuple[bytes, int]:
+    """응답 본문을 max_bytes까지 읽음 - 넘으면 DownloadAborted (잘린 바이너리는 파싱할 수 없음)"""
+    content_length = response.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise DownloadAborted('too_large', f"Content too large: {content_length} bytes (limit {max_bytes})")
+
+    parts = []
+    downloaded = 0
+    async for chunk in response.aiter_bytes():
+        downloaded += len(chunk)
+        if downloaded > max_bytes:
+            raise DownloadAborted('too_large', f"Content too large: over {max_bytes} bytes", downloaded)
+        parts.append(chunk)
+    return b''.join(parts), downloaded
@@ -1,9 +1,7 @@
 from langchain_openai import ChatOpenAI
 from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Qdrant
 from langchain_community.document_loaders import WebBaseLoader
 from langchain.schema import Document
 import os
@@ -11,29 +9,52 @@ import uuid
 from typing import List, Dict, Any, Tuple
 import asyncio
 import re
+import time
 
 from dotenv import load_dotenv
 
+from services.llm_gateway import LLMGateway
+from services.fetch_pipeline import FetchIndexPipeline
+from services.embedding_cache import CachedEmbeddings, SentenceTransformerEmbeddings
+from services.conversation_store import ConversationVectorStore, create_collection
+from services.conversation_state import ConversationStateManager
+from services.chat_stream import ChatStream
+from services.retrieval_engine import RetrievalEngine
+from services.context_assembler import ContextAssembler
+from services.response_cache import GLOBAL_SCOPE, SemanticResponseCache
+from services.ingestion_jobs import IngestionJobManager
+
 
 load_dotenv()  
+
+STORAGE_MODE_PER_CONVERSATION = "per_conversation"
+STORAGE_MODE_MULTI_TENANT = "multi_tenant"
+
 class RAGService:
     def __init__(self, vector_store, web_search):
         self.vector_store = vector_store
         self.web_search = web_search
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.llm_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         
         # LLM 초기화
         if self.openai_api_key:
             self.llm = ChatOpenAI(
                 temperature=0.7,
-                model="gpt-4o-mini"
+                model=self.llm_model
             )
         else:
             # OpenAI API 키가 없을 경우 대체 LLM 사용
             self.llm = self._create_fallback_llm()
         
-        # 대화 메모리
-        self.conversation_memories = {}
+        # 모든 LLM 호출은 게이트웨이를 통해 비동기로 실행 (이벤트 루프 블로킹 방지)
+        self.llm_gateway = LLMGateway(self.llm)
+        
+        # 프롬프트는 모델별 토큰 예산에 맞춰 조립 (검색 청크/대화 히스토리 우선순위 기반)
+        self.context_assembler = ContextAssembler(self.llm_model)
+        
+        # 대화 메모리/벡터 스토어는 LRU/TTL로 제한 (퇴출된 히스토리는 저장소에 보관)
+        self.conversation_state = ConversationStateManager()
         
         # 텍스트 분할기
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -42,8 +63,46 @@ class RAGService:
             length_function=len,
         )
         
-        # 대화별 벡터 스토어 캐시
-        self.conversation_vector_stores = {}
+        # 모든 대화별 벡터 스토어가 공유하는 (캐시된) 임베딩
+        self.embeddings = self._create_embeddings()
+        
+        # 벡터 저장 모드: 대화별 콜렉션(per_conversation) 또는 공유 콜렉션(multi_tenant)
+        self.storage_mode = os.getenv("QDRANT_STORAGE_MODE", STORAGE_MODE_PER_CONVERSATION)
+        self.shared_conversation_collection = os.getenv("QDRANT_SHARED_CONVERSATION_COLLECTION", "conversations")
+        self.shared_long_term_collection = os.getenv("QDRANT_SHARED_LONG_TERM_COLLECTION", "long_term_memory")
+        
+        # 검색 결과 병렬 수집/인덱싱 파이프라인
+        self.fetch_pipeline = FetchIndexPipeline(self.web_search, self.text_splitter)
+        
+        # 모든 채팅 모드가 공유하는 검색 엔진 (모드별 차이는 RETRIEVAL_MODES 설정)
+        self.retrieval_engine = RetrievalEngine(
+            self.web_search,
+            self.fetch_pipeline,
+            conversation_store=self._ensure_conversation_collection,
+            long_term_store=self._ensure_long_term_memory_collection,
+            context_formatter=self._create_context_chunks,
+            batch_query=self.vector_store.query_batch
+        )
+        
+        # 비슷한 질문의 답변 재사용 (챗봇/구조화된 답변의 웹 검색 전에 확인)
+        self.response_cache = SemanticResponseCache()
+        
+        # 대량 URL 인덱싱 작업 (워커 풀에서 처리, URL별 체크포인트로 재개 가능)
+        self.ingestion_jobs = IngestionJobManager(
+            self.web_search,
+            self.text_splitter,
+            get_store=self._ensure_conversation_collection,
+            on_indexed=self._invalidate_indexed_responses
+        )
+        
+        # 주제 기반 답변: 질문 분류/주제 추출(LLM) 동안 검색 결과 페이지를 미리 수집하고, 주제 검색 시 최대 대기 시간만큼만 기다림
+        self.speculative_fetch = os.getenv("SPECULATIVE_FETCH_ENABLED", "true").lower() == "true"
+        self.speculative_fetch_wait = float(os.getenv("SPECULATIVE_FETCH_WAIT_SECONDS", "5"))
+        # 대기 시간 안에 저장된 페이지가 하나도 없을 때 첫 페이지를 추가로 기다리는 시간 (0이면 기다리지 않음)
+        self.speculative_fetch_first_page_wait = float(os.getenv("SPECULATIVE_FETCH_FIRST_PAGE_WAIT_SECONDS", "5"))
+        
+        # 대화형 챗봇의 맥락/감정 분석을 한 번의 LLM 호출로 통합할지 여부
+        self.merge_conversation_analysis = os.getenv("CONVERSATION_ANALYSIS_MERGED", "false").lower() == "true"
     
     def _create_fallback_llm(self):
         """대체 LLM 생성 (OpenAI API 키가 없을 경우)"""
@@ -54,8 +113,27 @@ class RAGService:
         
         return FallbackLLM()
     
+    def _create_embeddings(self) -> CachedEmbeddings:
+        """임베딩 생성 (OpenAI 키가 있으면 OpenAI, 없으면 로컬 모델) - 콘텐츠 해시 캐시 적용"""
+        if self.openai_api_key:
+            embeddings = OpenAIEmbeddings()
+            return CachedEmbeddings(embeddings, embeddings.model)
+        
+        local_embeddings = SentenceTransformerEmbeddings(
+            self.vector_store.embedding_model,
+            self.vector_store.embedding_model_name
+        )
+        return CachedEmbeddings(local_embeddings, self.vector_store.embedding_model_name)
+    
+    @property
+    def is_multi_tenant(self) -> bool:
+        """공유 콜렉션 + conversation_id 필터 저장 모드 여부"""
+        return self.storage_mode == STORAGE_MODE_MULTI_TENANT
+    
     def _get_conversation_collection_name(self, conversation_id: str) -> str:
-        """대화별 단기기억 콜렉션 이름 생성"""
+        """대화별 단기기억 콜렉션 이름 생성 (멀티테넌트 모드에서는 공유 콜렉션)"""
+        if self.is_multi_tenant:
+            return self.shared_conversation_collection
         return f"conversation_{conversation_id.replace('-', '_')}"
     
     def _get_long_term_memory_collection_name(self, conversation_id: str) -> str:
@@ -65,88 +143,193 @@ class RAGService:
         - 대화별로 독립적인 메모리 관리
         - 다른 대화와의 정보 혼재 방지
         - 대화별 컨텍스트 유지
+        
+        멀티테넌트 모드에서는 공유 콜렉션 하나를 conversation_id 페이로드로 분리합니다.
         """
+        if self.is_multi_tenant:
+            return self.shared_long_term_collection
         return f"long_term_memory_{conversation_id.replace('-', '_')}"
     
-    async def _ensure_conversation_collection(self, conversation_id: str) -> Qdrant:
+    async def _ensure_conversation_collection(self, conversation_id: str) -> ConversationVectorStore:
         """대화별 단기기억 콜렉션이 존재하는지 확인하고 없으면 생성"""
         collection_name = self._get_conversation_collection_name(conversation_id)
-        
-        if collection_name not in self.conversation_vector_stores:
-            try:
-                # 기존 콜렉션이 있는지 확인
-                collections = self.vector_store.client.get_collections()
-                collection_exists = any(col.name == collection_name for col in collections.collections)
-                
-                if collection_exists:
-                    print(f"기존 단기기억 콜렉션 사용: {collection_name}")
-                else:
-                    # 콜렉션이 없으면 생성
-                    print(f"새 단기기억 콜렉션 생성: {collection_name}")
-                    
-                    # OpenAI embeddings 사용 시 1536차원, 그렇지 않으면 384차원
-                    vector_size = 1536 if self.openai_api_key else 384
-                    
-                    self.vector_store.client.create_collection(
-                        collection_name,
-                        vectors_config={
-                            "size": vector_size,
-                            "distance": "Cosine"
-                        }
-                    )
-            except Exception as e:
-                print(f"단기기억 콜렉션 확인/생성 오류: {e}")
-                # 오류 발생 시 기본 콜렉션 사용
-                return self.vector_store
-            
-            # 대화별 벡터 스토어 생성
-            self.conversation_vector_stores[collection_name] = Qdrant(
-                client=self.vector_store.client,
-                collection_name=collection_name,
-                embeddings=OpenAIEmbeddings() if self.openai_api_key else None
-            )
-        
-        return self.conversation_vector_stores[collection_name]
+        return await self._ensure_collection(collection_name, conversation_id, "단기기억")
     
-    async def _ensure_long_term_memory_collection(self, conversation_id: str) -> Qdrant:
+    async def _ensure_long_term_memory_collection(self, conversation_id: str) -> ConversationVectorStore:
         """장기기억 콜렉션이 존재하는지 확인하고 없으면 생성 (대화별 분리)"""
         collection_name = self._get_long_term_memory_collection_name(conversation_id)
+        return await self._ensure_collection(collection_name, conversation_id, "장기기억")
+    
+    async def _ensure_collection(self, collection_name: str, conversation_id: str, memory_label: str) -> ConversationVectorStore:
+        """콜렉션 확인/생성 후 대화 범위의 벡터 스토어 반환"""
+        store_key = f"{collection_name}:{conversation_id}" if self.is_multi_tenant else collection_name
         
-        if collection_name not in self.conversation_vector_stores:
+        store = self.conversation_state.get_store(store_key)
+        if store is None:
             try:
-                # 기존 콜렉션이 있는지 확인
-                collections = self.vector_store.client.get_collections()
-                collection_exists = any(col.name == collection_name for col in collections.collections)
+                # OpenAI embeddings 사용 시 1536차원, 그렇지 않으면 384차원
+                vector_size = 1536 if self.openai_api_key else 384
                 
-                if collection_exists:
-                    print(f"기존 장기기억 콜렉션 사용: {collection_name}")
-                else:
-                    # 콜렉션이 없으면 생성
-                    print(f"새 장기기억 콜렉션 생성: {collection_name}")
-                    
-                    # OpenAI embeddings 사용 시 1536차원, 그렇지 않으면 384차원
-                    vector_size = 1536 if self.openai_api_key else 384
-                    
-                    self.vector_store.client.create_collection(
+                # 레지스트리로 존재 여부 확인, 없으면 생성 (동시 생성 요청은 하나로 합침)
+                created = await self.vector_store.collection_registry.ensure(
+                    collection_name,
+                    lambda: create_collection(
+                        self.vector_store.client,
                         collection_name,
-                        vectors_config={
-                            "size": vector_size,
-                            "distance": "Cosine"
-                        }
+                        vector_size,
+                        multi_tenant=self.is_multi_tenant
                     )
+                )
+                
+                if created:
+                    print(f"새 {memory_label} 콜렉션 생성: {collection_name}")
+                else:
+                    print(f"기존 {memory_label} 콜렉션 사용: {collection_name}")
             except Exception as e:
-                print(f"장기기억 콜렉션 확인/생성 오류: {e}")
+                print(f"{memory_label} 콜렉션 확인/생성 오류: {e}")
                 # 오류 발생 시 기본 콜렉션 사용
                 return self.vector_store
             
-            # 장기기억 벡터 스토어 생성
-            self.conversation_vector_stores[collection_name] = Qdrant(
+            # 대화별 벡터 스토어 생성 (멀티테넌트 모드에서는 conversation_id로 범위 제한)
+            store = ConversationVectorStore(
                 client=self.vector_store.client,
                 collection_name=collection_name,
-                embeddings=OpenAIEmbeddings() if self.openai_api_key else None
+                embeddings=self.embeddings,
+                conversation_id=conversation_id if self.is_multi_tenant else None
             )
+            self.conversation_state.set_store(store_key, store)
         
-        return self.conversation_vector_stores[collection_name]
+        return store
+    
+    def _create_turn(self, conversation_id: str, memory, sources: List[str], context_info: Dict[str, int], prompt: str, operation: str) -> Dict[str, Any]:
+        """검색/컨텍스트 수집이 끝나고 LLM 호출만 남은 대화 턴"""
+        return {
+            'conversation_id': conversation_id,
+            'memory': memory,
+            'sources': sources,
+            'context_info': context_info,
+            'prompt': prompt,
+            'operation': operation,
+            'response': None
+        }
+    
+    def _create_ready_turn(self, response: str, conversation_id: str = None) -> Dict[str, Any]:
+        """LLM 호출 없이 바로 응답하는 대화 턴 (빈 메시지 등)"""
+        return {
+            'conversation_id': conversation_id or str(uuid.uuid4()),
+            'memory': None,
+            'sources': [],
+            'context_info': {
+                'shortTermMemory': 0,
+                'longTermMemory': 0,
+                'webSearch': 0
+            },
+            'prompt': None,
+            'operation': None,
+            'response': response
+        }
+    
+    def _create_cached_turn(self, conversation_id: str, memory, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """답변 캐시에서 찾은 응답으로 바로 응답하는 대화 턴 (원래 참조 소스 포함)"""
+        context_info = {
+            'shortTermMemory': 0,
+            'longTermMemory': 0,
+            'webSearch': len(cached['sources']),
+            'responseCacheHit': 1
+        }
+        turn = self._create_turn(conversation_id, memory, cached['sources'], context_info, None, operation=None)
+        turn['response'] = cached['response']
+        turn['cached'] = True
+        return turn
+    
+    async def _lookup_cached_response(self, mode: str, message: str, conversation_id: str, memory, use_web_search: bool) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """답변 캐시 조회 - (캐시 히트 턴 또는 None, 답변 생성 후 캐시에 저장할 키 또는 None) 반환"""
+        if not self.response_cache.enabled:
+            return None, None
+        
+        scope = self.response_cache.scope_for(message, conversation_id, uses_context=self._uses_conversation_context(memory))
+        try:
+            # 질문 임베딩은 임베딩 캐시에 남으므로 이후 메모리 검색에서 다시 계산하지 않음
+            vector = await asyncio.to_thread(self.embeddings.embed_query, message)
+        except Exception as e:
+            print(f"답변 캐시 조회 실패: {e}")
+            return None, None
+        
+        cache_key = {'vector': vector, 'mode': mode, 'scope': scope, 'use_web_search': use_web_search}
+        cached = self.response_cache.lookup(**cache_key)
+        if cached is None:
+            return None, cache_key
+        return self._create_cached_turn(conversation_id, memory, cached), None
+    
+    @staticmethod
+    def _uses_conversation_context(memory, retrieval: Dict[str, Any] = None) -> bool:
+        """대화 히스토리나 이전에 저장된 메모리 문서를 사용한 턴인지 (이번 웹 검색으로 저장한 문서는 제외)"""
+        if memory is not None and memory.chat_memory.messages:
+            return True
+        if retrieval is None:
+            return False
+        if retrieval['long_term']:
+            return True
+        searched_urls = {result.get('url') for result in retrieval.get('search_results', [])}
+        return any(doc.metadata.get('url') not in searched_urls for doc in retrieval['short_term'])
+    
+    def _scope_cache_key(self, cache_key: Dict[str, Any], conversation_id: str, memory, retrieval: Dict[str, Any]) -> Dict[str, Any]:
+        """검색 후 메모리 문서를 사용한 것으로 확인되면 전역 대신 대화 범위로 저장"""
+        if cache_key and cache_key['scope'] != conversation_id and self._uses_conversation_context(memory, retrieval):
+            return {**cache_key, 'scope': conversation_id}
+        return cache_key
+    
+    def _invalidate_indexed_responses(self, conversation_id: str):
+        """URL 인덱싱 후 해당 대화와 전역 범위의 답변 캐시 제거 (새 문서가 반영되지 않은 답변)"""
+        self.response_cache.invalidate(scope=conversation_id, reason='index')
+        self.response_cache.invalidate(scope=GLOBAL_SCOPE, reason='index')
+    
+    async def _generate_turn_response(self, message: str, turn: Dict[str, Any]) -> str:
+        """대화 턴의 LLM 응답 생성 후 메모리/장기기억에 저장"""
+        if turn['prompt'] is None:
+            if turn.get('cached'):
+                await self._complete_turn(message, turn, turn['response'])
+            return turn['response']
+        
+        print(f"LLM 응답 생성 중... ({turn['operation']})")
+        response = await self.llm_gateway.ainvoke(turn['prompt'], operation=turn['operation'])
+        await self._complete_turn(message, turn, response)
+        return response
+    
+    async def _complete_turn(self, message: str, turn: Dict[str, Any], response: str):
+        """대화 메모리에 저장하고 현재 대화를 장기기억에 저장"""
+        # LLM 응답을 기다리는 동안 준비 단계의 메모리가 퇴출(백엔드 저장)됐을 수 있으므로 다시 조회해서 추가
+        memory = self.conversation_state.get_memory(turn['conversation_id'])
+        turn['memory'] = memory
+        memory.chat_memory.add_user_message(message)
+        memory.chat_memory.add_ai_message(response)
+        
+        # 캐시된 답변은 대화 메모리에만 기록 (장기기억/답변 캐시는 원래 답변 생성 시 저장됨)
+        if turn.get('cached'):
+            return
+        
+        await self._save_to_long_term_memory(turn['conversation_id'], message, response, turn['sources'])
+        
+        # 대체 LLM 응답은 캐시하지 않음
+        cache_key = turn.get('response_cache_key')
+        if cache_key and self.openai_api_key:
+            self.response_cache.put(**cache_key, message=message, response=response, sources=turn['sources'])
+    
+    def stream_response(self, mode: str, message: str, conversation_id: str = None, use_web_search: bool = True) -> ChatStream:
+        """스트리밍 응답 생성 - 검색 메타데이터를 먼저 보내고 LLM 토큰을 순서대로 전달"""
+        preparers = {
+            'chat': self._prepare_chat,
+            'structured': self._prepare_structured_response,
+            'topic_based': self._prepare_topic_based_response,
+            'conversational': self._prepare_chat_with_memory
+        }
+        return ChatStream(
+            mode,
+            message,
+            prepare=lambda: preparers[mode](message, conversation_id, use_web_search),
+            llm_gateway=self.llm_gateway,
+            complete=self._complete_turn
+        )
     
     def _should_use_web_search(self, message: str) -> bool:
         """메시지 내용을 분석하여 웹 검색이 필요한지 판단"""
@@ -196,170 +379,9 @@ class RAGService:
     async def chat(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Tuple[str, List[str], str, Dict[str, int]]:
         """챗봇 대화 처리 - 대화별 콜렉션에 저장"""
         try:
-            # 빈 메시지 체크
-            if not message or not message.strip():
-                empty_context_info = {
-                    'shortTermMemory': 0,
-                    'longTermMemory': 0,
-                    'webSearch': 0
-                }
-                return "검색어가 없습니다. 구체적인 질문이나 검색하고 싶은 내용을 입력해주세요.", [], conversation_id or str(uuid.uuid4()), empty_context_info
-            
-            # 대화 ID 생성
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
-            
-            # 대화 메모리 초기화
-            if conversation_id not in self.conversation_memories:
-                self.conversation_memories[conversation_id] = ConversationBufferMemory(
-                    memory_key="chat_history",
-                    return_messages=True
-                )
-            
-            memory = self.conversation_memories[conversation_id]
-            
-            # 대화별 콜렉션 확인/생성
-            conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
-            
-            # 웹 검색 필요성 판단
-            should_search = use_web_search and self._should_use_web_search(message)
-            
-            # 1단계: 웹 검색 수행 (필요한 경우에만)
-            sources = []
-            if should_search:
-                print(f"웹 검색 수행 중: {message}")
-                search_results = await self.web_search.search(message, max_results=5)
-                
-                # 2단계: 검색 결과를 대화별 콜렉션에 저장
-                for result in search_results:
-                    if result.get('url'):
-                        try:
-                            # URL에서 콘텐츠 추출
-                            content = await self.web_search.fetch_url_content(result['url'])
-                            if content.get('content'):
-                                # 텍스트 분할
-                                documents = self.text_splitter.split_text(content['content'])
-                                
-                                # 벡터 스토어에 추가 (대화별 콜렉션)
-                                doc_objects = []
-                                for i, doc_text in enumerate(documents):
-                                    doc_objects.append(Document(
-                                        page_content=doc_text,
-                                        metadata={
-                                            'url': result['url'],
-                                            'title': content.get('title', ''),
-                                            'chunk_index': i,
-                                            'total_chunks': len(documents),
-                                            'source_url': result['url'],
-                                            'search_query': message,
-                                            'conversation_id': conversation_id,
-                                            'timestamp': asyncio.get_event_loop().time()
-                                        }
-                                    ))
-                                
-                                # 대화별 콜렉션에 저장
-                                conversation_vector_store.add_documents(doc_objects)
-                                sources.append(result['url'])
-                                print(f"URL 인덱싱 완료: {result['url']} -> {self._get_conversation_collection_name(conversation_id)}")
-                        except Exception as e:
-                            print(f"URL 인덱싱 실패 {result['url']}: {e}")
-                            continue
-            else:
-                print(f"웹 검색 건너뛰기: {message} (로컬 메모리만 사용)")
-            
-            # 3단계: 단기기억 → 장기기억 → 웹검색 순으로 컨텍스트 수집
-            print(f"컨텍스트 수집 중: {message}")
-            
-            # 3-1: 단기기억 (현재 대화)에서 검색
-            short_term_context = []
-            try:
-                print(f"단기기억 검색 시작: {self._get_conversation_collection_name(conversation_id)}")
-                short_term_results = conversation_vector_store.similarity_search(message, k=3)
-                short_term_context = [result for result in short_term_results if hasattr(result, 'page_content') and result.page_content]
-                print(f"단기기억에서 {len(short_term_context)}개 문서 검색 완료")
-            except Exception as e:
-                print(f"단기기억 검색 실패: {e}")
-                print(f"단기기억 벡터 스토어 상태: {type(conversation_vector_store)}")
-                short_term_context = []
-            
-            # 3-2: 장기기억 (대화별 히스토리)에서 검색
-            long_term_context = []
-            try:
-                print(f"장기기억 검색 시작: {self._get_long_term_memory_collection_name(conversation_id)}")
-                long_term_vector_store = await self._ensure_long_term_memory_collection(conversation_id)
-                long_term_results = long_term_vector_store.similarity_search(message, k=3)
-                long_term_context = [result for result in long_term_results if hasattr(result, 'page_content') and result.page_content]
-                print(f"장기기억에서 {len(long_term_context)}개 문서 검색 완료")
-            except Exception as e:
-                print(f"장기기억 검색 실패: {e}")
-                print(f"장기기억 벡터 스토어 상태: {type(long_term_vector_store) if 'long_term_vector_store' in locals() else 'Not created'}")
-                long_term_context = []
-            
-            # 3-3: 웹검색 결과를 현재 대화에 저장 (이미 수행됨)
-            web_search_context = []
-            if sources:
-                web_search_context = [f"웹검색 결과: {len(sources)}개 URL에서 정보 수집됨"]
-                print(f"웹검색에서 {len(sources)}개 소스 수집")
-            
-            # 4단계: 통합 컨텍스트 생성 (우선순위: 단기기억 > 장기기억 > 웹검색)
-            all_context_docs = []
-            
-            # 단기기억 우선 (가장 관련성 높음)
-            for result in short_term_context:
-                all_context_docs.append(result)
-                if hasattr(result, 'metadata') and result.metadata.get('url') and result.metadata.get('url') not in sources:
-                    sources.append(result.metadata.get('url'))
-            
-            # 장기기억 추가 (중간 관련성)
-            for result in long_term_context:
-                all_context_docs.append(result)
-                if hasattr(result, 'metadata') and result.metadata.get('url') and result.metadata.get('url') not in sources:
-                    sources.append(result.metadata.get('url'))
-            
-            # 컨텍스트 생성
-            context = self._create_context(all_context_docs)
-            print(f"통합 컨텍스트: 단기기억 {len(short_term_context)}개, 장기기억 {len(long_term_context)}개, 웹검색 {len(web_search_context)}개")
-            
-            # 검색 결과가 없을 때 기본 정보 제공
-            if not all_context_docs and not sources:
-                print("검색 결과가 없어 기본 AI 정보를 제공합니다.")
-                context = self._get_default_ai_context(message)
-            
-            # 5단계: 프롬프트 생성 및 LLM 응답
-            prompt = self._create_prompt(
-                message, 
-                context, 
-                short_term_count=len(short_term_context),
-                long_term_count=len(long_term_context),
-                web_search_count=len(sources),
-                chat_history=memory.chat_memory.messages # 대화 히스토리 전달
-            )
-            
-            print("LLM 응답 생성 중...")
-            if hasattr(self.llm, 'invoke'):
-                # 최신 LangChain API
-                response = self.llm.invoke(prompt)
-                if hasattr(response, 'content'):
-                    response = response.content
-            else:
-                # 구버전 호환성
-                response = self.llm(prompt)
-            
-            # 대화 메모리에 저장
-            memory.chat_memory.add_user_message(message)
-            memory.chat_memory.add_ai_message(response)
-            
-            # 6단계: 현재 대화를 장기기억에 저장
-            await self._save_to_long_term_memory(conversation_id, message, response, sources)
-            
-            # 컨텍스트 정보 생성
-            context_info = {
-                'shortTermMemory': len(short_term_context),
-                'longTermMemory': len(long_term_context),
-                'webSearch': len(sources)
-            }
-            
-            return response, sources, conversation_id, context_info
+            turn = await self._prepare_chat(message, conversation_id, use_web_search)
+            response = await self._generate_turn_response(message, turn)
+            return response, turn['sources'], turn['conversation_id'], turn['context_info']
             
         except Exception as e:
             print(f"챗봇 처리 오류: {e}")
@@ -370,37 +392,116 @@ class RAGService:
             }
             return f"죄송합니다. 처리 중 오류가 발생했습니다: {str(e)}", [], conversation_id or str(uuid.uuid4()), error_context_info
     
-    def _create_context(self, documents: List[Document]) -> str:
-        """문서들로부터 컨텍스트 생성"""
-        if not documents:
-            return ""
+    async def _prepare_chat(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Dict[str, Any]:
+        """챗봇 대화의 검색/컨텍스트 수집 단계 - LLM 호출 직전까지 수행"""
+        # 빈 메시지 체크
+        if not message or not message.strip():
+            return self._create_ready_turn("검색어가 없습니다. 구체적인 질문이나 검색하고 싶은 내용을 입력해주세요.", conversation_id)
+        
+        # 대화 ID 생성
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+        
+        # 대화 메모리 조회 (퇴출된 대화는 저장소에서 복원)
+        memory = self.conversation_state.get_memory(conversation_id)
+        
+        # 비슷한 질문에 대한 답변이 캐시에 있으면 검색/LLM 호출 없이 응답
+        cached_turn, cache_key = await self._lookup_cached_response('chat', message, conversation_id, memory, use_web_search)
+        if cached_turn:
+            return cached_turn
+        
+        # 1~4단계: 웹 검색/저장 → 단기기억 → 장기기억 순으로 컨텍스트 수집 (웹 검색은 필요한 경우에만)
+        should_search = use_web_search and self._should_use_web_search(message)
+        retrieval = await self.retrieval_engine.run('chat', message, conversation_id, use_web_search=should_search)
+        sources = retrieval['sources']
+        context_chunks = retrieval['context']
+        print(f"통합 컨텍스트: 단기기억 {len(retrieval['short_term'])}개, 장기기억 {len(retrieval['long_term'])}개, 웹검색 {len(sources)}개")
+        
+        # 검색 결과가 없을 때 기본 정보 제공
+        if not retrieval['documents'] and not sources:
+            print("검색 결과가 없어 기본 AI 정보를 제공합니다.")
+            context_chunks = self._create_default_context_chunks(message)
+        
+        # 5단계: 프롬프트 생성 (토큰 예산에 맞춰 컨텍스트/히스토리 조립)
+        assembled = self._create_prompt(
+            message, 
+            context_chunks, 
+            short_term_count=len(retrieval['short_term']),
+            long_term_count=len(retrieval['long_term']),
+            web_search_count=len(sources),
+            chat_history=memory.chat_memory.messages # 대화 히스토리 전달
+        )
         
-        context_parts = []
+        # 컨텍스트 정보 생성
+        context_info = {
+            'shortTermMemory': len(retrieval['short_term']),
+            'longTermMemory': len(retrieval['long_term']),
+            'webSearch': len(sources),
+            'promptTokens': assembled['prompt_tokens'],
+            **retrieval['timings']
+        }
+        
+        # 6단계(LLM 응답 생성 및 장기기억/답변 캐시 저장)는 호출 측에서 수행
+        turn = self._create_turn(conversation_id, memory, sources, context_info, assembled['prompt'], operation="chat")
+        turn['response_cache_key'] = self._scope_cache_key(cache_key, conversation_id, memory, retrieval)
+        return turn
+    
+    def _create_context_chunks(self, documents: List[Document]) -> List[Dict[str, Any]]:
+        """문서들로부터 프롬프트 조립용 컨텍스트 청크 생성 (단기기억 > 장기기억 우선순위, 검색 점수 포함)
+        
+        잘릴 때 출처가 남도록 제목/URL을 내용보다 앞에 배치 (길이 제한은 ContextAssembler의 토큰 예산이 담당)
+        """
+        chunks = []
         for doc in documents:
             content = doc.page_content
-            title = doc.metadata.get('title', '')
-            url = doc.metadata.get('url', '')
-            
-            if content:
-                context_part = f"제목: {title}\nURL: {url}\n내용: {content[:800]}...\n"
-                context_parts.append(context_part)
+            if not content:
+                continue
+            header = ""
+            if doc.metadata.get('title'):
+                header += f"제목: {doc.metadata['title']}\n"
+            if doc.metadata.get('url'):
+                header += f"URL: {doc.metadata['url']}\n"
+            chunks.append({
+                'text': f"{header}내용: {content}\n",
+                'priority': 1 if doc.metadata.get('memory_type') == 'long_term' else 0,
+                'score': doc.metadata.get('_score', 0)
+            })
+        return chunks
+    
+    def _create_default_context_chunks(self, message: str) -> List[Dict[str, Any]]:
+        """검색 결과가 없을 때 사용할 기본 컨텍스트 청크"""
+        return [{'text': self._get_default_ai_context(message), 'priority': 0, 'score': 0}]
+    
+    def _chat_history_lines(self, chat_history: List = None) -> List[str]:
+        """대화 메모리 메시지를 프롬프트용 줄 목록으로 변환 (오래된 순서)"""
+        lines = []
+        for msg in chat_history or []:
+            if hasattr(msg, 'content'):
+                role = "사용자" if hasattr(msg, 'type') and msg.type == 'human' else "AI"
+                lines.append(f"{role}: {msg.content}")
+        return lines
+    
+    def _render_chat_history(self, history_lines: List[str]) -> str:
+        """예산 안에 선택된 대화 히스토리를 프롬프트 섹션으로 포맷팅"""
+        if not history_lines:
+            return ""
+        chat_history_text = "\n=== 이전 대화 내용 ===\n"
+        for i, line in enumerate(history_lines, 1):
+            chat_history_text += f"{i}. {line}\n"
+        chat_history_text += "==================\n"
+        return chat_history_text
+    
+    def _create_prompt(self, message: str, context_chunks: List[Dict[str, Any]], short_term_count: int = 0, long_term_count: int = 0, web_search_count: int = 0, chat_history: List = None) -> Dict[str, Any]:
+        """프롬프트 생성 - 대화 히스토리와 컨텍스트를 포함하여 맥락 의존적 질문 처리 (토큰 예산 적용)"""
+        def render(history_lines: List[str], chunks: List[Dict[str, Any]]) -> str:
+            context = "\n".join(chunk['text'] for chunk in chunks)
+            return self._render_prompt(message, context, bool(context_chunks), short_term_count, long_term_count, web_search_count, self._render_chat_history(history_lines))
         
-        return "\n".join(context_parts)
+        return self.context_assembler.assemble(render, context_chunks, self._chat_history_lines(chat_history), operation="chat")
     
-    def _create_prompt(self, message: str, context: str, short_term_count: int = 0, long_term_count: int = 0, web_search_count: int = 0, chat_history: List = None) -> str:
-        """프롬프트 생성 - 대화 히스토리와 컨텍스트를 포함하여 맥락 의존적 질문 처리"""
-        
-        # 대화 히스토리 처리
-        chat_history_text = ""
-        if chat_history and len(chat_history) > 0:
-            chat_history_text = "\n=== 이전 대화 내용 ===\n"
-            for i, msg in enumerate(chat_history[-6:], 1):  # 최근 6개 메시지만 포함
-                if hasattr(msg, 'content'):
-                    role = "사용자" if hasattr(msg, 'type') and msg.type == 'human' else "AI"
-                    chat_history_text += f"{i}. {role}: {msg.content}\n"
-            chat_history_text += "==================\n"
-        
-        if context:
+    def _render_prompt(self, message: str, context: str, has_context: bool, short_term_count: int, long_term_count: int, web_search_count: int, chat_history_text: str) -> str:
+        """챗봇 프롬프트 템플릿"""
+        if has_context:
             context_summary = f"""
 === 컨텍스트 정보 ===
 - 단기기억 (현재 대화): {short_term_count}개 문서
@@ -445,19 +546,16 @@ class RAGService:
         """검색 결과가 없을 때 기본 AI 정보 제공"""
         return "검색어가 없습니다. 구체적인 질문이나 검색하고 싶은 내용을 입력해주세요."
     
-    def _create_structured_prompt(self, message: str, context: str, chat_history: List = None) -> str:
-        """구조화된 분석 답변을 위한 프롬프트 생성"""
-        
-        # 대화 히스토리 처리
-        chat_history_text = ""
-        if chat_history and len(chat_history) > 0:
-            chat_history_text = "\n=== 이전 대화 내용 ===\n"
-            for i, msg in enumerate(chat_history[-6:], 1):  # 최근 6개 메시지만 포함
-                if hasattr(msg, 'content'):
-                    role = "사용자" if hasattr(msg, 'type') and msg.type == 'human' else "AI"
-                    chat_history_text += f"{i}. {role}: {msg.content}\n"
-            chat_history_text += "==================\n"
+    def _create_structured_prompt(self, message: str, context_chunks: List[Dict[str, Any]], chat_history: List = None) -> Dict[str, Any]:
+        """구조화된 분석 답변을 위한 프롬프트 생성 (토큰 예산 적용)"""
+        def render(history_lines: List[str], chunks: List[Dict[str, Any]]) -> str:
+            context = "\n".join(chunk['text'] for chunk in chunks)
+            return self._render_structured_prompt(message, context, self._render_chat_history(history_lines))
         
+        return self.context_assembler.assemble(render, context_chunks, self._chat_history_lines(chat_history), operation="structured_answer")
+    
+    def _render_structured_prompt(self, message: str, context: str, chat_history_text: str) -> str:
+        """구조화된 분석 답변 프롬프트 템플릿"""
         structured_prompt = f"""당신은 정보를 체계적으로 분석하고 구조화된 답변을 제공하는 전문가입니다.
 
 {chat_history_text}
@@ -499,163 +597,9 @@ class RAGService:
     async def generate_structured_response(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Tuple[str, List[str], str, Dict[str, int]]:
         """구조화된 분석 답변 생성 - 체계적이고 분석적인 답변 제공"""
         try:
-            # 빈 메시지 체크
-            if not message or not message.strip():
-                empty_context_info = {
-                    'shortTermMemory': 0,
-                    'longTermMemory': 0,
-                    'webSearch': 0
-                }
-                return "검색어가 없습니다. 구체적인 질문이나 검색하고 싶은 내용을 입력해주세요.", [], conversation_id or str(uuid.uuid4()), empty_context_info
-            
-            # 대화 ID 생성
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
-            
-            # 대화 메모리 초기화
-            if conversation_id not in self.conversation_memories:
-                self.conversation_memories[conversation_id] = ConversationBufferMemory(
-                    memory_key="chat_history",
-                    return_messages=True
-                )
-            
-            memory = self.conversation_memories[conversation_id]
-            
-            # 대화별 콜렉션 확인/생성
-            conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
-            
-            # 웹 검색 필요성 판단
-            should_search = use_web_search and self._should_use_web_search(message)
-            
-            # 1단계: 웹 검색 수행 (필요한 경우에만)
-            sources = []
-            if should_search:
-                print(f"구조화된 답변을 위한 웹 검색 수행 중: {message}")
-                search_results = await self.web_search.search(message, max_results=8)  # 더 많은 정보 수집
-                
-                # 2단계: 검색 결과를 대화별 콜렉션에 저장
-                for result in search_results:
-                    if result.get('url'):
-                        try:
-                            # URL에서 콘텐츠 추출
-                            content = await self.web_search.fetch_url_content(result['url'])
-                            if content.get('content'):
-                                # 텍스트 분할
-                                documents = self.text_splitter.split_text(content['content'])
-                                
-                                # 벡터 스토어에 추가 (대화별 콜렉션)
-                                doc_objects = []
-                                for i, doc_text in enumerate(documents):
-                                    doc_objects.append(Document(
-                                        page_content=doc_text,
-                                        metadata={
-                                            'url': result['url'],
-                                            'title': content.get('title', ''),
-                                            'chunk_index': i,
-                                            'total_chunks': len(documents),
-                                            'source_url': result['url'],
-                                            'search_query': message,
-                                            'conversation_id': conversation_id,
-                                            'timestamp': asyncio.get_event_loop().time()
-                                        }
-                                    ))
-                                
-                                # 대화별 콜렉션에 저장
-                                conversation_vector_store.add_documents(doc_objects)
-                                sources.append(result['url'])
-                                print(f"구조화된 답변용 URL 인덱싱 완료: {result['url']}")
-                        except Exception as e:
-                            print(f"구조화된 답변용 URL 인덱싱 실패 {result['url']}: {e}")
-                            continue
-            else:
-                print(f"구조화된 답변을 위한 웹 검색 건너뛰기: {message} (로컬 메모리만 사용)")
-            
-            # 3단계: 단기기억 → 장기기억 → 웹검색 순으로 컨텍스트 수집
-            print(f"구조화된 답변을 위한 컨텍스트 수집 중: {message}")
-            
-            # 3-1: 단기기억 (현재 대화)에서 검색
-            short_term_context = []
-            try:
-                print(f"단기기억 검색 시작: {self._get_conversation_collection_name(conversation_id)}")
-                short_term_results = conversation_vector_store.similarity_search(message, k=5)  # 더 많은 문서 검색
-                short_term_context = [result for result in short_term_results if hasattr(result, 'page_content') and result.page_content]
-                print(f"단기기억에서 {len(short_term_context)}개 문서 검색 완료")
-            except Exception as e:
-                print(f"단기기억 검색 실패: {e}")
-                print(f"단기기억 벡터 스토어 상태: {type(conversation_vector_store)}")
-                short_term_context = []
-            
-            # 3-2: 장기기억 (대화별 히스토리)에서 검색
-            long_term_context = []
-            try:
-                print(f"장기기억 검색 시작: {self._get_long_term_memory_collection_name(conversation_id)}")
-                long_term_vector_store = await self._ensure_long_term_memory_collection(conversation_id)
-                long_term_results = long_term_vector_store.similarity_search(message, k=5)  # 더 많은 문서 검색
-                long_term_context = [result for result in long_term_results if hasattr(result, 'page_content') and result.page_content]
-                print(f"장기기억에서 {len(long_term_context)}개 문서 검색 완료")
-            except Exception as e:
-                print(f"장기기억 검색 실패: {e}")
-                print(f"장기기억 벡터 스토어 상태: {type(long_term_vector_store) if 'long_term_vector_store' in locals() else 'Not created'}")
-                long_term_context = []
-            
-            # 4단계: 통합 컨텍스트 생성
-            all_context_docs = []
-            
-            # 단기기억 우선 (가장 관련성 높음)
-            for result in short_term_context:
-                all_context_docs.append(result)
-                if hasattr(result, 'metadata') and result.metadata.get('url') and result.metadata.get('url') not in sources:
-                    sources.append(result.metadata.get('url'))
-            
-            # 장기기억 추가 (중간 관련성)
-            for result in long_term_context:
-                all_context_docs.append(result)
-                if hasattr(result, 'metadata') and result.metadata.get('url') and result.metadata.get('url') not in sources:
-                    sources.append(result.metadata.get('url'))
-            
-            # 컨텍스트 생성
-            context = self._create_context(all_context_docs)
-            print(f"구조화된 답변용 통합 컨텍스트: 단기기억 {len(short_term_context)}개, 장기기억 {len(long_term_context)}개, 웹검색 {len(sources)}개")
-            
-            # 검색 결과가 없을 때 기본 정보 제공
-            if not all_context_docs and not sources:
-                print("구조화된 답변을 위한 검색 결과가 없어 기본 AI 정보를 제공합니다.")
-                context = self._get_default_ai_context(message)
-            
-            # 5단계: 구조화된 프롬프트 생성 및 LLM 응답
-            structured_prompt = self._create_structured_prompt(
-                message, 
-                context, 
-                chat_history=memory.chat_memory.messages
-            )
-            
-            print("구조화된 분석 답변 생성 중...")
-            if hasattr(self.llm, 'invoke'):
-                # 최신 LangChain API
-                response = self.llm.invoke(structured_prompt)
-                if hasattr(response, 'content'):
-                    response = response.content
-                else:
-                    response = str(response)
-            else:
-                # 구버전 호환성
-                response = self.llm(structured_prompt)
-            
-            # 대화 메모리에 저장
-            memory.chat_memory.add_user_message(message)
-            memory.chat_memory.add_ai_message(response)
-            
-            # 6단계: 현재 대화를 장기기억에 저장
-            await self._save_to_long_term_memory(conversation_id, message, response, sources)
-            
-            # 컨텍스트 정보 생성
-            context_info = {
-                'shortTermMemory': len(short_term_context),
-                'longTermMemory': len(long_term_context),
-                'webSearch': len(sources)
-            }
-            
-            return response, sources, conversation_id, context_info
+            turn = await self._prepare_structured_response(message, conversation_id, use_web_search)
+            response = await self._generate_turn_response(message, turn)
+            return response, turn['sources'], turn['conversation_id'], turn['context_info']
             
         except Exception as e:
             print(f"구조화된 답변 생성 오류: {e}")
@@ -666,96 +610,69 @@ class RAGService:
             }
             return f"죄송합니다. 구조화된 답변 생성 중 오류가 발생했습니다: {str(e)}", [], conversation_id or str(uuid.uuid4()), error_context_info
     
+    async def _prepare_structured_response(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Dict[str, Any]:
+        """구조화된 답변의 검색/컨텍스트 수집 단계 - LLM 호출 직전까지 수행"""
+        # 빈 메시지 체크
+        if not message or not message.strip():
+            return self._create_ready_turn("검색어가 없습니다. 구체적인 질문이나 검색하고 싶은 내용을 입력해주세요.", conversation_id)
+        
+        # 대화 ID 생성
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+        
+        # 대화 메모리 조회 (퇴출된 대화는 저장소에서 복원)
+        memory = self.conversation_state.get_memory(conversation_id)
+        
+        # 비슷한 질문에 대한 답변이 캐시에 있으면 검색/LLM 호출 없이 응답
+        cached_turn, cache_key = await self._lookup_cached_response('structured', message, conversation_id, memory, use_web_search)
+        if cached_turn:
+            return cached_turn
+        
+        # 1~4단계: 웹 검색/저장 → 단기기억 → 장기기억 순으로 컨텍스트 수집 (더 많은 검색 결과/문서 사용)
+        should_search = use_web_search and self._should_use_web_search(message)
+        retrieval = await self.retrieval_engine.run('structured', message, conversation_id, use_web_search=should_search)
+        sources = retrieval['sources']
+        context_chunks = retrieval['context']
+        print(f"구조화된 답변용 통합 컨텍스트: 단기기억 {len(retrieval['short_term'])}개, 장기기억 {len(retrieval['long_term'])}개, 웹검색 {len(sources)}개")
+        
+        # 검색 결과가 없을 때 기본 정보 제공
+        if not retrieval['documents'] and not sources:
+            print("구조화된 답변을 위한 검색 결과가 없어 기본 AI 정보를 제공합니다.")
+            context_chunks = self._create_default_context_chunks(message)
+        
+        # 5단계: 구조화된 프롬프트 생성 (토큰 예산에 맞춰 컨텍스트/히스토리 조립)
+        assembled = self._create_structured_prompt(
+            message, 
+            context_chunks, 
+            chat_history=memory.chat_memory.messages
+        )
+        
+        # 컨텍스트 정보 생성
+        context_info = {
+            'shortTermMemory': len(retrieval['short_term']),
+            'longTermMemory': len(retrieval['long_term']),
+            'webSearch': len(sources),
+            'promptTokens': assembled['prompt_tokens'],
+            **retrieval['timings']
+        }
+        
+        # 6단계(LLM 응답 생성 및 장기기억/답변 캐시 저장)는 호출 측에서 수행
+        turn = self._create_turn(conversation_id, memory, sources, context_info, assembled['prompt'], operation="structured_answer")
+        turn['response_cache_key'] = self._scope_cache_key(cache_key, conversation_id, memory, retrieval)
+        return turn
+    
     async def generate_topic_based_response(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Tuple[str, List[str], str, Dict[str, int]]:
         """질문 분석 → 초기 웹 검색 → 주제 추출 → 벡터 DB 검색 → 구조화된 답변 생성"""
         try:
-            # 빈 메시지 체크
-            if not message or not message.strip():
-                empty_context_info = {
-                    'shortTermMemory': 0,
-                    'longTermMemory': 0,
-                    'webSearch': 0
-                }
-                return "검색어가 없습니다. 구체적인 질문이나 검색하고 싶은 내용을 입력해주세요.", [], conversation_id or str(uuid.uuid4()), empty_context_info
-            
-            # 대화 ID 생성
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
-            
-            # 대화 메모리 초기화
-            if conversation_id not in self.conversation_memories:
-                self.conversation_memories[conversation_id] = ConversationBufferMemory(
-                    memory_key="chat_history",
-                    return_messages=True
-                )
-            
-            memory = self.conversation_memories[conversation_id]
-            
-            print(f"=== 주제 기반 답변 생성 시작 ===: {message}")
-            
-            # 1단계: 질문에 대한 초기 웹 검색 수행 (10개 정도)
-            initial_search_results = []
-            if use_web_search:
-                print(f"1단계: 질문에 대한 초기 웹 검색 수행: {message}")
-                initial_search_results = await self.web_search.search(message, max_results=10)
-                print(f"초기 검색 결과: {len(initial_search_results)}개")
-                
-                # 초기 검색 결과를 벡터 데이터베이스에 저장
-                await self._store_initial_search_results(initial_search_results, message, conversation_id)
-            
-            # 2단계: 검색 결과에서 특정 대상 식별 및 주제 추출
-            topics = await self._extract_topics_from_question_with_context(message, initial_search_results)
-            print(f"추출된 주제들: {topics}")
-            
-            # 3단계: 주제별 벡터 데이터베이스 검색 및 정보 수집
-            topic_research_results = {}
-            all_sources = []
-            
-            if topics:
-                for i, topic in enumerate(topics):
-                    print(f"주제 {i+1} 벡터 검색 중: {topic}")
-                    
-                    # 주제별 벡터 데이터베이스 검색 수행
-                    topic_content = await self._search_topic_in_vector_db(topic, message, conversation_id)
-                    
-                    if topic_content:
-                        # 관련성 점수로 정렬
-                        topic_content.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
-                        
-                        # 상위 2개 결과만 사용
-                        top_content = topic_content[:2]
-                        topic_sources = [item['url'] for item in top_content if item.get('url')]
-                        
-                        topic_research_results[topic] = {
-                            'content': top_content,
-                            'sources': topic_sources
-                        }
-                        
-                        # 전체 소스 목록에도 추가
-                        all_sources.extend(topic_sources)
-                        
-                        print(f"주제 '{topic}' 벡터 검색 완료: {len(topic_content)}개 결과, {len(topic_sources)}개 소스")
-                    else:
-                        print(f"주제 '{topic}'에 대한 벡터 검색 결과 없음")
+            turn = await self._prepare_topic_based_response(message, conversation_id, use_web_search)
+            if turn['prompt'] is None:
+                return turn['response'], turn['sources'], turn['conversation_id'], turn['context_info']
             
             # 4단계: 구조화된 답변 생성
-            structured_response = await self._generate_topic_based_answer(message, topics, topic_research_results)
-            
-            # 대화 메모리에 저장
-            memory.chat_memory.add_user_message(message)
-            memory.chat_memory.add_ai_message(structured_response)
+            structured_response = await self._generate_topic_based_answer(turn['prompt'])
+            await self._complete_turn(message, turn, structured_response)
             
-            # 현재 대화를 장기기억에 저장
-            await self._save_to_long_term_memory(conversation_id, message, structured_response, all_sources)
-            
-            # 컨텍스트 정보 생성
-            context_info = {
-                'shortTermMemory': 0,  # 주제 기반 답변은 새로운 검색 결과에 의존
-                'longTermMemory': 0,
-                'webSearch': len(all_sources)
-            }
-            
-            return structured_response, all_sources, conversation_id, context_info
+            return structured_response, turn['sources'], turn['conversation_id'], turn['context_info']
             
         except Exception as e:
             print(f"주제 기반 답변 생성 오류: {e}")
@@ -765,90 +682,147 @@ class RAGService:
                 'webSearch': 0
             }
             return f"죄송합니다. 주제 기반 답변 생성 중 오류가 발생했습니다: {str(e)}", [], conversation_id or str(uuid.uuid4()), error_context_info
-
-    async def _store_initial_search_results(self, search_results: List[Dict[str, Any]], query: str, conversation_id: str):
-        """초기 검색 결과를 벡터 데이터베이스에 저장"""
-        try:
-            print(f"초기 검색 결과를 벡터 데이터베이스에 저장 중: {len(search_results)}개 결과")
-            
-            # 대화별 콜렉션 확인/생성
-            conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
-            
-            # 검색 결과에서 콘텐츠 추출 및 저장
-            for result in search_results:
-                if result.get('url'):
-                    try:
-                        # URL에서 콘텐츠 추출
-                        content = await self.web_search.fetch_url_content(result['url'])
-                        if content.get('content'):
-                            # 텍스트 분할
-                            documents = self.text_splitter.split_text(content['content'])
-                            
-                            # 벡터 스토어에 추가 (대화별 콜렉션)
-                            doc_objects = []
-                            for i, doc_text in enumerate(documents):
-                                doc_objects.append(Document(
-                                    page_content=doc_text,
-                                    metadata={
-                                        'url': result['url'],
-                                        'title': content.get('title', ''),
-                                        'chunk_index': i,
-                                        'total_chunks': len(documents),
-                                        'source_url': result['url'],
-                                        'search_query': query,
-                                        'conversation_id': conversation_id,
-                                        'timestamp': asyncio.get_event_loop().time()
-                                    }
-                                ))
-                            
-                            # 대화별 콜렉션에 저장
-                            conversation_vector_store.add_documents(doc_objects)
-                            print(f"초기 검색 결과 저장 완료: {result['url']} -> {self._get_conversation_collection_name(conversation_id)}")
-                    except Exception as e:
-                        print(f"초기 검색 결과 저장 실패 {result['url']}: {e}")
-                        continue
-            
-            print(f"초기 검색 결과 벡터 데이터베이스 저장 완료")
-            
-        except Exception as e:
-            print(f"초기 검색 결과 저장 중 오류: {e}")
-
-    async def _search_topic_in_vector_db(self, topic: str, original_query: str, conversation_id: str) -> List[Dict[str, Any]]:
-        """주제에 대해 벡터 데이터베이스에서 검색"""
+    
+    async def _prepare_topic_based_response(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Dict[str, Any]:
+        """주제 기반 답변의 검색/주제 연구 단계 - 답변 프롬프트 생성까지 수행"""
+        # 빈 메시지 체크
+        if not message or not message.strip():
+            return self._create_ready_turn("검색어가 없습니다. 구체적인 질문이나 검색하고 싶은 내용을 입력해주세요.", conversation_id)
+        
+        # 대화 ID 생성
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+        
+        # 대화 메모리 조회 (퇴출된 대화는 저장소에서 복원)
+        memory = self.conversation_state.get_memory(conversation_id)
+        
+        print(f"=== 주제 기반 답변 생성 시작 ===: {message}")
+        timings = {}
+        
+        # 1단계: 질문에 대한 초기 웹 검색 수행 (10개 정도) 후 벡터 데이터베이스에 저장
+        # (투기적 수집 모드에서는 페이지 수집/저장을 백그라운드로 시작하고 주제 추출과 동시에 진행)
+        initial_search_results = []
+        pending_ingest = None
+        if use_web_search:
+            print(f"1단계: 질문에 대한 초기 웹 검색 수행: {message}")
+            if self.speculative_fetch:
+                pending_ingest = await self.retrieval_engine.collect_speculative('topic_based', message, conversation_id, timings)
+                collected = pending_ingest
+            else:
+                collected = await self.retrieval_engine.collect('topic_based', message, conversation_id, timings)
+            initial_search_results = collected['search_results']
+            print(f"초기 검색 결과: {len(initial_search_results)}개")
+        
+        # 2단계: 검색 결과에서 특정 대상 식별 및 주제 추출
+        topics = await self._extract_topics_from_question_with_context(message, initial_search_results)
+        print(f"추출된 주제들: {topics}")
+        
+        # 3단계: 주제별 벡터 데이터베이스 검색 및 정보 수집
+        topic_research_results = {}
+        all_sources = []
+        
+        if topics:
+            # 주제별 벡터 데이터베이스 검색 수행 (모든 주제를 한 번의 배치로 검색)
+            topic_contents = await self._search_topics_in_vector_db(topics, message, conversation_id, timings, pending_ingest)
+            
+            # 여러 주제에 걸쳐 같은 청크가 답변 프롬프트에 중복으로 들어가지 않도록 제외
+            used_chunks = set()
+            for topic in topics:
+                topic_content = [
+                    item for item in topic_contents.get(topic, [])
+                    if (item.get('url'), item['content']) not in used_chunks
+                ]
+                
+                if topic_content:
+                    # 관련성 점수로 정렬
+                    topic_content.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+                    
+                    # 상위 2개 결과만 사용
+                    top_content = topic_content[:2]
+                    topic_sources = [item['url'] for item in top_content if item.get('url')]
+                    used_chunks.update((item.get('url'), item['content']) for item in top_content)
+                    
+                    topic_research_results[topic] = {
+                        'content': top_content,
+                        'sources': topic_sources
+                    }
+                    
+                    # 전체 소스 목록에도 추가 (중복 URL 제외)
+                    for url in topic_sources:
+                        if url not in all_sources:
+                            all_sources.append(url)
+                    
+                    print(f"주제 '{topic}' 벡터 검색 완료: {len(topic_content)}개 결과, {len(topic_sources)}개 소스")
+                else:
+                    print(f"주제 '{topic}'에 대한 벡터 검색 결과 없음")
+        
+        # 컨텍스트 정보 생성
+        context_info = {
+            'shortTermMemory': 0,  # 주제 기반 답변은 새로운 검색 결과에 의존
+            'longTermMemory': 0,
+            'webSearch': len(all_sources),
+            **timings
+        }
+        
+        # 4단계 답변 프롬프트 (LLM 호출은 호출 측에서 수행)
+        assembled = self._create_topic_based_answer_prompt(message, topics, topic_research_results)
+        context_info['promptTokens'] = assembled['prompt_tokens']
+        return self._create_turn(conversation_id, memory, all_sources, context_info, assembled['prompt'], operation="topic_based_answer")
+
+    async def _search_topics_in_vector_db(
+        self,
+        topics: List[str],
+        original_query: str,
+        conversation_id: str,
+        timings: Dict[str, int] = None,
+        pending_ingest: Dict[str, Any] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """여러 주제를 한 번에 벡터 데이터베이스에서 검색 (쿼리 배치 임베딩 + Qdrant 배치 검색)
+
+        pending_ingest: 백그라운드로 진행 중인 초기 검색 결과 수집 - 검색 전에 최대 대기 시간만큼만 기다림
+        """
         try:
-            print(f"주제 '{topic}'에 대해 벡터 데이터베이스 검색 수행")
+            if pending_ingest is not None:
+                await self.retrieval_engine.wait_for_ingest(
+                    'topic_based',
+                    pending_ingest,
+                    self.speculative_fetch_wait,
+                    self.speculative_fetch_first_page_wait,
+                    timings
+                )
             
-            # 대화별 콜렉션에서 검색
-            conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
+            print(f"주제 {len(topics)}개에 대해 벡터 데이터베이스 배치 검색 수행")
             
-            # 주제와 원본 쿼리를 결합하여 검색
-            search_query = f"{topic} {original_query}"
-            search_results = conversation_vector_store.similarity_search(search_query, k=5)
+            # 주제와 원본 쿼리를 결합하여 대화별 콜렉션에서 검색 (주제 수와 관계없이 임베딩 1회, 검색 요청 1회)
+            search_queries = [f"{topic} {original_query}" for topic in topics]
+            batch_results = await self.retrieval_engine.retrieve_batch('topic_based', search_queries, conversation_id, timings)
             
-            topic_content = []
-            for result in search_results:
-                if hasattr(result, 'page_content') and result.page_content:
-                    # 관련성 점수 계산
-                    relevance_score = self._calculate_relevance_score(result.page_content, topic)
-                    
-                    # 메타데이터에서 정보 추출
-                    metadata = getattr(result, 'metadata', {})
-                    url = metadata.get('url', '')
-                    title = metadata.get('title', '')
-                    
-                    topic_content.append({
-                        'content': result.page_content,
-                        'url': url,
-                        'title': title,
-                        'relevance_score': relevance_score
-                    })
+            topic_contents = {}
+            for topic, search_results in zip(topics, batch_results):
+                topic_content = []
+                for result in search_results:
+                    if hasattr(result, 'page_content') and result.page_content:
+                        # 관련성 점수 계산
+                        relevance_score = self._calculate_relevance_score(result.page_content, topic)
+                        
+                        # 메타데이터에서 정보 추출
+                        metadata = getattr(result, 'metadata', {})
+                        url = metadata.get('url', '')
+                        title = metadata.get('title', '')
+                        
+                        topic_content.append({
+                            'content': result.page_content,
+                            'url': url,
+                            'title': title,
+                            'relevance_score': relevance_score
+                        })
+                topic_contents[topic] = topic_content
             
-            print(f"주제 '{topic}' 벡터 검색 완료: {len(topic_content)}개 결과")
-            return topic_content
+            return topic_contents
             
         except Exception as e:
-            print(f"주제 '{topic}' 벡터 검색 중 오류: {e}")
-            return []
+            print(f"주제 배치 벡터 검색 중 오류: {e}")
+            return {}
     
     async def _extract_topics_from_question(self, question: str) -> List[str]:
         """질문에서 핵심 주제들을 추출"""
@@ -889,14 +863,7 @@ class RAGService:
 답변:"""
 
             # LLM을 사용하여 주제 추출
-            if hasattr(self.llm, 'invoke'):
-                response = self.llm.invoke(topic_extraction_prompt)
-                if hasattr(response, 'content'):
-                    response_text = response.content
-                else:
-                    response_text = str(response)
-            else:
-                response_text = self.llm(topic_extraction_prompt)
+            response_text = await self.llm_gateway.ainvoke(topic_extraction_prompt, operation="topic_extraction")
             
             # 응답에서 주제들 추출
             topics = self._parse_topics_from_response(response_text)
@@ -975,14 +942,7 @@ class RAGService:
 답변:"""
 
             # LLM을 사용하여 주제 추출
-            if hasattr(self.llm, 'invoke'):
-                response = self.llm.invoke(topic_extraction_prompt)
-                if hasattr(response, 'content'):
-                    response_text = response.content
-                else:
-                    response_text = str(response)
-            else:
-                response_text = self.llm(topic_extraction_prompt)
+            response_text = await self.llm_gateway.ainvoke(topic_extraction_prompt, operation="topic_extraction")
             
             # 응답에서 주제들 추출
             topics = self._parse_topics_from_response(response_text)
@@ -1202,11 +1162,37 @@ class RAGService:
         
         return score
     
-    async def _generate_topic_based_answer(self, question: str, topics: List[str], research_results: Dict) -> str:
+    async def _generate_topic_based_answer(self, answer_prompt: str) -> str:
         """주제별 연구 결과를 바탕으로 구조화된 답변 생성"""
         try:
-            # 답변 생성을 위한 프롬프트 생성
-            answer_prompt = f"""
+            # LLM을 사용하여 답변 생성
+            return await self.llm_gateway.ainvoke(answer_prompt, operation="topic_based_answer")
+                
+        except Exception as e:
+            print(f"주제별 답변 생성 실패: {e}")
+            return f"죄송합니다. 주제별 답변 생성 중 오류가 발생했습니다: {str(e)}"
+    
+    def _create_topic_based_answer_prompt(self, question: str, topics: List[str], research_results: Dict) -> Dict[str, Any]:
+        """주제별 연구 결과로 구조화된 답변 프롬프트 생성 (토큰 예산 적용)"""
+        # 주제마다 가장 관련성 높은 결과부터 채워지도록 주제 내 순위를 우선순위로 사용
+        chunks = []
+        for topic, data in research_results.items():
+            for i, content_item in enumerate(data['content']):
+                chunks.append({
+                    'text': f"URL {i+1}: {content_item['url']}\n내용 {i+1}: {content_item['content']}\n",
+                    'priority': i,
+                    'score': content_item.get('relevance_score', 0),
+                    'topic': topic
+                })
+        
+        def render(history_lines: List[str], packed: List[Dict[str, Any]]) -> str:
+            return self._render_topic_based_answer_prompt(question, topics, self._format_research_results(research_results, packed))
+        
+        return self.context_assembler.assemble(render, chunks, operation="topic_based_answer")
+    
+    def _render_topic_based_answer_prompt(self, question: str, topics: List[str], formatted_results: str) -> str:
+        """주제 기반 답변 프롬프트 템플릿"""
+        answer_prompt = f"""
 당신은 사용자의 질문에 대해 주제별로 체계적인 답변을 제공하는 전문가입니다.
 
 사용자 질문: {question}
@@ -1215,7 +1201,7 @@ class RAGService:
 {chr(10).join([f"- {topic}" for topic in topics])}
 
 주제별 연구 결과:
-{self._format_research_results(research_results)}
+{formatted_results}
 
 다음 형식으로 구조화된 답변을 생성해주세요:
 
@@ -1252,32 +1238,19 @@ class RAGService:
 - 한국어로 답변
 
 답변:"""
-
-            # LLM을 사용하여 답변 생성
-            if hasattr(self.llm, 'invoke'):
-                response = self.llm.invoke(answer_prompt)
-                if hasattr(response, 'content'):
-                    return response.content
-                else:
-                    return str(response)
-            else:
-                return self.llm(answer_prompt)
-                
-        except Exception as e:
-            print(f"주제별 답변 생성 실패: {e}")
-            return f"죄송합니다. 주제별 답변 생성 중 오류가 발생했습니다: {str(e)}"
+        return answer_prompt
     
-    def _format_research_results(self, research_results: Dict) -> str:
-        """연구 결과를 프롬프트용으로 포맷팅"""
+    def _format_research_results(self, research_results: Dict, packed_chunks: List[Dict[str, Any]]) -> str:
+        """연구 결과를 프롬프트용으로 포맷팅 (토큰 예산 안에 선택된 청크만 포함)"""
         formatted = ""
         
         for topic, data in research_results.items():
             formatted += f"\n### {topic}\n"
             
-            if data['content']:
-                for i, content_item in enumerate(data['content']):
-                    formatted += f"내용 {i+1}: {content_item['content'][:1000]}...\n"
-                    formatted += f"URL {i+1}: {content_item['url']}\n"
+            topic_chunks = [chunk for chunk in packed_chunks if chunk['topic'] == topic]
+            if topic_chunks:
+                for chunk in topic_chunks:
+                    formatted += chunk['text']
             else:
                 formatted += "관련 정보를 찾을 수 없습니다.\n"
             
@@ -1316,52 +1289,19 @@ class RAGService:
                 ))
             
             if doc_objects:
-                long_term_vector_store.add_documents(doc_objects)
+                # 응답 이후 저장이고 바로 다시 검색하지 않으므로 인덱싱 완료를 기다리지 않음
+                await long_term_vector_store.add_documents(doc_objects, wait=False)
                 print(f"장기기억에 저장 완료: 대화 {conversation_id} -> {len(doc_objects)}개 청크")
             
         except Exception as e:
             print(f"장기기억 저장 실패: {e}")
     
     async def index_urls(self, urls: List[str], conversation_id: str = None) -> int:
-        """URL들을 대화별 콜렉션에 인덱싱"""
+        """URL들을 대화별 콜렉션에 인덱싱 (인덱싱 작업으로 처리하고 완료까지 대기) - 인덱싱된 URL 수 반환"""
         try:
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
-            
-            # 대화별 콜렉션 확인/생성
-            conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
-            
-            indexed_count = 0
-            
-            for url in urls:
-                # URL에서 콘텐츠 추출
-                content = await self.web_search.fetch_url_content(url)
-                
-                if content.get('content'):
-                    # 텍스트 분할
-                    documents = self.text_splitter.split_text(content['content'])
-                    
-                    # 벡터 스토어에 추가
-                    doc_objects = []
-                    for i, doc_text in enumerate(documents):
-                        doc_objects.append(Document(
-                            page_content=doc_text,
-                            metadata={
-                                'url': url,
-                                'title': content.get('title', ''),
-                                'chunk_index': i,
-                                'total_chunks': len(documents),
-                                'source_url': url,
-                                'conversation_id': conversation_id,
-                                'timestamp': asyncio.get_event_loop().time()
-                            }
-                        ))
-                    
-                    # 대화별 콜렉션에 저장
-                    conversation_vector_store.add_documents(doc_objects)
-                    indexed_count += 1
-            
-            return indexed_count
+            job = await self.ingestion_jobs.submit(urls, conversation_id)
+            job = await self.ingestion_jobs.wait(job['job_id'])
+            return job['indexed'] if job else 0
             
         except Exception as e:
             print(f"Error indexing URLs: {e}")
@@ -1383,22 +1323,30 @@ class RAGService:
             return []
     
     async def delete_conversation_collection(self, conversation_id: str) -> bool:
-        """대화별 콜렉션 삭제"""
+        """대화별 콜렉션 삭제 (멀티테넌트 모드에서는 해당 대화의 포인트만 삭제)"""
         try:
             collection_name = self._get_conversation_collection_name(conversation_id)
             
-            # 콜렉션 삭제
-            await self.vector_store.client.delete_collection(collection_name)
+            if self.is_multi_tenant:
+                conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
+                await conversation_vector_store.delete_all()
+                store_key = f"{collection_name}:{conversation_id}"
+            else:
+                # 콜렉션 삭제
+                await self.vector_store.client.delete_collection(collection_name)
+                self.vector_store.collection_registry.discard(collection_name)
+                store_key = collection_name
             
             # 캐시에서 제거
-            if collection_name in self.conversation_vector_stores:
-                del self.conversation_vector_stores[collection_name]
+            self.conversation_state.drop_store(store_key)
+            
+            # 대화 메모리 제거 (저장된 히스토리 포함)
+            self.conversation_state.drop_memory(conversation_id)
             
-            # 대화 메모리 제거
-            if conversation_id in self.conversation_memories:
-                del self.conversation_memories[conversation_id]
+            # 대화 범위 답변 캐시 제거
+            self.response_cache.invalidate(scope=conversation_id, reason='conversation')
             
-            print(f"대화 콜렉션 삭제 완료: {collection_name}")
+            print(f"대화 콜렉션 삭제 완료: {store_key}")
             return True
             
         except Exception as e:
@@ -1407,8 +1355,8 @@ class RAGService:
     
     def get_conversation_history(self, conversation_id: str) -> List[Dict[str, str]]:
         """대화 히스토리 조회"""
-        if conversation_id in self.conversation_memories:
-            memory = self.conversation_memories[conversation_id]
+        memory = self.conversation_state.peek_memory(conversation_id)
+        if memory is not None:
             messages = memory.chat_memory.messages
             
             history = []
@@ -1424,126 +1372,20 @@ class RAGService:
         return []
     
     def clear_conversation(self, conversation_id: str):
-        """대화 히스토리 삭제 (메모리만)"""
-        if conversation_id in self.conversation_memories:
-            del self.conversation_memories[conversation_id]
+        """대화 히스토리 삭제 (메모리와 대화 범위 답변 캐시)"""
+        self.conversation_state.drop_memory(conversation_id)
+        self.response_cache.invalidate(scope=conversation_id, reason='conversation')
+    
+    def invalidate_response_cache(self, conversation_id: str = None, mode: str = None, source: str = None) -> int:
+        """답변 캐시 무효화 (대화/모드/참조 URL 조건, 조건이 없으면 전체) - 제거한 개수 반환"""
+        return self.response_cache.invalidate(scope=conversation_id, mode=mode, source=source)
     
     async def chat_with_memory(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Tuple[str, List[str], str, Dict[str, int]]:
         """메모리 기반 자연스러운 대화형 챗봇 - 단기기억과 장기기억을 활용한 맥락 의존적 대화"""
         try:
-            # 빈 메시지 체크
-            if not message or not message.strip():
-                empty_context_info = {
-                    'shortTermMemory': 0,
-                    'longTermMemory': 0,
-                    'webSearch': 0
-                }
-                return "안녕하세요! 무엇을 도와드릴까요? 구체적인 질문이나 이야기하고 싶은 내용을 말씀해주세요.", [], conversation_id or str(uuid.uuid4()), empty_context_info
-            
-            # 대화 ID 생성
-            if not conversation_id:
-                conversation_id = str(uuid.uuid4())
-            
-            # 대화 메모리 초기화
-            if conversation_id not in self.conversation_memories:
-                self.conversation_memories[conversation_id] = ConversationBufferMemory(
-                    memory_key="chat_history",
-                    return_messages=True
-                )
-            
-            memory = self.conversation_memories[conversation_id]
-            
-            # 1단계: 대화 맥락 분석
-            conversation_context = await self._analyze_conversation_context(message, conversation_id)
-            
-            # 2단계: 감정 및 의도 분석
-            emotional_context = await self._analyze_emotional_context(message, conversation_context)
-            
-            # 3단계: 메모리 기반 컨텍스트 수집
-            memory_context = await self._gather_memory_context(message, conversation_id)
-            
-            # 4단계: 웹 검색 필요성 판단 (맥락 기반)
-            should_search = use_web_search and self._should_use_web_search_with_context(message, conversation_context)
-            
-            # 5단계: 웹 검색 수행 (필요한 경우)
-            sources = []
-            if should_search:
-                print(f"맥락 기반 웹 검색 수행: {message}")
-                search_results = await self.web_search.search(message, max_results=5)
-                
-                # 검색 결과를 대화별 콜렉션에 저장
-                conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
-                for result in search_results:
-                    if result.get('url'):
-                        try:
-                            content = await self.web_search.fetch_url_content(result['url'])
-                            if content.get('content'):
-                                documents = self.text_splitter.split_text(content['content'])
-                                
-                                doc_objects = []
-                                for i, doc_text in enumerate(documents):
-                                    doc_objects.append(Document(
-                                        page_content=doc_text,
-                                        metadata={
-                                            'url': result['url'],
-                                            'title': content.get('title', ''),
-                                            'chunk_index': i,
-                                            'total_chunks': len(documents),
-                                            'source_url': result['url'],
-                                            'search_query': message,
-                                            'conversation_id': conversation_id,
-                                            'timestamp': asyncio.get_event_loop().time(),
-                                            'context_type': 'web_search'
-                                        }
-                                    ))
-                                
-                                conversation_vector_store.add_documents(doc_objects)
-                                sources.append(result['url'])
-                        except Exception as e:
-                            print(f"웹 검색 결과 저장 실패 {result['url']}: {e}")
-                            continue
-            
-            # 6단계: 통합 컨텍스트 생성
-            integrated_context = self._create_integrated_context(
-                memory_context, 
-                conversation_context, 
-                emotional_context, 
-                sources
-            )
-            
-            # 7단계: 자연스러운 대화형 프롬프트 생성
-            conversational_prompt = self._create_conversational_prompt(
-                message, 
-                integrated_context, 
-                memory.chat_memory.messages,
-                conversation_context,
-                emotional_context
-            )
-            
-            # 8단계: LLM 응답 생성
-            print("자연스러운 대화형 응답 생성 중...")
-            if hasattr(self.llm, 'invoke'):
-                response = self.llm.invoke(conversational_prompt)
-                if hasattr(response, 'content'):
-                    response = response.content
-            else:
-                response = self.llm(conversational_prompt)
-            
-            # 9단계: 대화 메모리에 저장
-            memory.chat_memory.add_user_message(message)
-            memory.chat_memory.add_ai_message(response)
-            
-            # 10단계: 현재 대화를 장기기억에 저장
-            await self._save_to_long_term_memory(conversation_id, message, response, sources)
-            
-            # 컨텍스트 정보 생성
-            context_info = {
-                'shortTermMemory': memory_context.get('short_term_count', 0),
-                'longTermMemory': memory_context.get('long_term_count', 0),
-                'webSearch': len(sources)
-            }
-            
-            return response, sources, conversation_id, context_info
+            turn = await self._prepare_chat_with_memory(message, conversation_id, use_web_search)
+            response = await self._generate_turn_response(message, turn)
+            return response, turn['sources'], turn['conversation_id'], turn['context_info']
             
         except Exception as e:
             print(f"대화형 챗봇 처리 오류: {e}")
@@ -1553,6 +1395,188 @@ class RAGService:
                 'webSearch': 0
             }
             return f"죄송합니다. 대화 중 오류가 발생했습니다. 다시 시도해주세요.", [], conversation_id or str(uuid.uuid4()), error_context_info
+    
+    async def _prepare_chat_with_memory(self, message: str, conversation_id: str = None, use_web_search: bool = True) -> Dict[str, Any]:
+        """대화형 챗봇의 맥락 분석/컨텍스트 수집 단계 - LLM 호출 직전까지 수행"""
+        # 빈 메시지 체크
+        if not message or not message.strip():
+            return self._create_ready_turn("안녕하세요! 무엇을 도와드릴까요? 구체적인 질문이나 이야기하고 싶은 내용을 말씀해주세요.", conversation_id)
+        
+        # 대화 ID 생성
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+        
+        # 대화 메모리 조회 (퇴출된 대화는 저장소에서 복원)
+        memory = self.conversation_state.get_memory(conversation_id)
+        
+        # 단계 간 의존 관계에 따라 병렬 실행 (단계별 소요 시간은 context_info에 ms 단위로 기록)
+        # - 맥락 분석 → 감정 분석, 맥락 분석 → (필요 시) 웹 검색 여부 판단
+        # - 메모리 검색과 웹 검색/수집은 LLM 분석 호출과 겹쳐서 실행
+        pipeline_start = time.perf_counter()
+        timings = {}
+        context_ready = asyncio.get_running_loop().create_future()
+        
+        # 1~2단계: 대화 맥락 분석 → 감정 및 의도 분석 (통합 모드에서는 한 번의 호출로 분석)
+        analysis_task = asyncio.create_task(self._timed(timings, 'analysisMs', self._analyze_message(message, conversation_id, timings, context_ready)))
+        
+        # 3단계: 메모리 기반 컨텍스트 수집 (분석과 독립)
+        memory_task = asyncio.create_task(self._timed(timings, 'memoryRetrievalMs', self._gather_memory_context(message, conversation_id, timings)))
+        
+        # 4~5단계: 웹 검색 필요성 판단 후 검색/수집 (키워드 판단만으로 검색이 확정되면 분석을 기다리지 않음)
+        web_task = None
+        if use_web_search:
+            web_task = asyncio.create_task(self._timed(timings, 'webSearchMs', self._search_with_context(message, conversation_id, context_ready, timings)))
+        
+        try:
+            (conversation_context, emotional_context), memory_context = await asyncio.gather(analysis_task, memory_task)
+            sources = await web_task if web_task else []
+        except BaseException:
+            for task in (analysis_task, memory_task, web_task):
+                if task and not task.done():
+                    task.cancel()
+            raise
+        
+        timings['pipelineMs'] = int((time.perf_counter() - pipeline_start) * 1000)
+        
+        # 6단계: 통합 컨텍스트 생성
+        integrated_context = self._create_integrated_context(
+            memory_context, 
+            conversation_context, 
+            emotional_context, 
+            sources
+        )
+        
+        # 7단계: 자연스러운 대화형 프롬프트 생성 (기억 내용/대화 히스토리는 토큰 예산에 맞춰 조립)
+        assembled = self._create_conversational_prompt(
+            message, 
+            integrated_context, 
+            memory.chat_memory.messages,
+            conversation_context,
+            emotional_context,
+            memory_chunks=self._create_context_chunks(memory_context['short_term_context'] + memory_context['long_term_context'])
+        )
+        
+        # 컨텍스트 정보 생성
+        context_info = {
+            'shortTermMemory': memory_context.get('short_term_count', 0),
+            'longTermMemory': memory_context.get('long_term_count', 0),
+            'webSearch': len(sources),
+            'promptTokens': assembled['prompt_tokens'],
+            **timings
+        }
+        
+        # 8~10단계(LLM 응답 생성, 메모리/장기기억 저장)는 호출 측에서 수행
+        return self._create_turn(conversation_id, memory, sources, context_info, assembled['prompt'], operation="conversational")
+
+    async def _timed(self, timings: Dict[str, int], key: str, awaitable):
+        """awaitable 실행 시간을 timings[key]에 ms 단위로 기록"""
+        start_time = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[key] = int((time.perf_counter() - start_time) * 1000)
+    
+    async def _analyze_message(self, message: str, conversation_id: str, timings: Dict[str, int], context_ready: "asyncio.Future") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """대화 맥락 및 감정 분석 - 분리 모드는 맥락 분석 후 감정 분석, 통합 모드는 한 번의 LLM 호출
+        
+        맥락 분석 결과가 나오면 감정 분석을 기다리지 않고 context_ready에 먼저 전달
+        """
+        try:
+            if self.merge_conversation_analysis:
+                conversation_context, emotional_context = await self._analyze_conversation_and_emotion(message, conversation_id)
+                context_ready.set_result(conversation_context)
+                return conversation_context, emotional_context
+            
+            conversation_context = await self._timed(timings, 'contextAnalysisMs', self._analyze_conversation_context(message, conversation_id))
+            context_ready.set_result(conversation_context)
+            emotional_context = await self._timed(timings, 'emotionalAnalysisMs', self._analyze_emotional_context(message, conversation_context))
+            return conversation_context, emotional_context
+        finally:
+            if not context_ready.done():
+                context_ready.cancel()
+    
+    async def _search_with_context(self, message: str, conversation_id: str, context_ready: "asyncio.Future", timings: Dict[str, int] = None) -> List[str]:
+        """맥락 기반 웹 검색 및 대화별 콜렉션 저장 - 키워드로 검색이 필요하면 맥락 분석을 기다리지 않고 시작"""
+        if not self._should_use_web_search(message):
+            # 키워드로 판단되지 않으면 맥락 분석 결과(사용자 의도)로 판단
+            conversation_context = await asyncio.shield(context_ready)
+            if not self._should_use_web_search_with_context(message, conversation_context):
+                return []
+        
+        # 검색 결과를 대화별 콜렉션에 저장
+        collected = await self.retrieval_engine.collect('conversational', message, conversation_id, timings)
+        return collected['sources']
+    
+    async def _analyze_conversation_and_emotion(self, message: str, conversation_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """대화 맥락과 감정/의도를 한 번의 LLM 호출로 분석 (통합 모드)"""
+        default_conversation_context = {
+            "conversation_stage": "진행",
+            "topic_continuity": "중간",
+            "user_intent": "질문",
+            "context_clues": [],
+            "referenced_entities": [],
+            "conversation_tone": "친근함"
+        }
+        default_emotional_context = {
+            "emotion": "중립",
+            "intensity": 3,
+            "intent": "질문",
+            "urgency": "보통",
+            "personal_touch": "없음",
+            "response_style": "친근함"
+        }
+        
+        try:
+            history = self.get_conversation_history(conversation_id)
+            
+            analysis_prompt = f"""
+다음 대화를 분석하여 현재 맥락과 사용자의 감정/의도를 함께 파악해주세요.
+
+현재 메시지: {message}
+
+이전 대화 내용:
+{self._format_conversation_history(history)}
+
+다음 정보를 JSON 형식으로 분석해주세요:
+{{
+    "conversation_context": {{
+        "conversation_stage": "대화 단계 (시작/진행/마무리)",
+        "topic_continuity": "이전 주제와의 연관성 (높음/중간/낮음)",
+        "user_intent": "사용자 의도 (질문/대화/요청/감정표현)",
+        "context_clues": "맥락 단서들",
+        "referenced_entities": "언급된 대상들",
+        "conversation_tone": "대화 톤 (친근함/공식적/감정적/중립적)"
+    }},
+    "emotional_context": {{
+        "emotion": "감정 (기쁨/슬픔/분노/놀람/두려움/중립)",
+        "intensity": "감정 강도 (1-5)",
+        "intent": "의도 (질문/대화/도움요청/감정표현/정보요청)",
+        "urgency": "긴급도 (낮음/보통/높음)",
+        "personal_touch": "개인적 터치 필요성 (있음/없음)",
+        "response_style": "응답 스타일 (친근함/공식적/감정적/중립적)"
+    }}
+}}
+
+중요: 반드시 유효한 JSON 형식으로만 응답하세요.
+"""
+            
+            response_text = await self.llm_gateway.ainvoke(analysis_prompt, operation="merged_analysis")
+            
+            # JSON 파싱
+            import json
+            try:
+                analysis = json.loads(response_text)
+                conversation_context = analysis.get('conversation_context') or default_conversation_context
+                emotional_context = analysis.get('emotional_context') or default_emotional_context
+                print(f"통합 분석 완료: {conversation_context.get('conversation_stage', 'unknown')}, {emotional_context.get('emotion', '중립')}")
+                return conversation_context, emotional_context
+            except (json.JSONDecodeError, AttributeError):
+                print("통합 분석 JSON 파싱 실패, 기본값 사용")
+                return default_conversation_context, default_emotional_context
+                
+        except Exception as e:
+            print(f"통합 분석 실패: {e}")
+            return default_conversation_context, default_emotional_context
 
     async def _analyze_conversation_context(self, message: str, conversation_id: str) -> Dict[str, Any]:
         """대화 맥락 분석"""
@@ -1582,14 +1606,7 @@ class RAGService:
 중요: 반드시 유효한 JSON 형식으로만 응답하세요.
 """
             
-            if hasattr(self.llm, 'invoke'):
-                response = self.llm.invoke(context_analysis_prompt)
-                if hasattr(response, 'content'):
-                    response_text = response.content
-                else:
-                    response_text = str(response)
-            else:
-                response_text = self.llm(context_analysis_prompt)
+            response_text = await self.llm_gateway.ainvoke(context_analysis_prompt, operation="context_analysis")
             
             # JSON 파싱
             import json
@@ -1641,14 +1658,7 @@ class RAGService:
 중요: 반드시 유효한 JSON 형식으로만 응답하세요.
 """
             
-            if hasattr(self.llm, 'invoke'):
-                response = self.llm.invoke(emotional_analysis_prompt)
-                if hasattr(response, 'content'):
-                    response_text = response.content
-                else:
-                    response_text = str(response)
-            else:
-                response_text = self.llm(emotional_analysis_prompt)
+            response_text = await self.llm_gateway.ainvoke(emotional_analysis_prompt, operation="emotional_analysis")
             
             # JSON 파싱
             import json
@@ -1678,34 +1688,15 @@ class RAGService:
                 "response_style": "친근함"
             }
 
-    async def _gather_memory_context(self, message: str, conversation_id: str) -> Dict[str, Any]:
+    async def _gather_memory_context(self, message: str, conversation_id: str, timings: Dict[str, int] = None) -> Dict[str, Any]:
         """메모리 기반 컨텍스트 수집"""
-        try:
-            # 단기기억 검색
-            conversation_vector_store = await self._ensure_conversation_collection(conversation_id)
-            short_term_results = conversation_vector_store.similarity_search(message, k=3)
-            short_term_context = [result for result in short_term_results if hasattr(result, 'page_content') and result.page_content]
-            
-            # 장기기억 검색
-            long_term_vector_store = await self._ensure_long_term_memory_collection(conversation_id)
-            long_term_results = long_term_vector_store.similarity_search(message, k=3)
-            long_term_context = [result for result in long_term_results if hasattr(result, 'page_content') and result.page_content]
-            
-            return {
-                'short_term_context': short_term_context,
-                'long_term_context': long_term_context,
-                'short_term_count': len(short_term_context),
-                'long_term_count': len(long_term_context)
-            }
-            
-        except Exception as e:
-            print(f"메모리 컨텍스트 수집 실패: {e}")
-            return {
-                'short_term_context': [],
-                'long_term_context': [],
-                'short_term_count': 0,
-                'long_term_count': 0
-            }
+        memory = await self.retrieval_engine.retrieve('conversational', message, conversation_id, timings)
+        return {
+            'short_term_context': memory['short_term'],
+            'long_term_context': memory['long_term'],
+            'short_term_count': len(memory['short_term']),
+            'long_term_count': len(memory['long_term'])
+        }
 
     def _should_use_web_search_with_context(self, message: str, conversation_context: Dict[str, Any]) -> bool:
         """맥락을 고려한 웹 검색 필요성 판단"""
@@ -1750,35 +1741,29 @@ class RAGService:
         context_parts.append(f"장기기억: {memory_context.get('long_term_count', 0)}개 문서")
         context_parts.append(f"웹검색: {len(sources)}개 소스")
         
-        # 단기기억 내용
-        if memory_context.get('short_term_context'):
-            context_parts.append(f"\n=== 단기기억 내용 ===")
-            for i, doc in enumerate(memory_context['short_term_context'][:2]):
-                content = doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content
-                context_parts.append(f"{i+1}. {content}")
-        
-        # 장기기억 내용
-        if memory_context.get('long_term_context'):
-            context_parts.append(f"\n=== 장기기억 내용 ===")
-            for i, doc in enumerate(memory_context['long_term_context'][:2]):
-                content = doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content
-                context_parts.append(f"{i+1}. {content}")
-        
+        # 단기기억/장기기억 내용은 토큰 예산에 맞춰 프롬프트 조립 시 추가 (_render_memory_contents)
         return "\n".join(context_parts)
-
-    def _create_conversational_prompt(self, message: str, integrated_context: str, chat_history: List, conversation_context: Dict, emotional_context: Dict) -> str:
-        """자연스러운 대화형 프롬프트 생성"""
-        
-        # 대화 히스토리 처리
-        chat_history_text = ""
-        if chat_history and len(chat_history) > 0:
-            chat_history_text = "\n=== 이전 대화 내용 ===\n"
-            for i, msg in enumerate(chat_history[-4:], 1):  # 최근 4개 메시지만 포함
-                if hasattr(msg, 'content'):
-                    role = "사용자" if hasattr(msg, 'type') and msg.type == 'human' else "AI"
-                    chat_history_text += f"{i}. {role}: {msg.content}\n"
-            chat_history_text += "==================\n"
-        
+    
+    def _render_memory_contents(self, memory_chunks: List[Dict[str, Any]]) -> str:
+        """예산 안에 선택된 단기기억/장기기억 내용을 프롬프트 섹션으로 포맷팅"""
+        sections = []
+        for priority, title in ((0, "단기기억 내용"), (1, "장기기억 내용")):
+            chunks = [chunk for chunk in memory_chunks if chunk['priority'] == priority]
+            if chunks:
+                sections.append(f"\n=== {title} ===")
+                sections.extend(f"{i+1}. {chunk['text']}" for i, chunk in enumerate(chunks))
+        return "\n".join(sections)
+
+    def _create_conversational_prompt(self, message: str, integrated_context: str, chat_history: List, conversation_context: Dict, emotional_context: Dict, memory_chunks: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """자연스러운 대화형 프롬프트 생성 (토큰 예산 적용)"""
+        def render(history_lines: List[str], packed: List[Dict[str, Any]]) -> str:
+            context = "\n".join(part for part in (integrated_context, self._render_memory_contents(packed)) if part)
+            return self._render_conversational_prompt(message, context, self._render_chat_history(history_lines), emotional_context)
+        
+        return self.context_assembler.assemble(render, memory_chunks or [], self._chat_history_lines(chat_history), operation="conversational")
+    
+    def _render_conversational_prompt(self, message: str, integrated_context: str, chat_history_text: str, emotional_context: Dict) -> str:
+        """대화형 프롬프트 템플릿"""
         # 감정 기반 응답 스타일 결정
         response_style = emotional_context.get('response_style', '친근함')
         emotion = emotional_context.get('emotion', '중립')
@@ -1838,11 +1823,16 @@ class RAGService:
         
         return "\n".join(formatted)
 
-    def is_healthy(self) -> bool:
+    def close(self):
+        """LLM 게이트웨이 실행 풀 정리 및 상주 중인 대화 히스토리 저장"""
+        self.llm_gateway.close()
+        self.conversation_state.close()
+
+    async def is_healthy(self) -> bool:
         """서비스 상태 확인"""
         try:
             return (
-                self.vector_store.is_healthy() and
+                await self.vector_store.is_healthy() and
                 self.web_search.is_healthy()
             )
         except Exception:
@@ -0,0 +1,137 @@
+import itertools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.logging_service import (
+    RESPONSE_CACHE_ENTRIES,
+    RESPONSE_CACHE_EVICTIONS,
+    RESPONSE_CACHE_HIT_RATIO,
+    RESPONSE_CACHE_REQUESTS
+)
+
+GLOBAL_SCOPE = "global"
+
+# 이전 대화를 가리키는 표현이 있으면 대화 범위로만 캐시 (같은 질문이라도 대화마다 답이 다름)
+CONTEXT_DEPENDENT_MARKERS = [
+    '그거', '그것', '이거', '이것', '저거', '저것', '그건', '이건', '저건',
+    '위에', '아까', '방금', '앞에서', '그럼', '그러면', '더 자세히', '계속',
+    'that', 'this', 'it ', 'above', 'previous', 'earlier'
+]
+
+
+class SemanticResponseCache:
+    """질문 임베딩 기반 답변 캐시 (유사도 임계값 + TTL)
+
+    - 같은 모드/웹 검색 여부/범위 안에서 코사인 유사도가 임계값 이상인 가장 가까운 질문의 답변을 재사용
+    - 범위는 대화 맥락(히스토리, 이전에 저장된 메모리 문서)을 사용하지 않은 턴만 전역(global), 나머지는 대화별(conversation_id)
+    - 답변과 함께 원래 참조 소스를 보관해 그대로 반환
+    - 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    """
+
+    def __init__(self, similarity_threshold: float = None, ttl: float = None, max_entries: int = None):
+        self.enabled = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+        self.similarity_threshold = similarity_threshold or float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+        self.ttl = ttl or float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+        self.scope_mode = os.getenv("RESPONSE_CACHE_SCOPE", "auto")  # auto | global | conversation
+
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count()
+        self._hits = 0
+        self._lookups = 0
+
+    def scope_for(self, message: str, conversation_id: str, uses_context: bool = False) -> str:
+        """질문이 이전 대화에 의존하는지에 따라 캐시 범위 결정
+
+        uses_context: 답변이 대화 히스토리나 메모리 문서로 만들어진 경우 (설정과 무관하게 대화 범위)
+        """
+        if uses_context or self.scope_mode == "conversation":
+            return conversation_id
+        if self.scope_mode == "global":
+            return GLOBAL_SCOPE
+        message_lower = f"{message.lower()} "
+        if any(marker in message_lower for marker in CONTEXT_DEPENDENT_MARKERS):
+            return conversation_id
+        return GLOBAL_SCOPE
+
+    def lookup(self, vector: List[float], mode: str, scope: str, use_web_search: bool) -> Optional[Dict[str, Any]]:
+        """가장 유사한 신선한 항목 반환 (없으면 None)"""
+        self._expire()
+        partition = (mode, scope, use_web_search)
+        candidates = [(entry_id, entry) for entry_id, entry in self._entries.items() if entry['partition'] == partition]
+
+        best: Optional[Tuple[int, Dict[str, Any], float]] = None
+        if candidates:
+            query = self._normalize(vector)
+            similarities = np.stack([entry['vector'] for _, entry in candidates]) @ query
+            index = int(np.argmax(similarities))
+            if similarities[index] >= self.similarity_threshold:
+                best = (*candidates[index], float(similarities[index]))
+
+        scope_label = "global" if scope == GLOBAL_SCOPE else "conversation"
+        self._lookups += 1
+        if best is None:
+            RESPONSE_CACHE_REQUESTS.labels(mode=mode, scope=scope_label, result='miss').inc()
+            RESPONSE_CACHE_HIT_RATIO.set(self._hits / self._lookups)
+            return None
+
+        entry_id, entry, similarity = best
+        self._entries.move_to_end(entry_id)
+        self._hits += 1
+        RESPONSE_CACHE_REQUESTS.labels(mode=mode, scope=scope_label, result='hit').inc()
+        RESPONSE_CACHE_HIT_RATIO.set(self._hits / self._lookups)
+        print(f"답변 캐시 히트 ({mode}, 유사도 {similarity:.3f}): {entry['message']}")
+        return {**entry, 'similarity': similarity}
+
+    def put(self, vector: List[float], mode: str, scope: str, use_web_search: bool, message: str, response: str, sources: List[str]):
+        """답변과 참조 소스 저장"""
+        self._entries[next(self._ids)] = {
+            'partition': (mode, scope, use_web_search),
+            'vector': self._normalize(vector),
+            'message': message,
+            'response': response,
+            'sources': list(sources),
+            'created_at': time.time()
+        }
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            RESPONSE_CACHE_EVICTIONS.labels(reason='capacity').inc()
+        RESPONSE_CACHE_ENTRIES.set(len(self._entries))
+
+    def invalidate(self, scope: str = None, mode: str = None, source: str = None, reason: str = "manual") -> int:
+        """조건에 맞는 항목 제거 (조건이 없으면 전체) - 제거한 개수 반환"""
+        removed = [
+            entry_id for entry_id, entry in self._entries.items()
+            if (scope is None or entry['partition'][1] == scope)
+            and (mode is None or entry['partition'][0] == mode)
+            and (source is None or source in entry['sources'])
+        ]
+        for entry_id in removed:
+            del self._entries[entry_id]
+        if removed:
+            RESPONSE_CACHE_EVICTIONS.labels(reason=reason).inc(len(removed))
+            RESPONSE_CACHE_ENTRIES.set(len(self._entries))
+        return len(removed)
+
+    def _expire(self):
+        """TTL이 지난 항목 제거"""
+        cutoff = time.time() - self.ttl
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry['created_at'] < cutoff]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            RESPONSE_CACHE_EVICTIONS.labels(reason='ttl').inc(len(expired))
+            RESPONSE_CACHE_ENTRIES.set(len(self._entries))
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def __len__(self) -> int:
+        return len(self._entries)
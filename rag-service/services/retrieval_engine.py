@@ -0,0 +1,304 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from services.logging_service import RETRIEVAL_STAGE_DURATION
+
+# 모드별 검색 설정 (엔드포인트는 이 설정만 다르고 같은 엔진을 사용)
+RETRIEVAL_MODES: Dict[str, Dict[str, Any]] = {
+    'chat': {
+        'search_max_results': 5,
+        'short_term_k': 3,
+        'long_term_k': 3,
+        'topic_k': 5,
+        'label': "웹 검색",
+        'metadata': {}
+    },
+    'structured': {
+        'search_max_results': 8,  # 더 많은 정보 수집
+        'short_term_k': 5,
+        'long_term_k': 5,
+        'topic_k': 5,
+        'label': "구조화된 답변용",
+        'metadata': {}
+    },
+    'topic_based': {
+        'search_max_results': 10,
+        'short_term_k': 0,  # 주제 기반 답변은 새로운 검색 결과에 의존
+        'long_term_k': 0,
+        'topic_k': 5,
+        'label': "초기 검색 결과",
+        'metadata': {}
+    },
+    'conversational': {
+        'search_max_results': 5,
+        'short_term_k': 3,
+        'long_term_k': 3,
+        'topic_k': 5,
+        'label': "맥락 기반 웹 검색",
+        'metadata': {'context_type': 'web_search'}
+    }
+}
+
+
+class RetrievalEngine:
+    """모든 채팅 모드가 공유하는 검색 엔진
+
+    search(웹 검색) → ingest(수집/분할/임베딩/저장) → retrieve(단기/장기기억 검색) → assemble(컨텍스트 조립)
+
+    - 단계는 self.stages에서 교체할 수 있고, 모드별 차이는 RETRIEVAL_MODES 설정으로만 표현
+    - 모든 단계는 실행 시간을 Prometheus 히스토그램과 호출별 timings(ms)에 기록
+    - 캐시는 각 단계가 사용하는 서비스가 담당 (검색 결과 캐시, 페이지 저장소, 임베딩 캐시)
+    """
+
+    def __init__(
+        self,
+        web_search,
+        fetch_pipeline,
+        conversation_store: Callable[[str], Awaitable[Any]],
+        long_term_store: Callable[[str], Awaitable[Any]],
+        context_formatter: Callable[[List[Document]], Any],
+        modes: Optional[Dict[str, Dict[str, Any]]] = None,
+        batch_query: Optional[Callable[[List[Tuple[str, Any]]], Awaitable[List[List[Any]]]]] = None
+    ):
+        self.web_search = web_search
+        self.fetch_pipeline = fetch_pipeline
+        self.conversation_store = conversation_store
+        self.long_term_store = long_term_store
+        self.context_formatter = context_formatter
+        self.modes = modes or RETRIEVAL_MODES
+        # 여러 콜렉션 검색을 콜렉션별 배치 요청으로 묶어 실행 (VectorStoreService.query_batch)
+        self.batch_query = batch_query
+
+        self.stages: Dict[str, Callable[..., Awaitable[Any]]] = {
+            'search': self._search,
+            'ingest': self._ingest,
+            'ingest_wait': self._ingest_wait,
+            'retrieve': self._retrieve,
+            'retrieve_batch': self._retrieve_batch,
+            'assemble': self._assemble
+        }
+
+    async def run(self, mode: str, query: str, conversation_id: str, use_web_search: bool = True, timings: Dict[str, int] = None) -> Dict[str, Any]:
+        """웹 검색/저장 후 메모리 검색과 컨텍스트 조립까지 수행"""
+        timings = timings if timings is not None else {}
+
+        collected = {'search_results': [], 'sources': []}
+        if use_web_search:
+            collected = await self.collect(mode, query, conversation_id, timings)
+        else:
+            print(f"웹 검색 건너뛰기: {query} (로컬 메모리만 사용)")
+
+        # 방금 저장한 웹 문서까지 포함해 단기기억 → 장기기억 순으로 검색
+        memory = await self.retrieve(mode, query, conversation_id, timings)
+        assembled = await self.run_stage(mode, 'assemble', timings, memory['short_term'], memory['long_term'], collected['sources'])
+
+        return {
+            **collected,
+            **memory,
+            **assembled,
+            'timings': timings
+        }
+
+    async def collect(self, mode: str, query: str, conversation_id: str, timings: Dict[str, int] = None) -> Dict[str, Any]:
+        """웹 검색 후 결과 페이지를 대화별 콜렉션에 저장"""
+        timings = timings if timings is not None else {}
+        search_results = await self.run_stage(mode, 'search', timings, query)
+        sources = await self.run_stage(mode, 'ingest', timings, search_results, query, conversation_id)
+        return {'search_results': search_results, 'sources': sources}
+
+    async def collect_speculative(self, mode: str, query: str, conversation_id: str, timings: Dict[str, int] = None) -> Dict[str, Any]:
+        """웹 검색 결과만 기다리고, 결과 페이지 수집/저장은 백그라운드로 시작
+
+        검색 결과(제목/요약)만 필요한 LLM 단계(분류, 주제 추출)가 도는 동안 페이지 수집 지연을 숨기고,
+        저장된 페이지가 필요한 시점에 wait_for_ingest로 필요한 만큼만 대기
+        """
+        timings = timings if timings is not None else {}
+        search_results = await self.run_stage(mode, 'search', timings, query)
+        indexed: List[str] = []
+        first_indexed = asyncio.Event()
+
+        def on_indexed(url: str):
+            indexed.append(url)
+            first_indexed.set()
+
+        ingest = asyncio.create_task(self.run_stage(mode, 'ingest', timings, search_results, query, conversation_id, on_indexed))
+        ingest.add_done_callback(self._log_ingest_error)
+        return {'search_results': search_results, 'ingest': ingest, 'indexed': indexed, 'first_indexed': first_indexed}
+
+    async def wait_for_ingest(
+        self,
+        mode: str,
+        collected: Dict[str, Any],
+        budget: float,
+        first_page_budget: float = 0.0,
+        timings: Dict[str, int] = None
+    ) -> List[str]:
+        """백그라운드 수집/저장을 budget초까지 대기 - 그때까지 저장된 URL만 반환
+
+        budget 안에 저장된 페이지가 하나도 없으면 첫 페이지가 저장(또는 수집 종료)될 때까지 first_page_budget초만 더 대기
+        """
+        timings = timings if timings is not None else {}
+        return await self.run_stage(mode, 'ingest_wait', timings, collected, budget, first_page_budget)
+
+    async def retrieve(self, mode: str, query: str, conversation_id: str, timings: Dict[str, int] = None) -> Dict[str, List[Document]]:
+        """단기기억(현재 대화)과 장기기억(대화 히스토리) 검색"""
+        timings = timings if timings is not None else {}
+        return await self.run_stage(mode, 'retrieve', timings, query, conversation_id)
+
+    async def retrieve_batch(self, mode: str, queries: List[str], conversation_id: str, timings: Dict[str, int] = None) -> List[List[Document]]:
+        """여러 쿼리를 대화별 콜렉션에서 한 번에 검색 (쿼리 순서대로 결과 반환)"""
+        timings = timings if timings is not None else {}
+        return await self.run_stage(mode, 'retrieve_batch', timings, queries, conversation_id)
+
+    async def run_stage(self, mode: str, stage: str, timings: Dict[str, int], *args):
+        """단계 실행 및 실행 시간 기록"""
+        config = self.modes[mode]
+        start_time = time.perf_counter()
+        try:
+            return await self.stages[stage](config, *args)
+        finally:
+            duration = time.perf_counter() - start_time
+            RETRIEVAL_STAGE_DURATION.labels(mode=mode, stage=stage).observe(duration)
+            timings[f"{self._camel(stage)}Ms"] = int(duration * 1000)
+
+    async def _search(self, config: Dict[str, Any], query: str) -> List[Dict[str, Any]]:
+        """웹 검색"""
+        print(f"[{config['label']}] 웹 검색 수행 중: {query}")
+        return await self.web_search.search(query, max_results=config['search_max_results'])
+
+    async def _ingest(
+        self,
+        config: Dict[str, Any],
+        search_results: List[Dict[str, Any]],
+        query: str,
+        conversation_id: str,
+        on_indexed: Optional[Callable[[str], None]] = None
+    ) -> List[str]:
+        """검색 결과 페이지 수집 → 분할 → 임베딩 → 저장 (페이지가 도착하는 대로 파이프라인 처리)"""
+        if not search_results:
+            return []
+        conversation_vector_store = await self.conversation_store(conversation_id)
+        return await self.fetch_pipeline.run(
+            search_results,
+            conversation_vector_store,
+            metadata={'search_query': query, 'conversation_id': conversation_id, **config['metadata']},
+            label=config['label'],
+            on_indexed=on_indexed
+        )
+
+    async def _ingest_wait(self, config: Dict[str, Any], collected: Dict[str, Any], budget: float, first_page_budget: float) -> List[str]:
+        """백그라운드 수집 대기 (수집 태스크는 취소하지 않으므로 늦게 도착한 페이지도 이후 검색에 사용됨)"""
+        ingest = collected['ingest']
+        done, _ = await asyncio.wait([ingest], timeout=budget)
+        if done:
+            return self._ingest_result(ingest)
+
+        if not collected['first_indexed'].is_set() and first_page_budget > 0:
+            first_indexed = asyncio.create_task(collected['first_indexed'].wait())
+            try:
+                await asyncio.wait([ingest, first_indexed], timeout=first_page_budget, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                first_indexed.cancel()
+            if ingest.done():
+                return self._ingest_result(ingest)
+
+        print(f"[{config['label']}] 수집 대기 시간({budget}s) 초과, 저장된 페이지 {len(collected['indexed'])}개로 먼저 검색 (나머지는 백그라운드에서 계속 저장)")
+        return list(collected['indexed'])
+
+    @staticmethod
+    def _ingest_result(ingest: asyncio.Task) -> List[str]:
+        """끝난 수집 태스크의 저장된 URL 목록 (취소/실패 시 빈 결과)"""
+        if ingest.cancelled() or ingest.exception() is not None:
+            return []
+        return ingest.result()
+
+    @staticmethod
+    def _log_ingest_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"백그라운드 페이지 수집 실패: {task.exception()}")
+
+    async def _retrieve(self, config: Dict[str, Any], query: str, conversation_id: str) -> Dict[str, List[Document]]:
+        """단기기억/장기기억 검색 (쿼리 임베딩 1회 + 배치 검색, 배치 검색을 쓸 수 없으면 두 검색을 동시에 실행)"""
+        if self.batch_query is not None:
+            try:
+                return await self._retrieve_with_batch_query(config, query, conversation_id)
+            except Exception as e:
+                print(f"메모리 배치 검색 실패, 개별 검색으로 재시도: {e}")
+        
+        short_term, long_term = await asyncio.gather(
+            self._similarity_search(self.conversation_store, "단기기억", query, conversation_id, config['short_term_k']),
+            self._similarity_search(self.long_term_store, "장기기억", query, conversation_id, config['long_term_k'])
+        )
+        return {'short_term': short_term, 'long_term': long_term}
+
+    async def _retrieve_with_batch_query(self, config: Dict[str, Any], query: str, conversation_id: str) -> Dict[str, List[Document]]:
+        """단기기억/장기기억 검색 요청을 한 번의 배치 검색으로 실행"""
+        tiers = [
+            (label, get_store, k)
+            for label, get_store, k in (
+                ("단기기억", self.conversation_store, config['short_term_k']),
+                ("장기기억", self.long_term_store, config['long_term_k'])
+            )
+            if k > 0
+        ]
+        if not tiers:
+            return {'short_term': [], 'long_term': []}
+        
+        stores = await asyncio.gather(*[get_store(conversation_id) for _, get_store, _ in tiers])
+        vector = await asyncio.to_thread(stores[0].embeddings.embed_query, query)
+        responses = await self.batch_query([
+            (store.collection_name, store.search_request(vector, k))
+            for store, (_, _, k) in zip(stores, tiers)
+        ])
+        
+        results = {}
+        for store, (label, _, _), points in zip(stores, tiers, responses):
+            documents = [doc for doc in store.to_documents(points) if doc.page_content]
+            print(f"{label}에서 {len(documents)}개 문서 검색 완료")
+            results[label] = documents
+        return {'short_term': results.get("단기기억", []), 'long_term': results.get("장기기억", [])}
+    
+    async def _similarity_search(self, get_store: Callable[[str], Awaitable[Any]], memory_label: str, query: str, conversation_id: str, k: int) -> List[Document]:
+        """벡터 스토어 하나에서 검색 (실패 시 빈 결과)"""
+        if k <= 0:
+            return []
+        try:
+            vector_store = await get_store(conversation_id)
+            results = await vector_store.similarity_search(query, k)
+            documents = [result for result in results if hasattr(result, 'page_content') and result.page_content]
+            print(f"{memory_label}에서 {len(documents)}개 문서 검색 완료")
+            return documents
+        except Exception as e:
+            print(f"{memory_label} 검색 실패: {e}")
+            return []
+
+    async def _retrieve_batch(self, config: Dict[str, Any], queries: List[str], conversation_id: str) -> List[List[Document]]:
+        """쿼리 배치 임베딩 + Qdrant 배치 검색"""
+        if not queries:
+            return []
+        conversation_vector_store = await self.conversation_store(conversation_id)
+        return await conversation_vector_store.similarity_search_batch(queries, config['topic_k'])
+
+    async def _assemble(self, config: Dict[str, Any], short_term: List[Document], long_term: List[Document], sources: List[str]) -> Dict[str, Any]:
+        """단기기억 → 장기기억 순으로 문서를 모아 컨텍스트(프롬프트 조립용 청크) 생성하고 참조 URL을 소스에 추가"""
+        sources = list(sources)
+        documents = []
+        for result in short_term + long_term:
+            documents.append(result)
+            url = result.metadata.get('url') if hasattr(result, 'metadata') else None
+            if url and url not in sources:
+                sources.append(url)
+
+        return {
+            'documents': documents,
+            'sources': sources,
+            'context': self.context_formatter(documents)
+        }
+
+    @staticmethod
+    def _camel(stage: str) -> str:
+        head, *rest = stage.split('_')
+        return head + "".join(part.capitalize() for part in rest)
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.logging_service import SEARCH_CACHE_REQUESTS, SEARCH_CACHE_HIT_RATIO
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # Redis 계층은 선택 사항
+    redis_asyncio = None
+
+
+class SearchCache:
+    """웹 검색 결과 TTL 캐시 (프로세스 내 LRU + 선택적 Redis 공유 계층)
+
+    - 빈 결과도 짧은 TTL로 캐시 (negative caching)
+    - TTL이 지난 항목은 stale 기간 동안 그대로 반환하고 백그라운드에서 갱신 (stale-while-revalidate)
+    """
+
+    FRESH = "fresh"
+    STALE = "stale"
+
+    def __init__(self, max_entries: int = None, ttl: float = None, negative_ttl: float = None, stale_ttl: float = None, redis_url: str = None):
+        self.max_entries = max_entries or int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl = ttl or float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600"))
+        self.negative_ttl = negative_ttl or float(os.getenv("SEARCH_CACHE_NEGATIVE_TTL_SECONDS", "300"))
+        self.stale_ttl = stale_ttl or float(os.getenv("SEARCH_CACHE_STALE_SECONDS", "1800"))
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._hits = 0
+        self._lookups = 0
+
+        self.redis = None
+        redis_url = redis_url or os.getenv("SEARCH_CACHE_REDIS_URL")
+        if redis_url:
+            if redis_asyncio is None:
+                print("SEARCH_CACHE_REDIS_URL이 설정되었지만 redis 패키지가 없어 로컬 캐시만 사용합니다.")
+            else:
+                self.redis = redis_asyncio.from_url(redis_url)
+                print(f"검색 캐시 Redis 계층 사용: {redis_url}")
+
+    def make_key(self, normalized_query: str, max_results: int) -> str:
+        """전처리된 검색어로 캐시 키 생성 (대소문자/공백 차이 무시)"""
+        normalized = re.sub(r'\s+', ' ', normalized_query.lower()).strip()
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return f"search:{max_results}:{digest}"
+
+    async def get(self, key: str) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """캐시 조회 - (결과, 상태) 반환, 상태는 fresh/stale/None"""
+        entry = self._entries.get(key)
+        tier = "local"
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.redis is not None:
+            entry = await self._redis_get(key)
+            tier = "redis"
+            if entry is not None:
+                self._store_local(key, entry)
+
+        state = self._state(entry)
+        if state is None:
+            self._record("none", "miss")
+            return None, None
+
+        self._record(tier, state)
+        return entry['results'], state
+
+    async def set(self, key: str, results: List[Dict[str, Any]]):
+        """검색 결과 저장 (빈 결과는 negative TTL 적용)"""
+        entry = {
+            'results': results,
+            'created_at': time.time(),
+            'ttl': self.ttl if results else self.negative_ttl
+        }
+        self._store_local(key, entry)
+
+        if self.redis is not None:
+            try:
+                expire = int(entry['ttl'] + self.stale_ttl)
+                await self.redis.set(key, json.dumps(entry, ensure_ascii=False), ex=expire)
+            except Exception as e:
+                print(f"검색 캐시 Redis 저장 실패: {e}")
+
+    def _state(self, entry: Optional[Dict[str, Any]]) -> Optional[str]:
+        """항목의 신선도 판단"""
+        if entry is None:
+            return None
+        age = time.time() - entry['created_at']
+        if age < entry['ttl']:
+            return self.FRESH
+        # 빈 결과는 stale 상태로 재사용하지 않음
+        if entry['results'] and age < entry['ttl'] + self.stale_ttl:
+            return self.STALE
+        return None
+
+    def _store_local(self, key: str, entry: Dict[str, Any]):
+        """LRU 계층에 저장하고 최대 개수를 넘으면 가장 오래된 항목 제거"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _redis_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Redis 계층 조회 (오류 시 캐시 미스로 처리)"""
+        try:
+            raw = await self.redis.get(key)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            print(f"검색 캐시 Redis 조회 실패: {e}")
+            return None
+
+    def _record(self, tier: str, result: str):
+        """히트/미스 메트릭 기록"""
+        SEARCH_CACHE_REQUESTS.labels(tier=tier, result=result).inc()
+        self._lookups += 1
+        if result != "miss":
+            self._hits += 1
+        SEARCH_CACHE_HIT_RATIO.set(self._hits / self._lookups)
+
+    async def close(self):
+        """Redis 연결 정리"""
+        if self.redis is not None:
+            await self.redis.aclose()
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+from services.logging_service import SINGLE_FLIGHT_REQUESTS
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 비동기 작업을 하나로 합치는 single-flight
+
+    - 처음 들어온 호출(leader)만 작업을 실행하고, 진행 중에 들어온 호출은 같은 결과를 기다림
+    - 작업은 별도 태스크로 실행되므로 호출 하나가 취소되어도 기다리는 다른 호출에는 영향 없음
+    - 작업이 끝나면 키를 바로 제거 (결과 캐시는 각 계층의 캐시가 담당)
+    """
+
+    def __init__(self, layer: str):
+        self.layer = layer
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            SINGLE_FLIGHT_REQUESTS.labels(layer=self.layer, result='leader').inc()
+            task = asyncio.create_task(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            SINGLE_FLIGHT_REQUESTS.labels(layer=self.layer, result='coalesced').inc()
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+
+class KeyedInFlight:
+    """스레드 간 키 단위 single-flight (동기 코드용)
+
+    claim()으로 아직 아무도 처리하지 않는 키를 가져가고, 다른 스레드가 처리 중인 키는
+    완료 이벤트를 받아 기다림. 처리한 스레드는 release()로 기다리는 스레드를 깨움
+    """
+
+    def __init__(self, layer: str):
+        self.layer = layer
+        self._lock = threading.Lock()
+        self._events: Dict[Hashable, threading.Event] = {}
+
+    def claim(self, keys: List[Hashable]) -> Tuple[List[Hashable], Dict[Hashable, threading.Event]]:
+        """(직접 처리할 키 목록, 다른 스레드가 처리 중인 키 → 완료 이벤트) 반환"""
+        owned, waiting = [], {}
+        with self._lock:
+            for key in keys:
+                event = self._events.get(key)
+                if event is None:
+                    self._events[key] = threading.Event()
+                    owned.append(key)
+                else:
+                    waiting[key] = event
+
+        if owned:
+            SINGLE_FLIGHT_REQUESTS.labels(layer=self.layer, result='leader').inc(len(owned))
+        if waiting:
+            SINGLE_FLIGHT_REQUESTS.labels(layer=self.layer, result='coalesced').inc(len(waiting))
+        return owned, waiting
+
+    def release(self, keys: List[Hashable]):
+        """처리가 끝난 키를 해제하고 기다리는 스레드를 깨움 (성공/실패 무관)"""
+        with self._lock:
+            events = [self._events.pop(key, None) for key in keys]
+        for event in events:
+            if event is not None:
+                event.set()
@@ -1,39 +1,77 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, QueryRequest, ScoredPoint, VectorParams
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import asyncio
 import os
+import time
 import uuid
 
+from services.embedding_cache import get_embedding_cache
+from services.collection_registry import CollectionRegistry
+from services.conversation_store import upsert_vectors_in_batches
+from services.logging_service import VECTOR_SEARCH_DURATION
+
+def encode_length_sorted(model, texts: List[str], batch_size: int) -> np.ndarray:
+    """길이순으로 정렬한 배치 단위 임베딩 (패딩 최소화) 후 원래 순서로 복원, 정규화된 float32 반환"""
+    order = np.argsort([len(text) for text in texts], kind='stable')
+    sorted_texts = [texts[i] for i in order]
+    
+    batches = []
+    for start in range(0, len(sorted_texts), batch_size):
+        batches.append(model.encode(
+            sorted_texts[start:start + batch_size],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ))
+    
+    embeddings = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+    embeddings[order] = np.concatenate(batches).astype(np.float32, copy=False)
+    return embeddings
+
 class VectorStoreService:
     def __init__(self):
         self.qdrant_host = os.getenv("QDRANT_HOST", "localhost")
         self.qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
         self.collection_name = "websearch_documents"
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model_name = 'all-MiniLM-L6-v2'
+        self.embedding_model = SentenceTransformer(self.embedding_model_name)
         self.vector_size = 384
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        
+        # 동일 텍스트 재임베딩 방지용 캐시 (정규화된 벡터를 저장하므로 정규화하지 않는 CachedEmbeddings와 네임스페이스 분리)
+        self.embedding_cache = get_embedding_cache(f"{self.embedding_model_name}:normalized")
         
-        # Qdrant 클라이언트 초기화
-        self.client = QdrantClient(host=self.qdrant_host, port=self.qdrant_port)
-        self._init_collection()
+        # Qdrant 비동기 클라이언트 초기화 (QDRANT_PREFER_GRPC=true이면 gRPC 사용)
+        self.prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+        self.client = AsyncQdrantClient(
+            host=self.qdrant_host,
+            port=self.qdrant_port,
+            grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+            prefer_grpc=self.prefer_grpc
+        )
+        
+        # 콜렉션 레지스트리 (시작 시 1회 적재 후 증분 갱신)
+        self.collection_registry = CollectionRegistry(self.client)
     
-    def _init_collection(self):
-        """컬렉션 초기화"""
+    async def initialize(self):
+        """컬렉션 초기화 (애플리케이션 시작 시 1회 호출)"""
         try:
-            # 컬렉션이 존재하는지 확인
-            collections = self.client.get_collections()
-            collection_names = [col.name for col in collections.collections]
+            # 컬렉션 목록을 레지스트리에 적재하고 존재 여부 확인
+            await self.collection_registry.load()
             
-            if self.collection_name not in collection_names:
+            if self.collection_name not in self.collection_registry:
                 # 새 컬렉션 생성
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=self.vector_size,
                         distance=Distance.COSINE
                     )
                 )
+                self.collection_registry.add(self.collection_name)
                 print(f"Created collection: {self.collection_name}")
             else:
                 print(f"Collection {self.collection_name} already exists")
@@ -41,40 +79,42 @@ class VectorStoreService:
         except Exception as e:
             print(f"Error initializing collection: {e}")
     
-    def add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
-        """문서들을 벡터 스토어에 추가"""
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """캐시를 거쳐 여러 텍스트를 배치로 임베딩 - (문서 수, 차원) float32 배열 반환"""
+        vectors = self.embedding_cache.get_or_embed(
+            texts,
+            lambda missing: encode_length_sorted(self.embedding_model, missing, self.embedding_batch_size)
+        )
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.vector_size)
+    
+    async def add_documents(self, documents: List[Dict[str, Any]], wait: bool = True) -> List[str]:
+        """문서들을 벡터 스토어에 추가 (배치 임베딩, 배치 업서트)"""
         try:
-            points = []
-            ids = []
+            texts = []
+            payloads = []
             
             for doc in documents:
-                # 텍스트 임베딩 생성
                 text = doc.get('content', '')
                 if not text.strip():
                     continue
-                    
-                embedding = self.embedding_model.encode(text).tolist()
-                doc_id = str(uuid.uuid4())
                 
-                point = PointStruct(
-                    id=doc_id,
-                    vector=embedding,
-                    payload={
-                        'content': text,
-                        'url': doc.get('url', ''),
-                        'title': doc.get('title', ''),
-                        'metadata': doc.get('metadata', {})
-                    }
-                )
-                points.append(point)
-                ids.append(doc_id)
+                texts.append(text)
+                payloads.append({
+                    'content': text,
+                    'url': doc.get('url', ''),
+                    'title': doc.get('title', ''),
+                    'metadata': doc.get('metadata', {})
+                })
             
-            if points:
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=points
-                )
-                print(f"Added {len(points)} documents to vector store")
+            if not texts:
+                return []
+            
+            # 텍스트 임베딩 생성 (배치, CPU 작업이므로 스레드에서 실행)
+            embeddings = await asyncio.to_thread(self._embed_batch, texts)
+            ids = [str(uuid.uuid4()) for _ in texts]
+            
+            await upsert_vectors_in_batches(self.client, self.collection_name, ids, embeddings, payloads, wait=wait)
+            print(f"Added {len(ids)} documents to vector store")
             
             return ids
             
@@ -82,19 +122,19 @@ class VectorStoreService:
             print(f"Error adding documents: {e}")
             return []
     
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    async def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """쿼리와 유사한 문서 검색"""
         try:
             # 쿼리 임베딩 생성
-            query_embedding = self.embedding_model.encode(query).tolist()
+            query_embedding = (await asyncio.to_thread(self._embed_batch, [query]))[0].tolist()
             
             # 벡터 검색 수행
-            search_results = self.client.search(
+            search_results = (await self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
+                query=query_embedding,
                 limit=top_k,
                 with_payload=True
-            )
+            )).points
             
             # 결과 포맷팅
             results = []
@@ -113,18 +153,45 @@ class VectorStoreService:
             print(f"Error searching documents: {e}")
             return []
     
-    def delete_collection(self):
+    async def query_batch(self, requests: List[Tuple[str, QueryRequest]]) -> List[List[ScoredPoint]]:
+        """(콜렉션 이름, 검색 요청) 목록을 콜렉션별 배치 요청으로 묶어 동시에 실행 (요청 순서대로 결과 반환)
+        
+        같은 콜렉션의 요청은 query_batch_points 한 번으로 처리하고, 콜렉션별 배치는 동시에 전송.
+        콜렉션 하나의 검색이 실패하면 해당 요청들만 빈 결과로 반환
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, (collection_name, _) in enumerate(requests):
+            groups.setdefault(collection_name, []).append(index)
+        
+        start_time = time.perf_counter()
+        responses = await asyncio.gather(*[
+            self.client.query_batch_points(collection_name=collection_name, requests=[requests[i][1] for i in indexes])
+            for collection_name, indexes in groups.items()
+        ], return_exceptions=True)
+        VECTOR_SEARCH_DURATION.observe(time.perf_counter() - start_time)
+        
+        results: List[List[ScoredPoint]] = [[] for _ in requests]
+        for (collection_name, indexes), response in zip(groups.items(), responses):
+            if isinstance(response, Exception):
+                print(f"배치 검색 실패 ({collection_name}): {response}")
+                continue
+            for index, query_response in zip(indexes, response):
+                results[index] = query_response.points
+        return results
+    
+    async def delete_collection(self):
         """컬렉션 삭제"""
         try:
-            self.client.delete_collection(self.collection_name)
+            await self.client.delete_collection(self.collection_name)
+            self.collection_registry.discard(self.collection_name)
             print(f"Deleted collection: {self.collection_name}")
         except Exception as e:
             print(f"Error deleting collection: {e}")
     
-    def get_collection_info(self) -> Dict[str, Any]:
+    async def get_collection_info(self) -> Dict[str, Any]:
         """컬렉션 정보 조회"""
         try:
-            info = self.client.get_collection(self.collection_name)
+            info = await self.client.get_collection(self.collection_name)
             return {
                 'name': info.name,
                 'vectors_count': info.vectors_count,
@@ -134,10 +201,14 @@ class VectorStoreService:
             print(f"Error getting collection info: {e}")
             return {}
     
-    def is_healthy(self) -> bool:
+    async def is_healthy(self) -> bool:
         """서비스 상태 확인"""
         try:
-            self.client.get_collections()
+            await self.client.get_collections()
             return True
         except Exception:
             return False
+    
+    async def close(self):
+        """Qdrant 연결 정리"""
+        await self.client.close()
@@ -1,25 +1,46 @@
 import requests
 from bs4 import BeautifulSoup
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 import re
 from urllib.parse import urljoin, urlparse
 import asyncio
 import json
+import time
 import openai
+from openai import AsyncOpenAI
 
 from dotenv import load_dotenv
 
+from services.logging_service import (
+    FETCH_ABORTED,
+    FETCH_DOWNLOADED_BYTES,
+    FETCH_SKIPPED,
+    FETCH_USED_BYTES,
+    HTML_EXTRACT_DURATION,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_WAITING_REQUESTS
+)
+from services.search_cache import SearchCache
+from services.content_store import ContentStore
+from services.host_health import HostHealthRegistry, HostUnavailable
+from services.html_extractor import HtmlExtractor
+from services.page_download import DownloadAborted, content_kind, read_bytes, read_text
+from services.single_flight import SingleFlight
+
 
 load_dotenv()  
 class WebSearchService:
     def __init__(self):
-        self.session = httpx.AsyncClient(timeout=30.0)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
+        # 모든 외부 요청이 공유하는 커넥션 풀 (keep-alive, HTTP/2)
+        self.session = self._create_http_client()
+        self._register_pool_metrics()
+        
         # Google Custom Search API 설정
         self.google_api_key = os.getenv("GOOGLE_API_KEY")
         self.google_cse_id = os.getenv("GOOGLE_CSE_ID")
@@ -29,8 +50,39 @@ class WebSearchService:
         
         # OpenAI API 설정
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.openai_client = None
         if self.openai_api_key:
             openai.api_key = self.openai_api_key
+            # 이벤트 루프를 막지 않도록 비동기 클라이언트를 한 번만 생성해 재사용
+            self.openai_client = AsyncOpenAI(
+                api_key=self.openai_api_key,
+                timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+            )
+        
+        # 호스트별 동시 요청 제한 (한 도메인에 요청이 몰리지 않도록)
+        self.per_host_concurrency = int(os.getenv("FETCH_PER_HOST_CONCURRENCY", "2"))
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        
+        # 호스트별 요청 한도, 서킷 브레이커, 지연 시간 기반 타임아웃
+        self.host_health = HostHealthRegistry()
+        
+        # 추출된 페이지 저장소 (같은 URL의 반복 다운로드/파싱 방지)
+        self.content_store = ContentStore()
+        
+        # HTML 본문 추출기 (파서 백엔드/모드 선택, 큰 문서는 프로세스 풀에서 파싱)
+        self.html_extractor = HtmlExtractor()
+        
+        # 다운로드 크기 상한 (HTML/텍스트는 상한까지만 읽어 사용, PDF는 상한을 넘으면 중단)
+        self.max_download_bytes = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+        self.max_pdf_bytes = int(os.getenv("FETCH_MAX_PDF_BYTES", str(10 * 1024 * 1024)))
+        
+        # 검색 결과 캐시 (동일/유사 검색어의 Google API 재호출 방지)
+        self.search_cache = SearchCache()
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        
+        # 동시에 들어온 같은 검색어/URL 요청은 진행 중인 한 번의 요청 결과를 공유
+        self.search_flight = SingleFlight("search")
+        self.fetch_flight = SingleFlight("fetch")
         
         # 검색어 전처리 및 대체 검색어 매핑
         self.query_mappings = {
@@ -41,13 +93,49 @@ class WebSearchService:
             '주식': ['stock', 'investment', '투자']
         }
     
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """환경 변수 설정에 따라 장기 사용 커넥션 풀 클라이언트 생성"""
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+        )
+        return httpx.AsyncClient(
+            http2=os.getenv("HTTP_ENABLE_HTTP2", "true").lower() == "true",
+            limits=limits,
+            timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", "30")),
+            follow_redirects=True
+        )
+    
+    def _register_pool_metrics(self):
+        """커넥션 풀 사용량을 Prometheus 게이지에 연결 (수집 시점에 계산)"""
+        HTTP_POOL_CONNECTIONS.labels(state='open').set_function(lambda: self.get_pool_stats()['open'])
+        HTTP_POOL_CONNECTIONS.labels(state='idle').set_function(lambda: self.get_pool_stats()['idle'])
+        HTTP_POOL_CONNECTIONS.labels(state='active').set_function(lambda: self.get_pool_stats()['active'])
+        HTTP_POOL_WAITING_REQUESTS.set_function(lambda: self.get_pool_stats()['waiting'])
+    
+    def get_pool_stats(self) -> Dict[str, int]:
+        """커넥션 풀 상태 조회 (열린/유휴/사용 중 커넥션, 대기 중 요청 수)"""
+        stats = {'open': 0, 'idle': 0, 'active': 0, 'waiting': 0}
+        try:
+            # httpx는 공개 API로 풀 상태를 노출하지 않으므로 httpcore 풀을 직접 조회
+            pool = self.session._transport._pool
+            connections = list(pool.connections)
+            stats['open'] = len(connections)
+            stats['idle'] = sum(1 for conn in connections if conn.is_idle())
+            stats['active'] = stats['open'] - stats['idle']
+            stats['waiting'] = sum(1 for request in getattr(pool, '_requests', []) if request.connection is None)
+        except Exception:
+            pass
+        return stats
+    
     async def search(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """웹 검색 수행 - Google Custom Search API 우선, 대체로 검색 시뮬레이션 사용"""
         try:
             # Google Custom Search API 사용 시도
             if self.google_api_key and self.google_cse_id:
                 print(f"Google Custom Search API 사용: {query}")
-                search_results = await self._google_search(query, max_results)
+                search_results = await self._cached_google_search(query, max_results)
                 if search_results:
                     return search_results
             
@@ -59,6 +147,44 @@ class WebSearchService:
             print(f"Error in web search: {e}")
             return await self._simulate_search(query, max_results)
     
+    async def _cached_google_search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """검색 캐시를 거친 Google 검색 (대체 검색어 재시도 결과까지 캐시)"""
+        key = self.search_cache.make_key(self._preprocess_query(query), max_results)
+        cached_results, state = await self.search_cache.get(key)
+        
+        if state == SearchCache.FRESH:
+            print(f"검색 캐시 히트: {query}")
+            return cached_results
+        
+        if state == SearchCache.STALE:
+            # 오래된 결과를 즉시 반환하고 백그라운드에서 갱신
+            if key not in self._revalidating:
+                print(f"검색 캐시 stale 히트, 백그라운드 갱신: {query}")
+                self._revalidating[key] = asyncio.create_task(self._revalidate(key, query, max_results))
+            return cached_results
+        
+        return await self.search_flight.do(key, lambda: self._search_and_cache(key, query, max_results))
+    
+    async def _search_and_cache(self, key: str, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """캐시 미스 시 Google 검색 후 결과 저장 (검색 실패는 캐시하지 않음 - 실제 빈 결과만 negative 캐시)"""
+        search_results = await self._google_search(query, max_results)
+        if search_results is None:
+            return []
+        await self.search_cache.set(key, search_results)
+        return search_results
+    
+    async def _revalidate(self, key: str, query: str, max_results: int):
+        """stale 캐시 항목 백그라운드 갱신"""
+        try:
+            search_results = await self._google_search(query, max_results)
+            # 갱신 실패(None)나 빈 결과면 기존 stale 결과를 유지
+            if search_results:
+                await self.search_cache.set(key, search_results)
+        except Exception as e:
+            print(f"검색 캐시 갱신 실패: {e}")
+        finally:
+            self._revalidating.pop(key, None)
+    
     def _preprocess_query(self, query: str) -> str:
         """검색어 전처리: 한국어 특수문자 제거 및 키워드 정리"""
         # 특수문자 제거
@@ -114,11 +240,8 @@ class WebSearchService:
                 변환된 키워드만 출력하세요 (설명 없이):
                 """
                 
-                # 최신 OpenAI API 사용
-                from openai import OpenAI
-                client = OpenAI(api_key=self.openai_api_key)
-                
-                response = client.chat.completions.create(
+                # 최신 OpenAI API 사용 (비동기)
+                response = await self.openai_client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=[
                         {"role": "system", "content": "당신은 검색어 최적화 전문가입니다. 검색어를 웹 검색에 적합한 일반적인 키워드로 변환합니다."},
@@ -161,8 +284,8 @@ class WebSearchService:
         
         return "AI artificial intelligence"
     
-    async def _google_search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
-        """Google Custom Search API를 사용한 검색"""
+    async def _google_search(self, query: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Google Custom Search API를 사용한 검색 - 요청 실패(HTTP 오류, 타임아웃, 할당량 초과)는 None, 결과가 없으면 빈 리스트"""
         try:
             # 검색어 전처리: 한국어 특수문자 제거 및 영어 키워드 추가
             processed_query = self._preprocess_query(query)
@@ -177,46 +300,45 @@ class WebSearchService:
                 'gl': 'kr'  # 한국 지역 설정
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
+            async with self._host_semaphore(self.google_search_url):
+                response = await self.session.get(
                     self.google_search_url,
-                    params=params,
-                    timeout=30.0
+                    params=params
                 )
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if 'items' not in data:
-                    print(f"Google API 응답에 items가 없음: {data}")
-                    # 검색어를 더 일반적으로 변경해서 재시도
-                    fallback_query = await self._create_fallback_query(query)
-                    if fallback_query != query:
-                        print(f"대체 검색어로 재시도: {fallback_query}")
-                        return await self._google_search(fallback_query, max_results)
-                    return []
-                
-                results = []
-                print(f"🔍 Google 검색 결과 URL들:")
-                for i, item in enumerate(data['items']):
-                    result = {
-                        'title': item.get('title', ''),
-                        'url': item.get('link', ''),
-                        'snippet': item.get('snippet', ''),
-                        'source': 'google'
-                    }
-                    results.append(result)
-                    
-                    # URL을 콘솔에 출력 (개발 환경 모니터링용)
-                    print(f"  [{i+1}] {result['url']}")
-                    print(f"      제목: {result['title'][:80]}...")
+            response.raise_for_status()
+            
+            data = response.json()
+            
+            if 'items' not in data:
+                print(f"Google API 응답에 items가 없음: {data}")
+                # 검색어를 더 일반적으로 변경해서 재시도
+                fallback_query = await self._create_fallback_query(query)
+                if fallback_query != query:
+                    print(f"대체 검색어로 재시도: {fallback_query}")
+                    return await self._google_search(fallback_query, max_results)
+                return []
+            
+            results = []
+            print(f"🔍 Google 검색 결과 URL들:")
+            for i, item in enumerate(data['items']):
+                result = {
+                    'title': item.get('title', ''),
+                    'url': item.get('link', ''),
+                    'snippet': item.get('snippet', ''),
+                    'source': 'google'
+                }
+                results.append(result)
                 
-                print(f"✅ Google 검색 완료: 총 {len(results)}개 결과")
-                return results[:max_results]
+                # URL을 콘솔에 출력 (개발 환경 모니터링용)
+                print(f"  [{i+1}] {result['url']}")
+                print(f"      제목: {result['title'][:80]}...")
+            
+            print(f"✅ Google 검색 완료: 총 {len(results)}개 결과")
+            return results[:max_results]
                 
         except Exception as e:
             print(f"Google 검색 오류: {e}")
-            return []
+            return None
     
 
     
@@ -255,48 +377,115 @@ class WebSearchService:
         print(f"✅ 시뮬레이션 검색 완료: 총 {len(sample_results[:max_results])}개 결과")
         return sample_results[:max_results]
     
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """URL 호스트별 동시 요청 제한 세마포어 반환 (공유 풀에서 호스트별 커넥션 상한 역할)"""
+        host = urlparse(url).netloc.lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+    
     async def fetch_url_content(self, url: str) -> Dict[str, Any]:
-        """URL에서 콘텐츠 추출"""
+        """URL에서 콘텐츠 추출 (같은 URL 동시 요청은 하나로 합치고, 호스트별 동시 요청 수 제한)"""
+        return await self.fetch_flight.do(url, lambda: self._fetch_with_host_limit(url))
+    
+    async def _fetch_with_host_limit(self, url: str) -> Dict[str, Any]:
+        async with self._host_semaphore(url):
+            return await self._fetch_url_content(url)
+    
+    async def _fetch_url_content(self, url: str) -> Dict[str, Any]:
+        """URL에서 콘텐츠 추출 (콘텐츠 저장소 재사용 및 조건부 재검증)"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, headers=self.headers, timeout=30.0)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 불필요한 태그 제거
-                for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-                    tag.decompose()
-                
-                # 텍스트 추출
-                title = soup.find('title')
-                title_text = title.get_text().strip() if title else ''
-                
-                # 본문 텍스트 추출 (우선순위: main > article > body)
-                main_content = soup.find('main') or soup.find('article') or soup.find('body')
-                if main_content:
-                    text = main_content.get_text(separator=' ', strip=True)
-                else:
-                    text = soup.get_text(separator=' ', strip=True)
-                
-                # 텍스트 정리
-                text = re.sub(r'\s+', ' ', text).strip()
+            entry = await asyncio.to_thread(self.content_store.get, url)
+            if entry and self.content_store.is_fresh(entry):
+                print(f"콘텐츠 저장소 히트: {url}")
+                return entry['page']
+            
+            # 저장된 항목이 있으면 조건부 GET으로 재검증
+            headers = dict(self.headers)
+            if entry:
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+            
+            # 계속 실패하는 호스트는 요청하지 않고, 요청 한도 안에서 호스트별 타임아웃으로 요청
+            host = self.host_health.get(url)
+            if not host.allow_request():
+                raise HostUnavailable('circuit_open', f"Circuit open for {host.host}")
+            await host.acquire()
+            
+            # 본문은 스트리밍으로 받으며 타입/크기를 확인 (지원하지 않는 타입은 본문을 받기 전에 중단)
+            request = self.session.build_request("GET", url, headers=headers, timeout=host.timeout())
+            start_time = time.perf_counter()
+            try:
+                response = await self.session.send(request, stream=True)
+            except httpx.TransportError:
+                host.record_failure()
+                raise
+            host.record_response(time.perf_counter() - start_time, response.status_code)
+            
+            try:
+                if response.status_code == 304 and entry:
+                    print(f"콘텐츠 재검증 완료 (304): {url}")
+                    await asyncio.to_thread(self.content_store.touch, url)
+                    return entry['page']
                 
-                # 텍스트 길이 제한 (너무 긴 텍스트 방지)
-                if len(text) > 10000:
-                    text = text[:10000] + "..."
+                response.raise_for_status()
                 
-                return {
-                    'url': url,
-                    'title': title_text,
-                    'content': text,
-                    'metadata': {
-                        'charset': response.encoding,
-                        'content_type': response.headers.get('content-type', ''),
-                        'status_code': response.status_code,
-                        'content_length': len(text)
-                    }
+                page = await self._extract_page(url, response)
+            except httpx.TransportError:
+                # 본문을 받는 도중의 연결 끊김/타임아웃도 호스트 실패로 기록
+                host.record_failure()
+                raise
+            finally:
+                await response.aclose()
+            if page['content']:
+                await asyncio.to_thread(
+                    self.content_store.put,
+                    url,
+                    page,
+                    response.headers.get('etag'),
+                    response.headers.get('last-modified')
+                )
+            return page
+        
+        except HostUnavailable as e:
+            print(f"요청 건너뜀 ({e.reason}) {url}: {e}")
+            FETCH_SKIPPED.labels(reason=e.reason).inc()
+            return {
+                'url': url,
+                'title': '',
+                'content': '',
+                'metadata': {'error': str(e), 'skipped': e.reason}
+            }
+        
+        except DownloadAborted as e:
+            print(f"다운로드 중단 ({e.reason}) {url}: {e}")
+            FETCH_ABORTED.labels(reason=e.reason).inc()
+            FETCH_DOWNLOADED_BYTES.labels(content_kind='aborted').observe(e.downloaded)
+            return {
+                'url': url,
+                'title': '',
+                'content': '',
+                'metadata': {'error': str(e), 'retryable': False}
+            }
+        
+        except httpx.HTTPStatusError as e:
+            # 4xx 응답(408/429 제외)은 재시도해도 같은 결과
+            status_code = e.response.status_code
+            print(f"Error fetching content from {url}: {e}")
+            return {
+                'url': url,
+                'title': '',
+                'content': '',
+                'metadata': {
+                    'error': str(e),
+                    'status_code': status_code,
+                    'retryable': status_code >= 500 or status_code in (408, 429)
                 }
+            }
                 
         except Exception as e:
             print(f"Error fetching content from {url}: {e}")
@@ -307,9 +496,58 @@ class WebSearchService:
                 'metadata': {'error': str(e)}
             }
     
+    async def _extract_page(self, url: str, response: httpx.Response) -> Dict[str, Any]:
+        """응답을 Content-Type에 따라 HTML/텍스트/PDF 경로로 읽고 제목과 본문 텍스트 추출"""
+        content_type = response.headers.get('content-type', '')
+        kind = content_kind(content_type)
+        if kind is None:
+            raise DownloadAborted('unsupported_type', f"Unsupported content type: {content_type}")
+        if kind == 'pdf' and not self.html_extractor.pdf_available:
+            raise DownloadAborted('unsupported_type', "PDF extraction requires pypdf")
+        
+        charset, truncated = None, False
+        if kind == 'pdf':
+            data, downloaded = await read_bytes(response, self.max_pdf_bytes)
+            extracted = await self.html_extractor.extract_pdf(data)
+        else:
+            text, charset, downloaded, truncated = await read_text(response, self.max_download_bytes)
+            if kind == 'html':
+                start_time = time.perf_counter()
+                extracted = await self.html_extractor.extract(text)
+                HTML_EXTRACT_DURATION.labels(backend=self.html_extractor.backend, mode=self.html_extractor.mode).observe(time.perf_counter() - start_time)
+            else:
+                extracted = await self.html_extractor.extract_text(text)
+        
+        text = extracted['content']
+        used = len(text.encode('utf-8'))
+        FETCH_DOWNLOADED_BYTES.labels(content_kind=kind).observe(downloaded)
+        FETCH_USED_BYTES.labels(content_kind=kind).observe(used)
+        if truncated:
+            print(f"다운로드 크기 상한 도달 ({self.max_download_bytes} bytes), 앞부분만 사용: {url}")
+        
+        return {
+            'url': url,
+            'title': extracted['title'],
+            'content': text,
+            'metadata': {
+                'charset': charset,
+                'content_type': content_type,
+                'content_kind': kind,
+                'status_code': response.status_code,
+                'content_length': len(text),
+                'bytes_downloaded': downloaded,
+                'bytes_used': used,
+                'truncated': truncated
+            }
+        }
+    
     async def fetch_multiple_urls(self, urls: List[str]) -> List[Dict[str, Any]]:
-        """여러 URL에서 콘텐츠 병렬 추출"""
-        tasks = [self.fetch_url_content(url) for url in urls]
+        """여러 URL에서 콘텐츠 병렬 추출 (서킷이 열린 호스트의 URL은 제외)"""
+        skipped = [url for url in urls if self.host_health.is_open(url)]
+        if skipped:
+            print(f"서킷이 열린 호스트의 URL {len(skipped)}개 제외")
+            FETCH_SKIPPED.labels(reason='circuit_open').inc(len(skipped))
+        tasks = [self.fetch_url_content(url) for url in urls if url not in skipped]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # 에러가 발생한 결과 필터링
@@ -362,6 +600,9 @@ class WebSearchService:
     async def close(self):
         """세션 정리"""
         await self.session.aclose()
+        await self.search_cache.close()
+        self.content_store.close()
+        self.html_extractor.close()
 
     async def classify_search_query(self, query: str, search_results: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """검색어를 웹 검색 컨텍스트와 함께 분석하여 분류"""
@@ -436,10 +677,7 @@ class WebSearchService:
             # OpenAI API를 사용하여 분류
             if self.openai_api_key:
                 try:
-                    from openai import OpenAI
-                    client = OpenAI(api_key=self.openai_api_key)
-                    
-                    response = client.chat.completions.create(
+                    response = await self.openai_client.chat.completions.create(
                         model="gpt-4o-mini",
                         messages=[
                             {"role": "system", "content": "당신은 검색어 분류 전문가입니다. 웹 검색 결과를 바탕으로 정확하고 일관된 분류를 제공합니다."},